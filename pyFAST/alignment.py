@@ -0,0 +1,169 @@
+"""
+Alignment of outputs and baselines written on different time grids.
+
+The time column of the outputs is already decoded from the TimeScl/TimeOff
+or TimeOut1/TimeIncr metadata of binary files, so both series are aligned
+on their first column and compared over the time range covered by both.
+When the time steps of one series inside that range are a subset of the
+other's, as for an output written at a multiple of the baseline's step,
+both are compared on those common time steps without interpolation.
+Otherwise the output channels are linearly interpolated onto the baseline
+time steps with `np.searchsorted`, vectorized over channels.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+# Fraction of the baseline time step below which two times are equal
+TIME_EPS = 1e-6
+
+
+def interpolate(time: np.ndarray, data: np.ndarray,
+                new_time: np.ndarray) -> np.ndarray:
+    """
+    Linearly interpolates rows of data onto new times.
+
+    Parameters
+    ----------
+    time : np.ndarray
+        Increasing times of the rows of `data`.
+    data : np.ndarray
+        Data of shape [len(time), channels].
+    new_time : np.ndarray
+        Times to interpolate at, within the range of `time`.
+
+    Returns
+    -------
+    np.ndarray
+        Data of shape [len(new_time), channels].
+    """
+    if len(time) == 1:
+        return np.repeat(data, len(new_time), axis=0)
+    index = np.clip(np.searchsorted(time, new_time, side='right') - 1,
+                    0, len(time) - 2)
+    t0, t1 = time[index], time[index + 1]
+    span = np.where(t1 > t0, t1 - t0, 1.0)
+    weight = np.clip((new_time - t0) / span, 0.0, 1.0)[:, np.newaxis]
+    return data[index] * (1 - weight) + data[index + 1] * weight
+
+
+def match_times(time: np.ndarray, grid: np.ndarray, eps: float) -> np.ndarray:
+    """
+    Returns the index in `grid` of each time, or -1 for times further than
+    `eps` from every time of the grid.
+
+    Parameters
+    ----------
+    time : np.ndarray
+        Times to look up.
+    grid : np.ndarray
+        Increasing times.
+    eps : float
+        Largest difference between two equal times.
+    """
+    if len(grid) == 0:
+        return np.full(len(time), -1)
+    after = np.clip(np.searchsorted(grid, time), 0, len(grid) - 1)
+    before = np.clip(after - 1, 0, len(grid) - 1)
+    nearest = np.where(np.abs(grid[before] - time) <= np.abs(grid[after] - time),
+                       before, after)
+    return np.where(np.abs(grid[nearest] - time) <= eps, nearest, -1)
+
+
+def align_outputs(test: np.ndarray, baseline: np.ndarray
+                  ) -> Tuple[np.ndarray, np.ndarray, Optional[dict]]:
+    """
+    Aligns an output and its baseline on a common time grid.
+
+    Parameters
+    ----------
+    test, baseline : np.ndarray
+        Data of shape [samples, channels], time in the first column.
+
+    Returns
+    -------
+    test, baseline : np.ndarray
+        Aligned data with the same shape, restricted to the time range of
+        both series. Both are restricted to their common time steps if the
+        time steps of one series are a subset of the other's, otherwise
+        the output is interpolated onto the baseline time steps. The inputs
+        are returned unchanged if they're already aligned.
+    finding : dict or None
+        None if the inputs were already aligned. Otherwise the time ranges
+        'test_range', 'baseline_range' and 'overlap', the number of
+        'samples' compared out of 'baseline_samples', and the flags
+        'truncated' (the output doesn't cover the baseline's time range)
+        and 'resampled' (the output was interpolated).
+
+    Raises
+    ------
+    ValueError
+        If the numbers of channels differ or the time ranges don't overlap.
+    """
+    if test.shape[1] != baseline.shape[1]:
+        raise ValueError(f"output has {test.shape[1]} channels, "
+                         f"baseline has {baseline.shape[1]}")
+
+    test_time, baseline_time = test[:, 0], baseline[:, 0]
+    step = np.median(np.diff(baseline_time)) if len(baseline_time) > 1 else 1.0
+    eps = TIME_EPS * abs(step)
+    if test.shape == baseline.shape and \
+            np.all(np.abs(test_time - baseline_time) <= eps):
+        return test, baseline, None
+
+    start = max(test_time[0], baseline_time[0])
+    end = min(test_time[-1], baseline_time[-1])
+    if end < start - eps:
+        raise ValueError(f"output time range [{test_time[0]:g}, {test_time[-1]:g}] "
+                         f"doesn't overlap baseline time range "
+                         f"[{baseline_time[0]:g}, {baseline_time[-1]:g}]")
+
+    test_inside = test[(test_time >= start - eps) & (test_time <= end + eps)]
+    baseline_inside = baseline[(baseline_time >= start - eps) &
+                               (baseline_time <= end + eps)]
+
+    # Compare on the common time steps if one grid contains the other,
+    # interpolate the output onto the baseline grid otherwise
+    resampled = False
+    in_test = match_times(baseline_inside[:, 0], test_inside[:, 0], eps)
+    in_baseline = match_times(test_inside[:, 0], baseline_inside[:, 0], eps)
+    if np.all(in_test >= 0):
+        aligned_baseline = baseline_inside
+        aligned_test = test_inside[in_test]
+    elif len(test_inside) and np.all(in_baseline >= 0):
+        aligned_baseline = baseline_inside[in_baseline]
+        aligned_test = test_inside
+    else:
+        aligned_baseline = baseline_inside
+        aligned_test = interpolate(test_time, test, aligned_baseline[:, 0])
+        resampled = True
+    aligned_test = aligned_test.copy()
+    aligned_test[:, 0] = aligned_baseline[:, 0]
+
+    finding = {
+        'test_range': (float(test_time[0]), float(test_time[-1])),
+        'baseline_range': (float(baseline_time[0]), float(baseline_time[-1])),
+        'overlap': (float(start), float(end)),
+        'samples': len(aligned_baseline),
+        'baseline_samples': len(baseline_time),
+        'truncated': bool(test_time[0] > baseline_time[0] + eps or
+                          test_time[-1] < baseline_time[-1] - eps),
+        'resampled': bool(resampled),
+    }
+    return aligned_test, aligned_baseline, finding
+
+
+def format_finding(finding: dict) -> str:
+    """Describes an alignment finding in one line."""
+    text = (f"compared {finding['samples']} of {finding['baseline_samples']} "
+            f"baseline samples over t = {finding['overlap'][0]:g}-"
+            f"{finding['overlap'][1]:g} s")
+    if finding['truncated']:
+        text = (f"truncated: output covers t = {finding['test_range'][0]:g}-"
+                f"{finding['test_range'][1]:g} s of {finding['baseline_range'][0]:g}-"
+                f"{finding['baseline_range'][1]:g} s, " + text)
+    if finding['resampled']:
+        text += ", output resampled onto baseline time steps"
+    return text
@@ -0,0 +1,91 @@
+import unittest
+
+import numpy as np
+
+from .alignment import align_outputs, interpolate
+from .regression_tester import calculateNorms, passing_channels
+
+
+def _series(time):
+    return np.column_stack((time, np.sin(time), 2 * time + 1))
+
+
+class TestAlignment(unittest.TestCase):
+    def setUp(self):
+        self.baseline = _series(np.arange(0, 10.001, 0.1))
+
+    def test_interpolate(self):
+        time = np.array([0.0, 1.0, 2.0])
+        data = np.array([[0.0, 10.0], [1.0, 20.0], [2.0, 40.0]])
+        np.testing.assert_allclose(interpolate(time, data, np.array([0, 0.5, 1.5, 2])),
+                                   [[0, 10], [0.5, 15], [1.5, 30], [2, 40]])
+
+    def test_aligned_inputs_unchanged(self):
+        test, baseline, finding = align_outputs(self.baseline, self.baseline)
+        self.assertIs(test, self.baseline)
+        self.assertIsNone(finding)
+
+    def test_truncated_output(self):
+        test = self.baseline[:41]
+        aligned_test, aligned_baseline, finding = align_outputs(test, self.baseline)
+        np.testing.assert_array_equal(aligned_test, test)
+        np.testing.assert_array_equal(aligned_baseline, self.baseline[:41])
+        self.assertTrue(finding['truncated'])
+        self.assertFalse(finding['resampled'])
+        self.assertEqual(finding['samples'], 41)
+        self.assertAlmostEqual(finding['overlap'][1], 4.0)
+
+    def test_different_output_rate(self):
+        test = _series(np.arange(0, 10.001, 0.05))
+        aligned_test, aligned_baseline, finding = align_outputs(test, self.baseline)
+        np.testing.assert_allclose(aligned_test, self.baseline, atol=1e-12)
+        self.assertFalse(finding['truncated'])
+        self.assertFalse(finding['resampled'])
+
+        test = _series(np.arange(0, 10.001, 0.25))
+        aligned_test, _, finding = align_outputs(test, self.baseline)
+        self.assertTrue(finding['resampled'])
+        np.testing.assert_allclose(aligned_test[:, 2], self.baseline[:, 2])
+
+    def test_coarser_output(self):
+        # Written at twice the baseline step, with a nonlinear channel that
+        # interpolation wouldn't reproduce
+        test = self.baseline[::2]
+        aligned_test, aligned_baseline, finding = align_outputs(test, self.baseline)
+        np.testing.assert_array_equal(aligned_test, test)
+        np.testing.assert_array_equal(aligned_baseline, test)
+        self.assertFalse(finding['resampled'])
+        self.assertFalse(finding['truncated'])
+        self.assertEqual(finding['samples'], 51)
+
+    def test_unshared_time_steps(self):
+        test = _series(np.arange(0.05, 10.001, 0.1))
+        aligned_test, aligned_baseline, finding = align_outputs(test, self.baseline)
+        self.assertTrue(finding['resampled'])
+        np.testing.assert_array_equal(aligned_baseline, self.baseline[1:-1])
+        np.testing.assert_allclose(aligned_test[:, 2], aligned_baseline[:, 2])
+
+    def test_tolerance_of_whole_baseline(self):
+        # The overlap of a truncated output only holds small values, which
+        # mustn't tighten the absolute tolerance
+        baseline = np.column_stack((np.arange(0, 10.001, 0.1),
+                                    np.r_[np.zeros(51), np.full(50, 1000.0)]))
+        test = baseline[:41].copy()
+        test[:, 1] += 0.05
+        aligned_test, aligned_baseline, _ = align_outputs(test, baseline)
+        self.assertFalse(passing_channels(aligned_test.T, aligned_baseline.T, 2, 2)[1])
+        self.assertTrue(passing_channels(aligned_test.T, aligned_baseline.T, 2, 2,
+                                         reference=baseline.T)[1])
+
+    def test_channel_mismatch(self):
+        with self.assertRaises(ValueError):
+            align_outputs(self.baseline[:, :2], self.baseline)
+
+    def test_norms_over_overlap(self):
+        norms = calculateNorms(self.baseline[:41], self.baseline)
+        self.assertEqual(norms.shape, (3, 3))
+        np.testing.assert_array_equal(norms, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,387 @@
+"""Repeated, isolated timing of regression test cases."""
+
+import os
+import json
+import time
+import queue
+import shutil
+import struct
+import tempfile
+import tracemalloc
+from multiprocessing.pool import ThreadPool
+from typing import List
+
+import numpy as np
+
+from .executor import Executor
+from .error_plotting import export_case_summary
+from .fast_io import load_output
+from .compression import CODECS, compress_file
+
+
+def runtime_statistics(samples) -> dict:
+    """
+    Summarizes a set of runtime samples.
+
+    Parameters
+    ----------
+    samples : array-like
+        Measured runtimes in seconds.
+
+    Returns
+    -------
+    dict
+        Minimum, median, interquartile range and coefficient of variation.
+    """
+    samples = np.asarray(samples, dtype=float)
+    if samples.size == 0:
+        return {"min": np.nan, "median": np.nan, "iqr": np.nan, "cv": np.nan}
+    q25, q50, q75 = np.percentile(samples, [25, 50, 75])
+    mean = samples.mean()
+    cv = samples.std(ddof=1) / mean if samples.size > 1 and mean > 0 else 0.0
+    return {
+        "min": float(samples.min()),
+        "median": float(q50),
+        "iqr": float(q75 - q25),
+        "cv": float(cv),
+    }
+
+
+class Benchmark:
+    """
+    Runs each case of an `Executor` several times and collects its runtimes.
+
+    Cases are staged with the executor, then each one is run `warmup` times
+    without being measured followed by `repeat` timed runs. Up to `jobs`
+    cases run concurrently, each pinned to its own disjoint set of cores so
+    that concurrent cases don't compete for the same CPUs. When pinning,
+    `jobs` is limited to the number of cores so that the sets never overlap.
+    """
+
+    def __init__(self, executor: Executor, repeat: int = 5, warmup: int = 1,
+                 pin: bool = True):
+        """
+        Parameters
+        ----------
+        executor : Executor
+            Executor holding the cases to benchmark.
+        repeat : int, default: 5
+            Number of timed runs per case.
+        warmup : int, default: 1
+            Number of untimed runs per case before timing.
+        pin : bool, default: True
+            Flag to pin each concurrent case to a disjoint set of cores.
+        """
+        if repeat < 1 or warmup < 0:
+            raise ValueError("Invalid value given for 'repeat' or 'warmup'")
+        self.executor = executor
+        self.repeat = repeat
+        self.warmup = warmup
+        self.pin = pin
+        self.jobs = max(1, executor.jobs)
+        if pin:
+            self.jobs = min(self.jobs, len(executor.cores))
+        self.results = []
+
+    def _core_slots(self) -> List[List[int]]:
+        """Splits the available cores into one disjoint set per job."""
+        if not self.pin:
+            return [[] for _ in range(self.jobs)]
+        cores = self.executor.cores
+        per_slot = len(cores) // self.jobs
+        return [cores[i * per_slot:(i + 1) * per_slot] for i in range(self.jobs)]
+
+    def _bench_case(self, case: dict) -> dict:
+
+        # Take a set of cores for the duration of this case
+        cpus = self._slots.get()
+        try:
+            samples = []
+            ret_code = 0
+            for i in range(self.warmup + self.repeat):
+                run = {**case, "cpus": cpus,
+                       "num_threads": executor_threads(self.executor, case, cpus)}
+                self.executor._execute_case(run)
+                ret_code = run['ret_code']
+                if ret_code != 0:
+                    break
+                if i >= self.warmup:
+                    samples.append(run['run_time'])
+        finally:
+            self._slots.put(cpus)
+
+        result = {
+            "driver": case['driver'],
+            "name": case['name'],
+            "exe_hash": case.get('exe_hash'),
+            "ret_code": ret_code,
+            "cpus": list(cpus),
+            "samples": samples,
+            **runtime_statistics(samples),
+        }
+        return result
+
+    def run(self) -> List[dict]:
+        """
+        Stages and benchmarks all cases.
+
+        Returns
+        -------
+        List[dict]
+            Runtime statistics for each case in the order of the cases.
+        """
+
+        self.executor._build_local_case_directories()
+
+        self._slots = queue.Queue()
+        for cpus in self._core_slots():
+            self._slots.put(cpus)
+
+        results = []
+        with ThreadPool(self.jobs) as pool:
+            for result in pool.imap(self._bench_case, self.executor.cases):
+                print(format_result(result), flush=True)
+                results.append(result)
+
+        self.results = results
+        return results
+
+    def to_json(self, path: str):
+        """Writes the benchmark results to a JSON file."""
+        with open(path, "w") as f:
+            json.dump({"repeat": self.repeat, "warmup": self.warmup,
+                       "cases": self.results}, f, indent=2)
+
+
+def executor_threads(executor: Executor, case: dict, cpus: List[int]) -> int:
+    """Returns the thread count of a case, limited to its pinned cores."""
+    num_threads = executor._case_threads(case)
+    return min(num_threads, len(cpus)) if cpus else num_threads
+
+
+def format_result(result: dict) -> str:
+    if result['ret_code'] != 0:
+        return (f"{result['name']:<42}  FAILED with code {result['ret_code']}")
+    return (f"{result['name']:<42}  min {result['min']:>9.3f}  "
+            f"median {result['median']:>9.3f}  iqr {result['iqr']:>8.3f}  "
+            f"cv {100 * result['cv']:>6.2f}%")
+
+
+def bootstrap_ratio(samples_a, samples_b, confidence: float = 0.95,
+                    resamples: int = 2000, seed: int = 0):
+    """
+    Estimates the ratio of median runtimes b/a with a bootstrap confidence
+    interval.
+
+    Parameters
+    ----------
+    samples_a, samples_b : array-like
+        Runtime samples of the reference and the candidate executable.
+    confidence : float, default: 0.95
+        Confidence level of the interval.
+    resamples : int, default: 2000
+        Number of bootstrap resamples.
+    seed : int, default: 0
+        Seed of the random generator, fixed for reproducible reports.
+
+    Returns
+    -------
+    ratio : float
+        Ratio of the medians.
+    low, high : float
+        Bounds of the confidence interval of the ratio.
+    """
+    a = np.asarray(samples_a, dtype=float)
+    b = np.asarray(samples_b, dtype=float)
+    rng = np.random.default_rng(seed)
+    medians_a = np.median(rng.choice(a, (resamples, a.size)), axis=1)
+    medians_b = np.median(rng.choice(b, (resamples, b.size)), axis=1)
+    ratios = medians_b / medians_a
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(ratios, [alpha, 1 - alpha])
+    return float(np.median(b) / np.median(a)), float(low), float(high)
+
+
+def compare_results(path_a: str, path_b: str,
+                    confidence: float = 0.95) -> List[dict]:
+    """
+    Compares two benchmark JSON files case by case.
+
+    Parameters
+    ----------
+    path_a : str
+        Benchmark results of the reference executable.
+    path_b : str
+        Benchmark results of the candidate executable.
+    confidence : float, default: 0.95
+        Confidence level of the ratio intervals.
+
+    Returns
+    -------
+    List[dict]
+        Median ratio b/a with its confidence interval for every case
+        present in both files with successful samples.
+    """
+    with open(path_a) as f:
+        cases_a = {(c['driver'], c['name']): c for c in json.load(f)['cases']}
+    with open(path_b) as f:
+        cases_b = json.load(f)['cases']
+
+    comparison = []
+    for case_b in cases_b:
+        case_a = cases_a.get((case_b['driver'], case_b['name']))
+        if case_a is None or not case_a['samples'] or not case_b['samples']:
+            continue
+        ratio, low, high = bootstrap_ratio(case_a['samples'],
+                                           case_b['samples'], confidence)
+        comparison.append({
+            "driver": case_b['driver'],
+            "name": case_b['name'],
+            "median_a": case_a['median'],
+            "median_b": case_b['median'],
+            "ratio": ratio,
+            "low": low,
+            "high": high,
+            "significant": bool(low > 1 or high < 1),
+        })
+    return comparison
+
+
+def bench_case_summary(channels: List[int], repeat: int = 5) -> List[dict]:
+    """
+    Times the case summary report for synthetic cases of increasing channel
+    counts, to check that report generation scales linearly.
+
+    Parameters
+    ----------
+    channels : List[int]
+        Channel counts of the synthetic cases.
+    repeat : int, default: 5
+        Number of timed reports per channel count.
+
+    Returns
+    -------
+    List[dict]
+        For each channel count, the `runtime_statistics` of the report in
+        seconds, the median time per channel and the peak memory allocated
+        while writing the report, in bytes.
+    """
+    rng = np.random.default_rng(0)
+    results = []
+    with tempfile.TemporaryDirectory() as run_path:
+        for count in channels:
+            names = ["Time"] + [f"Channel{i}" for i in range(count)]
+            norms = rng.random((count + 1, 3))
+            channels_ok = rng.random(count + 1) > 0.1
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                export_case_summary(run_path, "bench", names, channels_ok, norms, [])
+                samples.append(time.perf_counter() - start)
+
+            # Measure allocations in a separate run, tracing slows it down
+            tracemalloc.start()
+            export_case_summary(run_path, "bench", names, channels_ok, norms, [])
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            result = {"channels": count, **runtime_statistics(samples),
+                      "peak_memory": peak}
+            result["per_channel"] = result["median"] / count
+            results.append(result)
+    return results
+
+
+def format_case_summary_result(result: dict) -> str:
+    return (f"{result['channels']:>8} channels  "
+            f"median {1e3 * result['median']:>9.3f} ms  "
+            f"{1e6 * result['per_channel']:>7.3f} us/channel  "
+            f"peak {result['peak_memory'] / 1024:>8.1f} KiB")
+
+
+def _synthetic_output(path: str, num_rows: int = 200000, num_channels: int = 100):
+    """
+    Writes a compressed .outb file (format 2) of smooth, slightly noisy
+    channels, a quarter of them constant as are many OpenFAST outputs.
+    """
+    rng = np.random.default_rng(0)
+    t = np.arange(num_rows) * 0.01
+    data = np.sin(np.outer(t, rng.uniform(0.1, 2, num_channels))) + \
+        0.001 * rng.standard_normal((num_rows, num_channels))
+    data[:, ::4] = 1.0
+    low, high = data.min(axis=0), data.max(axis=0)
+    scale = np.where(high > low, 65000.0 / np.where(high > low, high - low, 1), 1.0)
+    offset = -32500.0 - low * scale
+    names = ["Time"] + [f"Chan{i}" for i in range(num_channels)]
+    with open(path, "wb") as f:
+        f.write(struct.pack("h", 2))
+        f.write(struct.pack("ii", num_channels, num_rows))
+        f.write(struct.pack("dd", 0.0, 0.01))
+        f.write(struct.pack(f"{num_channels}f", *scale))
+        f.write(struct.pack(f"{num_channels}f", *offset))
+        f.write(struct.pack("i", 0))
+        f.write("".join(name.ljust(10) for name in names).encode())
+        f.write("".join("(-)".ljust(10) for _ in names).encode())
+        f.write(np.round(data * scale + offset).astype("<i2").tobytes())
+
+
+def bench_codecs(path: str = None, repeat: int = 5) -> List[dict]:
+    """
+    Times `load_output` for an output file stored uncompressed and with
+    each codec of `compression.CODECS`.
+
+    Parameters
+    ----------
+    path : str, optional
+        Output file to read, by default a synthetic 200000 x 100 .outb file.
+    repeat : int, default: 5
+        Number of timed reads per codec.
+
+    Returns
+    -------
+    List[dict]
+        For each codec, its 'ratio' of stored to uncompressed size, the
+        `runtime_statistics` of a read in seconds and the 'throughput' of
+        the median read in uncompressed MB/s. Codecs whose package is
+        missing have an 'error' instead.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, os.path.basename(path) if path
+                              else "synthetic.outb")
+        if path:
+            shutil.copyfile(path, source)
+        else:
+            _synthetic_output(source)
+        size = os.path.getsize(source)
+
+        for codec in (None,) + tuple(CODECS):
+            stored = source
+            if codec:
+                stored = os.path.join(directory, codec, os.path.basename(source))
+                os.makedirs(os.path.dirname(stored))
+                shutil.copyfile(source, stored)
+                try:
+                    stored = compress_file(stored, codec)
+                except ImportError as error:
+                    results.append({"codec": codec, "error": str(error)})
+                    continue
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                load_output(stored)
+                samples.append(time.perf_counter() - start)
+            result = {"codec": codec or "none",
+                      "ratio": os.path.getsize(stored) / size,
+                      **runtime_statistics(samples)}
+            result["throughput"] = size / result["median"] / 1e6
+            results.append(result)
+    return results
+
+
+def format_codec_result(result: dict) -> str:
+    if "error" in result:
+        return f"{result['codec']:<6}  {result['error']}"
+    return (f"{result['codec']:<6}  size {100 * result['ratio']:>6.1f}%  "
+            f"median {1e3 * result['median']:>9.3f} ms  "
+            f"{result['throughput']:>8.1f} MB/s")
@@ -0,0 +1,126 @@
+import os
+import json
+import tempfile
+import unittest
+
+import numpy as np
+
+from .bench import Benchmark, bootstrap_ratio, compare_results, runtime_statistics
+from .executor import Executor
+
+
+class TestBench(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write_results(self, name, cases):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            json.dump({"repeat": 20, "warmup": 1, "cases": cases}, f)
+        return path
+
+    def test_runtime_statistics(self):
+        stats = runtime_statistics([4.0, 1.0, 3.0, 2.0, 5.0])
+        self.assertEqual(stats['min'], 1.0)
+        self.assertEqual(stats['median'], 3.0)
+        self.assertEqual(stats['iqr'], 2.0)
+        self.assertAlmostEqual(stats['cv'], np.std([1, 2, 3, 4, 5], ddof=1) / 3)
+        self.assertEqual(runtime_statistics([2.0])['cv'], 0.0)
+        self.assertTrue(np.isnan(runtime_statistics([])['median']))
+
+    def test_bootstrap_ratio(self):
+        rng = np.random.default_rng(1)
+        a = 10 + rng.standard_normal(30) * 0.1
+        b = 12 + rng.standard_normal(30) * 0.1
+        ratio, low, high = bootstrap_ratio(a, b)
+        self.assertAlmostEqual(ratio, np.median(b) / np.median(a))
+        self.assertLess(low, ratio)
+        self.assertGreater(high, ratio)
+        self.assertGreater(low, 1.1)
+        self.assertLess(high, 1.3)
+
+        # A fixed seed gives the same interval, a wider confidence a wider one
+        self.assertEqual(bootstrap_ratio(a, b), (ratio, low, high))
+        _, low_99, high_99 = bootstrap_ratio(a, b, confidence=0.99)
+        self.assertLessEqual(low_99, low)
+        self.assertGreaterEqual(high_99, high)
+
+    def test_compare_results(self):
+        rng = np.random.default_rng(2)
+        same = list(5 + rng.standard_normal(20) * 0.05)
+        slow = list(6 + rng.standard_normal(20) * 0.05)
+
+        def case(name, samples, driver="openfast"):
+            return {"driver": driver, "name": name, "samples": samples,
+                    "median": float(np.median(samples)) if samples else None}
+
+        path_a = self._write_results("a.json", [
+            case("same", same), case("slow", same), case("failed", same),
+            case("only_a", same)])
+        path_b = self._write_results("b.json", [
+            case("same", list(np.array(same)[::-1])), case("slow", slow),
+            case("failed", []), case("only_b", same),
+            case("same", same, driver="beamdyn")])
+
+        comparison = compare_results(path_a, path_b)
+        self.assertListEqual([c['name'] for c in comparison], ["same", "slow"])
+        same_result, slow_result = comparison
+        self.assertAlmostEqual(same_result['ratio'], 1.0)
+        self.assertFalse(same_result['significant'])
+        self.assertTrue(slow_result['significant'])
+        self.assertLess(slow_result['low'], slow_result['ratio'])
+        self.assertGreater(slow_result['high'], slow_result['ratio'])
+        self.assertEqual(slow_result['median_b'], np.median(slow))
+
+    def test_benchmark(self):
+        root = self.tmp.name
+        count_path = os.path.join(root, "count")
+        exe = os.path.join(root, "fakefast")
+        with open(exe, "w") as f:
+            f.write(f'#!/bin/sh\necho run >> {count_path}\n')
+        os.chmod(exe, 0o755)
+        input_path = os.path.join(root, "r-test", "case")
+        run_path = os.path.join(root, "build", "case")
+        os.makedirs(input_path)
+        for name in ("case.fst", "case.out"):
+            with open(os.path.join(input_path, name), "w") as f:
+                f.write("\n")
+        case = {
+            "name": "case", "driver": "openfast", "executable_path": exe,
+            "input_path": input_path, "run_path": run_path,
+            "input_file": "case.fst",
+            "input_file_path": os.path.join(run_path, "case.fst"),
+            "log_path": os.path.join(run_path, "case.log"),
+            "baseline_file_ext": ".out",
+        }
+
+        executor = Executor([case], jobs=1)
+        benchmark = Benchmark(executor, repeat=3, warmup=2)
+        result, = benchmark.run()
+        with open(count_path) as f:
+            self.assertEqual(len(f.readlines()), 5)
+        self.assertEqual(result['ret_code'], 0)
+        self.assertEqual(len(result['samples']), 3)
+        self.assertEqual(result['min'], min(result['samples']))
+        self.assertListEqual(result['cpus'], list(executor.cores))
+
+        path = os.path.join(root, "bench.json")
+        benchmark.to_json(path)
+        with open(path) as f:
+            self.assertEqual(json.load(f)['cases'][0]['samples'], result['samples'])
+
+    def test_core_slots(self):
+        executor = Executor([], jobs=1)
+        executor.jobs = len(executor.cores) + 2
+        benchmark = Benchmark(executor)
+        slots = benchmark._core_slots()
+        self.assertEqual(len(slots), len(executor.cores))
+        cores = [core for slot in slots for core in slot]
+        self.assertEqual(len(cores), len(set(cores)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,260 @@
+"""
+Block hash index of binary (.outb) output files.
+
+The packed channel data of an output file is split into blocks of a fixed
+number of time rows, and every block is hashed separately for each group of
+adjacent channels. Comparing the indices of an output and its baseline
+tells, without decoding the data, whether they are bit-for-bit identical
+and otherwise the first time window and channels where they differ.
+
+Packed values are only comparable if both files use the same packing
+header (channel scales and offsets, number of rows and channels), which is
+also part of the index.
+"""
+
+import os
+import json
+import struct
+import hashlib
+from typing import List, Optional
+
+import numpy as np
+
+
+FILE_ID_WITH_TIME = 1
+FILE_ID_NO_COMPRESS_WITHOUT_TIME = 3
+FILE_ID_CHAN_LEN_IN = 4
+
+# Default number of time rows per block and channels per group
+BLOCK_ROWS = 1024
+GROUP_SIZE = 16
+
+INDEX_EXT = ".bidx"
+INDEX_VERSION = 1
+
+
+def _hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def read_layout(path: str) -> dict:
+    """
+    Reads the header of a binary output file and locates its data.
+
+    Returns
+    -------
+    dict
+        'file_id', 'num_channels' (excluding time), 'num_rows', channel
+        'names' and 'units' (including time), offsets of the packed 'time'
+        and channel 'data' in bytes, channel 'dtype', 'scale' and 'offset',
+        time 'time_scale' and 'time_offset', or 'time_start' and
+        'time_step', and 'header_hash'.
+    """
+    with open(path, 'rb') as f:
+        def read(fmt):
+            size = struct.calcsize(fmt)
+            return struct.unpack(fmt, f.read(size))
+
+        file_id, = read('h')
+        name_length = read('h')[0] if file_id == FILE_ID_CHAN_LEN_IN else 10
+        num_channels, num_rows = read('ii')
+        time_a, time_b = read('dd')
+        scale = offset = None
+        if file_id != FILE_ID_NO_COMPRESS_WITHOUT_TIME:
+            scale = np.array(read(f'{num_channels}f'))
+            offset = np.array(read(f'{num_channels}f'))
+        desc_start = f.tell()
+        desc_length, = read('i')
+        f.read(desc_length)
+        desc_end = f.tell()
+        names = [f.read(name_length).decode(errors='replace').strip()
+                 for _ in range(num_channels + 1)]
+        units = [f.read(name_length).decode(errors='replace').strip()[1:-1]
+                 for _ in range(num_channels + 1)]
+        header_end = f.tell()
+
+        # Header without the description, which holds the date of the run
+        f.seek(0)
+        header = f.read(desc_start)
+        f.seek(desc_end)
+        header += f.read(header_end - desc_end)
+
+    layout = {
+        'file_id': file_id,
+        'num_channels': num_channels,
+        'num_rows': num_rows,
+        'names': names,
+        'units': units,
+        'dtype': np.float64 if file_id == FILE_ID_NO_COMPRESS_WITHOUT_TIME
+        else np.int16,
+        'scale': scale,
+        'offset': offset,
+        'time': header_end,
+        'data': header_end + (4 * num_rows if file_id == FILE_ID_WITH_TIME else 0),
+    }
+    if file_id == FILE_ID_WITH_TIME:
+        layout.update(time_scale=time_a, time_offset=time_b)
+    else:
+        layout.update(time_start=time_a, time_step=time_b)
+    layout['header_hash'] = _hash(header)
+    return layout
+
+
+def build_index(path: str, block_rows: int = BLOCK_ROWS,
+                group_size: int = GROUP_SIZE) -> dict:
+    """
+    Computes the block hash index of a binary output file.
+
+    Parameters
+    ----------
+    path : str
+        Path to the .outb file.
+    block_rows : int, default: 1024
+        Number of time rows per block.
+    group_size : int, default: 16
+        Number of channels per group.
+
+    Returns
+    -------
+    dict
+        Index with the packing 'header' hash, the file 'size' and
+        'mtime_ns', and for each block the hashes of its packed 'time'
+        values and of each channel group in 'blocks'.
+    """
+    layout = read_layout(path)
+    num_rows, num_channels = layout['num_rows'], layout['num_channels']
+    itemsize = np.dtype(layout['dtype']).itemsize
+    stat = os.stat(path)
+
+    index = {
+        'version': INDEX_VERSION,
+        'block_rows': block_rows,
+        'group_size': group_size,
+        'header': layout['header_hash'],
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'time': [],
+        'blocks': [],
+    }
+    with open(path, 'rb') as f:
+        for start in range(0, num_rows, block_rows):
+            rows = min(block_rows, num_rows - start)
+            if layout['file_id'] == FILE_ID_WITH_TIME:
+                f.seek(layout['time'] + 4 * start)
+                index['time'].append(_hash(f.read(4 * rows)))
+            f.seek(layout['data'] + itemsize * num_channels * start)
+            block = np.frombuffer(f.read(itemsize * num_channels * rows),
+                                  dtype=layout['dtype']).reshape(rows, -1)
+            index['blocks'].append(
+                [_hash(block[:, g:g + group_size].tobytes())
+                 for g in range(0, num_channels, group_size)])
+    return index
+
+
+def index_path(path: str) -> str:
+    return path + INDEX_EXT
+
+
+def load_index(path: str, block_rows: int = BLOCK_ROWS,
+               group_size: int = GROUP_SIZE, write: bool = False) -> dict:
+    """
+    Returns the index of an output file, reading it from next to the file
+    if it's up to date and otherwise computing it.
+
+    Parameters
+    ----------
+    path : str
+        Path to the .outb file.
+    block_rows, group_size : int
+        Block layout of the index.
+    write : bool, default: False
+        Flag to write a recomputed index next to the file, as done for
+        baselines, which are indexed once and compared many times.
+    """
+    stat = os.stat(path)
+    try:
+        with open(index_path(path)) as f:
+            index = json.load(f)
+        if (index['version'], index['block_rows'], index['group_size'],
+                index['size'], index['mtime_ns']) == \
+                (INDEX_VERSION, block_rows, group_size,
+                 stat.st_size, stat.st_mtime_ns):
+            return index
+    except (OSError, ValueError, KeyError):
+        pass
+
+    index = build_index(path, block_rows, group_size)
+    if write:
+        try:
+            with open(index_path(path), 'w') as f:
+                json.dump(index, f)
+        except OSError:
+            pass
+    return index
+
+
+def first_difference(index_a: dict, index_b: dict) -> Optional[dict]:
+    """
+    Finds the first block where two indexed files differ.
+
+    Returns
+    -------
+    dict or None
+        None if the files hold identical packed data. Otherwise 'block' and
+        'rows' (start, stop) of the first differing block and 'groups', the
+        indices of the differing channel groups (all groups if the packing
+        headers differ, in which case 'comparable' is False).
+    """
+    if (index_a['block_rows'], index_a['group_size']) != \
+            (index_b['block_rows'], index_b['group_size']):
+        raise ValueError("indices have different block layouts")
+
+    rows = index_a['block_rows']
+    if index_a['header'] != index_b['header']:
+        num_groups = len(index_a['blocks'][0]) if index_a['blocks'] else 0
+        return {'block': 0, 'rows': (0, rows), 'comparable': False,
+                'groups': list(range(num_groups))}
+
+    for i, (blocks_a, blocks_b) in enumerate(zip(index_a['blocks'],
+                                                 index_b['blocks'])):
+        time_differs = index_a['time'][i:i + 1] != index_b['time'][i:i + 1]
+        groups = [g for g, (a, b) in enumerate(zip(blocks_a, blocks_b))
+                  if a != b]
+        if groups or time_differs:
+            return {'block': i, 'rows': (i * rows, (i + 1) * rows),
+                    'comparable': True, 'groups': groups}
+    return None
+
+
+def read_rows(path: str, start: int, stop: int,
+              layout: Optional[dict] = None) -> np.ndarray:
+    """
+    Decodes rows [start, stop) of a binary output file, time included as
+    the first column, without reading the rest of the data.
+    """
+    layout = layout or read_layout(path)
+    stop = min(stop, layout['num_rows'])
+    rows = max(0, stop - start)
+    num_channels = layout['num_channels']
+    itemsize = np.dtype(layout['dtype']).itemsize
+    with open(path, 'rb') as f:
+        f.seek(layout['data'] + itemsize * num_channels * start)
+        pack = np.frombuffer(f.read(itemsize * num_channels * rows),
+                             dtype=layout['dtype']).reshape(rows, -1)
+        if layout['file_id'] == FILE_ID_WITH_TIME:
+            f.seek(layout['time'] + 4 * start)
+            packed_time = np.frombuffer(f.read(4 * rows), dtype=np.int32)
+            time = (packed_time - layout['time_offset']) / layout['time_scale']
+        else:
+            time = layout['time_start'] + layout['time_step'] * \
+                np.arange(start, stop)
+
+    data = pack.astype(float)
+    if layout['scale'] is not None:
+        data = (data - layout['offset']) / layout['scale']
+    return np.column_stack((time, data))
+
+
+def group_channels(group: int, group_size: int, names: List[str]) -> List[str]:
+    """Names of the channels of a group, skipping the time channel."""
+    return names[1 + group * group_size:1 + (group + 1) * group_size]
@@ -0,0 +1,97 @@
+import os
+import struct
+import tempfile
+import unittest
+
+import numpy as np
+
+from .fast_io import load_binary_output
+from .block_index import (
+    build_index,
+    first_difference,
+    group_channels,
+    index_path,
+    load_index,
+    read_rows,
+)
+
+
+def write_outb(path, data, description="Generated by test", names=None):
+    """Writes channel data (rows, channels) as a compressed .outb file
+    without time (format 2), with 0.1 s time steps."""
+    num_rows, num_channels = data.shape
+    lo, hi = data.min(axis=0), data.max(axis=0)
+    scale = np.where(hi > lo, 65000.0 / np.where(hi > lo, hi - lo, 1), 1.0)
+    offset = -32500.0 - lo * scale
+    packed = np.round(data * scale + offset).astype(np.int16)
+    names = ["Time"] + (names or [f"Chan{i}" for i in range(num_channels)])
+    with open(path, "wb") as f:
+        f.write(struct.pack("h", 2))
+        f.write(struct.pack("ii", num_channels, num_rows))
+        f.write(struct.pack("dd", 0.0, 0.1))
+        f.write(struct.pack(f"{num_channels}f", *scale))
+        f.write(struct.pack(f"{num_channels}f", *offset))
+        f.write(struct.pack("i", len(description)) + description.encode())
+        for name in names:
+            f.write(name.ljust(10).encode())
+        for _ in names:
+            f.write("(-)".ljust(10).encode())
+        f.write(packed.tobytes())
+
+
+class TestBlockIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        t = np.arange(100) * 0.1
+        self.data = np.column_stack([np.sin(t * (i + 1)) for i in range(20)])
+        self.data[:, 0] += 5
+        self.baseline = os.path.join(self.tmp.name, "baseline.outb")
+        write_outb(self.baseline, self.data)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_read_rows(self):
+        full, _, _ = load_binary_output(self.baseline)
+        np.testing.assert_allclose(read_rows(self.baseline, 30, 40), full[30:40])
+
+    def test_identical_except_description(self):
+        out = os.path.join(self.tmp.name, "out.outb")
+        write_outb(out, self.data, description="Generated later")
+        self.assertIsNone(first_difference(build_index(out, 16, 8),
+                                           build_index(self.baseline, 16, 8)))
+
+    def test_first_difference(self):
+        data = self.data.copy()
+        data[50, 10] += 5
+        out = os.path.join(self.tmp.name, "out.outb")
+        write_outb(out, data)
+
+        # Packing scales of changed channels differ, making files incomparable
+        difference = first_difference(build_index(out, 16, 8),
+                                      build_index(self.baseline, 16, 8))
+        self.assertFalse(difference['comparable'])
+
+        # Same packing: change values without changing the channel range
+        data = self.data.copy()
+        data[50, 10] = (data[49, 10] + data[51, 10]) / 2
+        write_outb(out, data)
+        with open(self.baseline, "rb") as f, open(out, "r+b") as g:
+            header = f.read(os.path.getsize(self.baseline) - data.size * 2)
+            g.write(header)
+        difference = first_difference(build_index(out, 16, 8),
+                                      build_index(self.baseline, 16, 8))
+        self.assertTrue(difference['comparable'])
+        self.assertEqual(difference['rows'], (48, 64))
+        self.assertListEqual(difference['groups'], [1])
+        self.assertListEqual(group_channels(1, 8, [f"c{i}" for i in range(21)]),
+                             [f"c{i}" for i in range(9, 17)])
+
+    def test_load_index_writes_and_reuses(self):
+        index = load_index(self.baseline, write=True)
+        self.assertTrue(os.path.isfile(index_path(self.baseline)))
+        self.assertEqual(load_index(self.baseline), index)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,60 +2,214 @@
 
 import sys
 import argparse
-from typing import List
+from typing import List, Tuple
 import re
 import yaml
 import os
 
 from pyFAST.executor import Executor
+from pyFAST.perf_history import PerfHistory
+from pyFAST.journal import RunJournal
+from pyFAST.resources import parse_size, usable_cores
+from pyFAST.compare import compare_cases, directory_cases, find_baseline_files
+from pyFAST.error_plotting import REPORT_MODES
+from pyFAST.compression import CODECS, compress_outputs
+from pyFAST.retention import RETENTION_POLICIES, prune_case, prune_turbine_directories
+from pyFAST.result_stream import ResultStream, write_junit
+from pyFAST.results_store import (
+    collect_results,
+    write_results,
+    load_results,
+    diff_results,
+    default_results_dir,
+    new_results_path,
+    latest_results,
+    NORM_NAMES,
+)
+from pyFAST.tolerance_sweep import parse_grid, sweep_cases, format_sweep
+from pyFAST.scheduling import parse_shard, shard_cases, cost_fingerprint
+from pyFAST.cost_model import case_static_cost, evaluate
+from pyFAST.bench import (
+    Benchmark,
+    compare_results,
+    bench_case_summary,
+    format_case_summary_result,
+    bench_codecs,
+    format_codec_result,
+)
+from pyFAST.distributed import Coordinator, run_worker
 from pyFAST.regression_tester import RegressionTester
 from pyFAST.postprocessor import SummaryHandler
 
 
-def run_cli():
+def annotate_shard_costs(cases: List[dict], db_path: str, window: int = 10):
     """
-    Runs the pyFAST suite.
+    Sets the runtimes of cases in a shared performance history, read only,
+    and the scale of their static costs calibrated on it, see
+    `scheduling.shard_cost`.
     """
+    if not os.path.isfile(db_path):
+        sys.exit(f"shard history {db_path} not found")
+    history = PerfHistory(db_path, read_only=True)
+    for case in cases:
+        case['shard_run_time'] = history.median(case, 'run_time', window)
+    history.close()
+    calibrated = [c for c in cases if c['shard_run_time'] and c['static_cost']]
+    scale = evaluate([c['static_cost'] for c in calibrated],
+                     [c['shard_run_time'] for c in calibrated])['scale']
+    for case in cases:
+        case['shard_scale'] = scale
 
-    # Parse command line arguments
-    args = parse_args(sys.argv[1:])
 
-    # Get root path as an absolute path
-    root_path = os.path.abspath(args.repo_root)
+def run_cli():
+    """
+    Runs the pyFAST suite, or one of its subcommands.
+    """
 
-    # Parse test configuration file from path in cli args
-    cases = parse_test_config(root_path, open(args.test_config).read())
+    # Dispatch to subcommand if one was given
+    argv = sys.argv[1:]
+    if argv and argv[0] in SUBCOMMANDS:
+        return SUBCOMMANDS[argv[0]](argv[1:])
 
-    # Filter cases based on cli argument regular expressions
-    cases = filter_cases(cases, args.test_regex, args.label_regex,
-                         args.test_exclude_regex, args.label_exclude_regex)
+    # Parse command line arguments
+    args = parse_args(argv)
+
+    # Get root path and the cases selected by the cli arguments
+    root_path, cases = select_cases(args)
 
     # If no cases after filtering
     if len(cases) == 0:
         print("No cases selected after filtering")
         return
 
+    # Override the case summary mode and retention of the configuration
+    for case in cases:
+        if args.report:
+            case['report'] = args.report
+        if args.retention:
+            case['retention'] = args.retention
+
+    # Annotate cases with their runtime and peak memory in previous runs
+    # and a static cost estimate from their input files. Listing cases
+    # doesn't need the history, so it's left unopened
+    history = None
+    if not args.show_only:
+        history = PerfHistory(args.perf_db or default_perf_db(root_path))
+    for case in cases:
+        case['expected_run_time'] = history.median(
+            case, 'run_time', args.perf_window) if history else None
+        case['expected_memory'] = history.maximum(
+            case, 'max_rss', args.perf_window) if history else None
+        case['static_cost'] = case_static_cost(case)
+
+    # Calibrate static costs to seconds with the cases that have history
+    calibrated = [c for c in cases if c['expected_run_time'] and c['static_cost']]
+    scale = evaluate([c['static_cost'] for c in calibrated],
+                     [c['expected_run_time'] for c in calibrated])['scale']
+    for case in cases:
+        case['cost_scale'] = scale
+
+    # Keep only the cases of this machine's shard, partitioned on costs that
+    # are the same on every machine
+    if args.shard:
+        shard, num_shards = parse_shard(args.shard)
+        if args.shard_db:
+            annotate_shard_costs(cases, args.shard_db, args.perf_window)
+        fingerprint = cost_fingerprint(cases)
+        cases = shard_cases(cases, shard, num_shards)
+        print(f"Shard {shard}/{num_shards}: {len(cases)} cases, "
+              f"cost fingerprint {fingerprint}")
+        if len(cases) == 0:
+            if history is not None:
+                history.close()
+            return
+
+    # Open journal of finished cases, keeping previous results to resume
+    journal = None
+    if not args.show_only:
+        journal = RunJournal(args.journal or default_journal(root_path),
+                             resume=args.resume)
+
+    # Open stream of case results for CI dashboards
+    stream = None
+    if args.jsonl and not args.show_only:
+        stream = ResultStream(args.jsonl)
+
     # Create executor to run cases
     executor = Executor(
         cases,
         show_only=args.show_only,
         verbose=args.verbose,
         jobs=args.jobs,
+        pin=not args.no_pin,
+        memory=parse_size(args.memory_limit) if args.memory_limit else None,
+        coordinator=Coordinator(args.listen, stage=args.worker_stage,
+                                fetch_outputs=args.fetch_outputs,
+                                token=args.worker_token or None)
+        if args.listen and not args.show_only else None,
+        journal=journal,
+        warm=args.warm_python,
+        kill_diverged=args.kill_diverged,
+        block_index=args.block_index,
+        force_report=args.force_report,
+        compress=args.compress_passing,
+        scratch=args.scratch,
+        stream=stream,
     )
 
     # Run cases
-    executor.run()
+    try:
+        executor.run()
+    finally:
+        if journal is not None:
+            journal.close()
+        if stream is not None:
+            stream.close()
+
+    # If cases were only listed, there are no results to summarize
+    if args.show_only:
+        return
+
+    # Store case runtimes in performance history and check for regressions
+    history.record([c for c in executor.cases if not c.get('resumed')])
+    if args.perf_check:
+        for case in executor.cases:
+            case['perf_ok'] = history.check(case, window=args.perf_window,
+                                            threshold=args.perf_threshold)
+            if not case['perf_ok'] and case['check_ok']:
+                case['status'] = 'PERF-FAIL'
+    history.close()
+
+    # Store per-channel norms and verdicts for later diffs between runs
+    write_results(args.results or new_results_path(default_results_dir(root_path)),
+                  collect_results(executor.cases))
+    if args.junit:
+        write_junit(args.junit, executor.cases)
 
     # Print summary of case results
     all_ok = True
     print("\nCase Summary:")
-    print("%8s  %-16s  %-42s  %-6s  %-6s  %-8s" %
-          ("Number", "Driver", "Case Name", "Run", "Check", "Status"))
+    print("%8s  %-16s  %-42s  %-6s  %-6s  %-9s  %8s" %
+          ("Number", "Driver", "Case Name", "Run", "Check", "Status", "Time"))
     for case in executor.cases:
         print(f"{case['index']:>8}  {case['driver']:<16}  "
               f"{case['name']:<42}  {case['run_ok']!s:<6}  "
-              f"{case['check_ok']!s:<6}  {case['status']:<8}")
-        all_ok &= case['check_ok']
+              f"{case['check_ok']!s:<6}  {case['status']:<9}  "
+              f"{case.get('run_time', 0):>8.2f}")
+        if case['status'] == 'PERF-FAIL':
+            print(f"{'':>8}  runtime {case['run_time']:.2f}s exceeds limit "
+                  f"{case['perf_limit']:.2f}s (median {case['perf_median']:.2f}s)")
+        all_ok &= case['check_ok'] and case.get('perf_ok', True)
+
+    # Check static cost estimates against measured runtimes
+    measured = [c for c in executor.cases
+                if c['run_ok'] and c.get('static_cost')]
+    if len(measured) > 1:
+        model = evaluate([c['static_cost'] for c in measured],
+                         [c['run_time'] for c in measured])
+        print(f"\nCost model: rank correlation {model['rank_correlation']:.2f}, "
+              f"median error {100 * model['median_error']:.0f}% "
+              f"over {model['cases']} cases")
 
     # If all cases not passed, exit with error
     if not all_ok:
@@ -91,6 +245,233 @@ def run_cli():
     #     cases, attributes, norm_res, norm_list, plots, args.tolerance)
 
 
+def run_bench(argv: List[str]):
+    """
+    Runs the benchmark subcommand.
+    """
+
+    args = parse_bench_args(argv)
+
+    # Time reading outputs compressed with each codec
+    if args.codecs:
+        path = None if args.codecs == "synthetic" else args.codecs
+        for result in bench_codecs(path, repeat=args.repeat):
+            print(format_codec_result(result))
+        return
+
+    # Time report generation with synthetic cases
+    if args.case_summary:
+        channels = [int(c) for c in args.case_summary.split(",")]
+        for result in bench_case_summary(channels, repeat=args.repeat):
+            print(format_case_summary_result(result))
+        return
+
+    # Compare two previous benchmark results
+    if args.compare:
+        print("%-16s  %-42s  %9s  %9s  %7s  %17s" %
+              ("Driver", "Case Name", "Median A", "Median B", "B/A",
+               f"{100 * args.confidence:.0f}% CI"))
+        for c in compare_results(*args.compare, confidence=args.confidence):
+            flag = " *" if c['significant'] else ""
+            print(f"{c['driver']:<16}  {c['name']:<42}  {c['median_a']:>9.3f}  "
+                  f"{c['median_b']:>9.3f}  {c['ratio']:>7.3f}  "
+                  f"[{c['low']:.3f}, {c['high']:.3f}]{flag}")
+        return
+
+    root_path, cases = select_cases(args)
+    if len(cases) == 0:
+        print("No cases selected after filtering")
+        return
+
+    # Override executable to benchmark an alternative build
+    if args.executable:
+        for case in cases:
+            if 'executable_path' in case:
+                case['executable_path'] = os.path.abspath(args.executable)
+
+    executor = Executor(cases, jobs=args.jobs)
+    benchmark = Benchmark(executor, repeat=args.repeat, warmup=args.warmup,
+                          pin=not args.no_pin)
+    benchmark.run()
+    if args.json:
+        benchmark.to_json(args.json)
+
+
+def run_worker_cli(argv: List[str]):
+    """
+    Runs the worker subcommand.
+    """
+
+    args = parse_worker_args(argv)
+    run_worker(args.address, jobs=args.jobs, verbose=args.verbose,
+               connect_timeout=args.connect_timeout,
+               token=args.worker_token or None)
+
+
+def run_compare(argv: List[str]):
+    """
+    Runs the compare subcommand.
+    """
+
+    args = parse_compare_args(argv)
+
+    # Get cases from the explicit directory trees or the test configuration
+    results_path = args.results
+    if args.run_dir or args.baseline_dir:
+        if not (args.run_dir and args.baseline_dir):
+            sys.exit("--run-dir and --baseline-dir must be given together")
+        cases = directory_cases(os.path.abspath(args.run_dir),
+                                os.path.abspath(args.baseline_dir))
+    else:
+        root_path, cases = select_cases(args)
+        results_path = results_path or new_results_path(default_results_dir(root_path))
+        for case in cases:
+            case['baseline_files'] = find_baseline_files(case)
+
+    if len(cases) == 0:
+        print("No cases selected after filtering")
+        return
+
+    jobs = args.jobs if args.jobs > 0 else max(1, len(usable_cores()) - 1)
+
+    # Report the tightest passing tolerances instead of checking outputs
+    if args.sweep:
+        rtol_orders = parse_grid(args.rtol_grid)
+        atol_orders = parse_grid(args.atol_grid)
+        print(f"Tightest passing absolute tolerance (orders of magnitude) "
+              f"for atol in [{atol_orders[0]:g}, {atol_orders[-1]:g}]")
+        for case, results in sweep_cases(cases, rtol_orders, atol_orders,
+                                         min(jobs, len(cases))):
+            print("\n" + format_sweep(case, results, rtol_orders), flush=True)
+        return
+
+    # Override tolerances and plotting of the configuration
+    for case in cases:
+        if args.relative_tolerance is not None:
+            case['relative_tolerance'] = args.relative_tolerance
+        if args.absolute_tolerance is not None:
+            case['absolute_tolerance'] = args.absolute_tolerance
+        if args.no_plot:
+            case['plot'] = False
+        if args.report:
+            case['report'] = args.report
+        if args.retention:
+            case['retention'] = args.retention
+
+    # Cases of a directory tree may be nested in each other's run directory
+    run_paths = [case['run_path'] for case in cases]
+    stream = ResultStream(args.jsonl) if args.jsonl else None
+    compared = []
+    for case, status in compare_cases(cases, min(jobs, len(cases)),
+                                      block_index=args.block_index,
+                                      force_report=args.force_report):
+        print(f"{case['index']:>8}  Compare: {case['name']}" + status, flush=True)
+        if args.compress_passing and case['check_ok']:
+            compress_outputs(case, args.compress_passing)
+        prune_case(case, keep_paths=run_paths)
+        if stream is not None:
+            stream.append(case)
+        compared.append(case)
+    prune_turbine_directories(compared)
+    if stream is not None:
+        stream.close()
+
+    # Store per-channel norms and verdicts for later diffs between runs
+    compared.sort(key=lambda c: c['num'])
+    if results_path:
+        write_results(results_path, collect_results(compared))
+    if args.junit:
+        write_junit(args.junit, compared)
+
+    # Print summary of case results
+    failed = [c for c in compared if not c['check_ok']]
+    print(f"\nCompared {len(compared)} cases, {len(failed)} failed")
+    for case in failed:
+        print(f"{case['index']:>8}  {case['driver']:<16}  "
+              f"{case['name']:<42}  {case['status']:<9}")
+    if failed:
+        sys.exit("FAILED")
+
+
+def run_diff(argv: List[str]):
+    """
+    Runs the diff subcommand.
+    """
+
+    args = parse_diff_args(argv)
+
+    # Diff the given result files or the two latest of the results directory
+    paths = args.results
+    if len(paths) < 2:
+        directory = paths[0] if paths else default_results_dir(
+            os.path.abspath(args.repo_root))
+        paths = latest_results(directory)
+        if len(paths) < 2:
+            sys.exit(f"Fewer than two result files in {directory}")
+    old, new = load_results(paths[0]), load_results(paths[1])
+    diff = diff_results(old, new, norm=args.norm, factor=args.factor)
+
+    print(f"Old: {paths[0]} ({len(old)} channels)")
+    print(f"New: {paths[1]} ({len(new)} channels)")
+    for kind in ('regressed', 'fixed', 'worse', 'added', 'removed'):
+        rows = diff[kind]
+        print(f"\n{kind.capitalize()}: {len(rows)} channels")
+        for row in rows.records()[:args.limit]:
+            line = f"  {row['case']:<42}  {row['file']:<32}  {row['channel']:<20}"
+            if 'old_' + args.norm in row:
+                line += f"  {row['old_' + args.norm]:>10.3e} -> {row[args.norm]:.3e}"
+            print(line)
+        if len(rows) > args.limit:
+            print(f"  ... {len(rows) - args.limit} more")
+
+    if len(diff['regressed']):
+        sys.exit("REGRESSED")
+
+
+SUBCOMMANDS = {
+    "bench": run_bench,
+    "compare": run_compare,
+    "diff": run_diff,
+    "worker": run_worker_cli,
+}
+
+
+def select_cases(args: argparse.Namespace) -> Tuple[str, List[dict]]:
+    """
+    Parses the test configuration and filters its cases with the cli
+    arguments.
+
+    Returns
+    -------
+    root_path : str
+        Absolute path of the OpenFAST repository.
+    cases : List[dict]
+        Selected cases.
+    """
+
+    # Get root path as an absolute path
+    root_path = os.path.abspath(args.repo_root)
+
+    # Parse test configuration file from path in cli args
+    cases = parse_test_config(root_path, open(args.test_config).read())
+
+    # Filter cases based on cli argument regular expressions
+    cases = filter_cases(cases, args.test_regex, args.label_regex,
+                         args.test_exclude_regex, args.label_exclude_regex)
+
+    return root_path, cases
+
+
+def default_perf_db(root_path: str) -> str:
+    """Returns the default path of the performance history database."""
+    return os.path.join(root_path, "build", "pyfast_perf.sqlite")
+
+
+def default_journal(root_path: str) -> str:
+    """Returns the default path of the journal of finished cases."""
+    return os.path.join(root_path, "build", "pyfast_journal.jsonl")
+
+
 def filter_cases(cases: List[dict],
                  test_regex: str = "",
                  label_regex: str = "",
@@ -230,6 +611,100 @@ def parse_args(args: List[str]) -> argparse.Namespace:
         default=-1,
         help="Number of cases to run in parallel. Use -1 for 80 percent of available cores",
     )
+    parser.add_argument(
+        "--no-pin",
+        dest="no_pin",
+        action="store_true",
+        help="Don't pin running cases to disjoint CPU cores.",
+    )
+    parser.add_argument(
+        "--memory-limit",
+        dest="memory_limit",
+        type=str,
+        default="",
+        help="Memory running cases may use together, e.g. 16G (default: available memory).",
+    )
+    parser.add_argument(
+        "--kill-diverged",
+        dest="kill_diverged",
+        type=int,
+        default=0,
+        help=("Compare ASCII outputs with their baselines while cases run and "
+              "terminate a case once this many channels have failed (0: off)."),
+    )
+    parser.add_argument(
+        "--block-index",
+        dest="block_index",
+        action="store_true",
+        help=("Compare block hashes of .outb outputs and baselines to skip identical "
+              "files and locate the first difference (writes .bidx next to baselines)."),
+    )
+    parser.add_argument(
+        "--force-report",
+        dest="force_report",
+        action="store_true",
+        help="Rewrite case summaries even if their outputs and settings are unchanged.",
+    )
+    parser.add_argument(
+        "--compress-passing",
+        dest="compress_passing",
+        type=str,
+        choices=CODECS,
+        default=None,
+        help="Compress the outputs of passing cases after checking them with this codec.",
+    )
+    parser.add_argument(
+        "--report",
+        dest="report",
+        type=str,
+        choices=REPORT_MODES,
+        default=None,
+        help=("Case summaries with Bokeh plots created by the page, or static "
+              "SVG sparklines without scripts (default: configuration or interactive)."),
+    )
+    parser.add_argument(
+        "--retention",
+        dest="retention",
+        type=str,
+        choices=RETENTION_POLICIES,
+        default=None,
+        help=("What to keep of the run directories of passing cases: everything, "
+              "the log and summary, or those and an archive of the rest "
+              "(default: configuration or keep)."),
+    )
+    parser.add_argument(
+        "--scratch",
+        dest="scratch",
+        type=str,
+        default=None,
+        help=("Fast local directory, e.g. /dev/shm, to run cases in. Failing cases "
+              "are copied back whole, passing ones by their retention (default: summary)."),
+    )
+    parser.add_argument(
+        "--warm-python",
+        dest="warm_python",
+        action="store_true",
+        help=("Run script cases (e.g. openfast-py) on long-lived Python workers "
+              "instead of a new interpreter per case."),
+    )
+    parser.add_argument(
+        "--shard",
+        dest="shard",
+        type=str,
+        default="",
+        help=("Run only the K-th of N cost-balanced partitions of the selected "
+              "cases, given as K/N. Partitions use static cost estimates, or the "
+              "runtimes in --shard-db; all machines must print the same cost "
+              "fingerprint."),
+    )
+    parser.add_argument(
+        "--shard-db",
+        dest="shard_db",
+        type=str,
+        default="",
+        help=("Performance history shared by all machines, read only, whose "
+              "runtimes balance the --shard partitions."),
+    )
     parser.add_argument(
         "-N",
         "--show-only",
@@ -237,6 +712,104 @@ def parse_args(args: List[str]) -> argparse.Namespace:
         action="store_true",
         help="Disable execution of tests. Shows which tests would be run but doesn't run them.",
     )
+    parser.add_argument(
+        "--resume",
+        dest="resume",
+        action="store_true",
+        help=("Skip cases the journal records as finished with the same executable "
+              "and inputs, reusing their results."),
+    )
+    parser.add_argument(
+        "--journal",
+        dest="journal",
+        type=str,
+        default="",
+        help="Journal of finished cases (default: build/pyfast_journal.jsonl).",
+    )
+    parser.add_argument(
+        "--results",
+        dest="results",
+        type=str,
+        default="",
+        help=("File storing per-channel norms and verdicts "
+              "(default: a new file in build/pyfast_results)."),
+    )
+    parser.add_argument(
+        "--jsonl",
+        dest="jsonl",
+        type=str,
+        default="",
+        help="File receiving a JSON line with the results of each case as it finishes.",
+    )
+    parser.add_argument(
+        "--junit",
+        dest="junit",
+        type=str,
+        default="",
+        help="JUnit XML file written with the results of all cases at the end.",
+    )
+    _add_selection_args(parser)
+    parser.add_argument(
+        "--listen",
+        dest="listen",
+        type=str,
+        default="",
+        help=("Run cases on 'pyFAST worker' processes connecting to this HOST:PORT "
+              "(loopback if HOST is omitted)."),
+    )
+    parser.add_argument(
+        "--worker-token",
+        dest="worker_token",
+        type=str,
+        default=os.environ.get("PYFAST_WORKER_TOKEN", ""),
+        help="Shared secret workers must present (default: $PYFAST_WORKER_TOKEN).",
+    )
+    parser.add_argument(
+        "--worker-stage",
+        dest="worker_stage",
+        action="store_true",
+        help="Have workers copy case inputs themselves (no shared file system).",
+    )
+    parser.add_argument(
+        "--fetch-outputs",
+        dest="fetch_outputs",
+        action="store_true",
+        help="Have workers send output, log and summary files back to the run directory.",
+    )
+    parser.add_argument(
+        "--perf-db",
+        dest="perf_db",
+        type=str,
+        default="",
+        help="SQLite database storing case runtimes (default: build/pyfast_perf.sqlite).",
+    )
+    parser.add_argument(
+        "--perf-check",
+        dest="perf_check",
+        action="store_true",
+        help="Flag cases whose runtime regressed relative to recent runs as PERF-FAIL.",
+    )
+    parser.add_argument(
+        "--perf-window",
+        dest="perf_window",
+        type=int,
+        default=10,
+        help="Number of recent runs used as reference by --perf-check.",
+    )
+    parser.add_argument(
+        "--perf-threshold",
+        dest="perf_threshold",
+        type=float,
+        default=3.0,
+        help="Allowed runtime increase in median absolute deviations for --perf-check.",
+    )
+    return parser.parse_args(args)
+
+
+def _add_selection_args(parser: argparse.ArgumentParser):
+    """
+    Adds the arguments selecting the configuration file and its cases.
+    """
     parser.add_argument(
         "-L",
         "--label-regex",
@@ -285,6 +858,371 @@ def parse_args(args: List[str]) -> argparse.Namespace:
         help="Path to the OpenFAST repository",
     )
 
+
+def parse_bench_args(args: List[str]) -> argparse.Namespace:
+    """
+    Parse arguments of the 'bench' subcommand.
+
+    Parameters
+    ----------
+    args : List[str]
+        Command line arguments following 'bench'.
+
+    Returns
+    -------
+    argparse.Namespace
+        Namespace containing parsed argument values.
+    """
+
+    parser = argparse.ArgumentParser(
+        description=("Runs the requested cases repeatedly and reports " +
+                     "runtime statistics."),
+        prog="pyFAST bench"
+    )
+    parser.add_argument(
+        "-j",
+        "--parallel",
+        dest="jobs",
+        type=int,
+        default=1,
+        help="Number of cases to benchmark concurrently.",
+    )
+    parser.add_argument(
+        "-n",
+        "--repeat",
+        dest="repeat",
+        type=int,
+        default=5,
+        help="Number of timed runs per case.",
+    )
+    parser.add_argument(
+        "-w",
+        "--warmup",
+        dest="warmup",
+        type=int,
+        default=1,
+        help="Number of untimed warm-up runs per case.",
+    )
+    parser.add_argument(
+        "--no-pin",
+        dest="no_pin",
+        action="store_true",
+        help="Don't pin concurrent cases to disjoint CPU cores.",
+    )
+    parser.add_argument(
+        "--executable",
+        dest="executable",
+        type=str,
+        default="",
+        help="Executable to use instead of the one in the test configuration.",
+    )
+    parser.add_argument(
+        "--json",
+        dest="json",
+        type=str,
+        default="",
+        help="Write the benchmark results to this JSON file.",
+    )
+    parser.add_argument(
+        "--compare",
+        dest="compare",
+        type=str,
+        nargs=2,
+        metavar=("A.json", "B.json"),
+        help="Compare two benchmark result files instead of running cases.",
+    )
+    parser.add_argument(
+        "--codecs",
+        dest="codecs",
+        type=str,
+        nargs="?",
+        const="synthetic",
+        default="",
+        help=("Time reading an output file, or a synthetic one, compressed with "
+              "each codec instead of running cases."),
+    )
+    parser.add_argument(
+        "--case-summary",
+        dest="case_summary",
+        type=str,
+        default="",
+        help=("Time case summary reports with these channel counts, e.g. "
+              "'250,1000,4000', instead of running cases."),
+    )
+    parser.add_argument(
+        "--confidence",
+        dest="confidence",
+        type=float,
+        default=0.95,
+        help="Confidence level of the intervals reported by --compare.",
+    )
+    _add_selection_args(parser)
+
+    return parser.parse_args(args)
+
+
+def parse_compare_args(args: List[str]) -> argparse.Namespace:
+    """
+    Parse arguments of the 'compare' subcommand.
+
+    Parameters
+    ----------
+    args : List[str]
+        Command line arguments following 'compare'.
+
+    Returns
+    -------
+    argparse.Namespace
+        Namespace containing parsed argument values.
+    """
+
+    parser = argparse.ArgumentParser(
+        description=("Compares existing outputs with their baselines " +
+                     "without running the cases."),
+        prog="pyFAST compare"
+    )
+    parser.add_argument(
+        "-j",
+        "--parallel",
+        dest="jobs",
+        type=int,
+        default=-1,
+        help="Number of cases to compare in parallel. Use -1 for all usable cores but one.",
+    )
+    parser.add_argument(
+        "--run-dir",
+        dest="run_dir",
+        type=str,
+        default="",
+        help="Tree of outputs to check, instead of the run paths of the test configuration.",
+    )
+    parser.add_argument(
+        "--baseline-dir",
+        dest="baseline_dir",
+        type=str,
+        default="",
+        help="Tree of baselines with the same layout as --run-dir.",
+    )
+    parser.add_argument(
+        "--relative-tolerance",
+        dest="relative_tolerance",
+        type=float,
+        default=None,
+        help="Relative tolerance in orders of magnitude, overriding the configuration.",
+    )
+    parser.add_argument(
+        "--absolute-tolerance",
+        dest="absolute_tolerance",
+        type=float,
+        default=None,
+        help="Absolute tolerance in orders of magnitude, overriding the configuration.",
+    )
+    parser.add_argument(
+        "--no-plot",
+        dest="no_plot",
+        action="store_true",
+        help="Don't plot channels in the case summaries.",
+    )
+    parser.add_argument(
+        "--block-index",
+        dest="block_index",
+        action="store_true",
+        help="Compare block hashes of .outb files first to skip identical files.",
+    )
+    parser.add_argument(
+        "--force-report",
+        dest="force_report",
+        action="store_true",
+        help="Rewrite case summaries even if their outputs and settings are unchanged.",
+    )
+    parser.add_argument(
+        "--compress-passing",
+        dest="compress_passing",
+        type=str,
+        choices=CODECS,
+        default=None,
+        help="Compress the outputs of passing cases after checking them with this codec.",
+    )
+    parser.add_argument(
+        "--report",
+        dest="report",
+        type=str,
+        choices=REPORT_MODES,
+        default=None,
+        help=("Case summaries with Bokeh plots created by the page, or static "
+              "SVG sparklines without scripts (default: configuration or interactive)."),
+    )
+    parser.add_argument(
+        "--retention",
+        dest="retention",
+        type=str,
+        choices=RETENTION_POLICIES,
+        default=None,
+        help=("What to keep of the run directories of passing cases: everything, "
+              "the log and summary, or those and an archive of the rest "
+              "(default: configuration or keep)."),
+    )
+    parser.add_argument(
+        "--sweep",
+        dest="sweep",
+        action="store_true",
+        help=("Report the tightest passing tolerances over a grid instead of "
+              "checking the outputs."),
+    )
+    parser.add_argument(
+        "--rtol-grid",
+        dest="rtol_grid",
+        type=str,
+        default="0:6:1",
+        help="Relative tolerances for --sweep, as 'a,b,c' or 'start:stop:step'.",
+    )
+    parser.add_argument(
+        "--atol-grid",
+        dest="atol_grid",
+        type=str,
+        default="0:6:0.5",
+        help="Absolute tolerances for --sweep, as 'a,b,c' or 'start:stop:step'.",
+    )
+    parser.add_argument(
+        "--results",
+        dest="results",
+        type=str,
+        default="",
+        help=("File storing per-channel norms and verdicts (default: a new "
+              "file in build/pyfast_results, none with --run-dir)."),
+    )
+    parser.add_argument(
+        "--jsonl",
+        dest="jsonl",
+        type=str,
+        default="",
+        help="File receiving a JSON line with the results of each case as it finishes.",
+    )
+    parser.add_argument(
+        "--junit",
+        dest="junit",
+        type=str,
+        default="",
+        help="JUnit XML file written with the results of all cases at the end.",
+    )
+    _add_selection_args(parser)
+
+    return parser.parse_args(args)
+
+
+def parse_diff_args(args: List[str]) -> argparse.Namespace:
+    """
+    Parse arguments of the 'diff' subcommand.
+
+    Parameters
+    ----------
+    args : List[str]
+        Command line arguments following 'diff'.
+
+    Returns
+    -------
+    argparse.Namespace
+        Namespace containing parsed argument values.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Lists the channels whose results changed between two runs.",
+        prog="pyFAST diff"
+    )
+    parser.add_argument(
+        "results",
+        type=str,
+        nargs="*",
+        help=("Old and new result files, or a directory whose two latest "
+              "files are compared (default: build/pyfast_results)."),
+    )
+    parser.add_argument(
+        "--repo-root",
+        dest="repo_root",
+        type=str,
+        default=".",
+        help="Path to the OpenFAST repository, locating the default results directory.",
+    )
+    parser.add_argument(
+        "--norm",
+        dest="norm",
+        type=str,
+        choices=NORM_NAMES,
+        default=NORM_NAMES[0],
+        help="Norm compared to find the channels that got worse.",
+    )
+    parser.add_argument(
+        "--factor",
+        dest="factor",
+        type=float,
+        default=1.0,
+        help="Channels got worse if their norm grew by more than this factor.",
+    )
+    parser.add_argument(
+        "--limit",
+        dest="limit",
+        type=int,
+        default=50,
+        help="Maximum number of channels listed per kind of change.",
+    )
+
+    return parser.parse_args(args)
+
+
+def parse_worker_args(args: List[str]) -> argparse.Namespace:
+    """
+    Parse arguments of the 'worker' subcommand.
+
+    Parameters
+    ----------
+    args : List[str]
+        Command line arguments following 'worker'.
+
+    Returns
+    -------
+    argparse.Namespace
+        Namespace containing parsed argument values.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Runs cases sent by a pyFAST coordinator started with --listen.",
+        prog="pyFAST worker"
+    )
+    parser.add_argument(
+        "address",
+        type=str,
+        help="HOST:PORT of the coordinator.",
+    )
+    parser.add_argument(
+        "-j",
+        "--parallel",
+        dest="jobs",
+        type=int,
+        default=1,
+        help="Number of cases to run concurrently.",
+    )
+    parser.add_argument(
+        "-V",
+        "--verbose",
+        dest="verbose",
+        action="store_true",
+        help="Enable verbose output from tests.",
+    )
+    parser.add_argument(
+        "--connect-timeout",
+        dest="connect_timeout",
+        type=float,
+        default=60.0,
+        help="Seconds to keep retrying to connect to the coordinator.",
+    )
+    parser.add_argument(
+        "--worker-token",
+        dest="worker_token",
+        type=str,
+        default=os.environ.get("PYFAST_WORKER_TOKEN", ""),
+        help="Shared secret of the coordinator (default: $PYFAST_WORKER_TOKEN).",
+    )
+
     return parser.parse_args(args)
 
 
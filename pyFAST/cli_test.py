@@ -1,6 +1,6 @@
 import unittest
 
-from .cli import filter_cases, parse_args, parse_test_config
+from .cli import filter_cases, parse_args, parse_bench_args, parse_test_config
 
 
 class TestCLI(unittest.TestCase):
@@ -20,6 +20,15 @@ class TestCLI(unittest.TestCase):
         self.assertEqual(args.jobs, -1)
         self.assertEqual(args.test_config, "newconfig.yaml")
 
+    def test_parse_bench_args(self):
+        args = parse_bench_args("-n 7 -w 2 -R 5MW --json out.json".split())
+        self.assertEqual(args.repeat, 7)
+        self.assertEqual(args.warmup, 2)
+        self.assertEqual(args.jobs, 1)
+        self.assertEqual(args.test_regex, "5MW")
+        self.assertEqual(args.json, "out.json")
+        self.assertIsNone(args.compare)
+
     def test_parse_test_config(self):
         cases = parse_test_config("", sample_config)
         cases_exp = [
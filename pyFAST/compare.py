@@ -0,0 +1,476 @@
+"""Comparison of case outputs with their baselines."""
+
+import os
+import glob
+import json
+import time
+import hashlib
+from functools import partial
+from multiprocessing.pool import Pool, ThreadPool
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .utilities import validate_file, file_digest
+from .compression import CODECS, codec_of, find_output, strip_codec
+from .block_index import (
+    GROUP_SIZE,
+    load_index,
+    first_difference,
+    read_layout,
+    read_rows,
+    group_channels,
+)
+from .output_selection import select_channels, load_output_pair
+from .alignment import align_outputs, format_finding
+from .regression_tester import passing_channels, calculateNorms
+from .error_plotting import (
+    REPORT_VERSION,
+    export_case_summary,
+    plot_channel_data,
+    plot_channel_svgs,
+    read_report_digest,
+)
+
+
+# Tolerances in orders of magnitude used when comparing directory trees
+# without a test configuration, matching its default case
+RELATIVE_TOLERANCE = 2
+ABSOLUTE_TOLERANCE = 1.9
+
+# Maximum number of threads comparing the files of a case
+FILE_JOBS = 4
+
+# Extensions of the output files found when comparing directory trees
+OUTPUT_EXTENSIONS = ('.outb', '.out')
+
+
+def find_baseline_files(case: dict) -> List[str]:
+    """
+    Returns the names of the baseline files in a case's input directory,
+    without the extension of compressed baselines.
+    """
+    names = []
+    for ext in [""] + list(CODECS.values()):
+        for f in glob.glob(os.path.join(case['input_path'],
+                                        '*' + case['baseline_file_ext'] + ext)):
+            name = strip_codec(os.path.basename(f))
+            if name not in names:
+                names.append(name)
+    return names
+
+
+def load_case_outputs(case: dict, out_file_path: str, baseline_file_path: str):
+    """
+    Reads the channels of an output and its baseline selected by the case's
+    'channel_include' and 'channel_exclude' expressions inside its
+    'compare_window', see `output_selection.load_output_pair`.
+    """
+    return load_output_pair(out_file_path, baseline_file_path,
+                            case.get('channel_include') or "",
+                            case.get('channel_exclude') or "",
+                            case.get('compare_window'))
+
+
+def locate_difference(case: dict, baseline_file: str, out_file_path: str,
+                      baseline_file_path: str) -> bool:
+    """
+    Compares the block hash indices of a binary output and its baseline.
+    The first differing time window and channels, if any, are appended to
+    case['differences'].
+
+    Returns
+    -------
+    bool
+        True if the output's packed data is identical to the baseline's.
+    """
+    difference = first_difference(load_index(out_file_path),
+                                  load_index(baseline_file_path, write=True))
+    if difference is None:
+        return True
+    if difference['comparable']:
+        layout = read_layout(out_file_path)
+        rows = read_rows(out_file_path, *difference['rows'], layout)
+        channels = []
+        for group in difference['groups']:
+            channels += group_channels(group, GROUP_SIZE, layout['names'])
+        case.setdefault('differences', []).append({
+            'file': baseline_file,
+            'time': (float(rows[0, 0]), float(rows[-1, 0])),
+            'channels': channels,
+        })
+    return False
+
+
+def report_digest(case: dict) -> str:
+    """
+    Computes the digest of the inputs of a case summary: the hashes of the
+    outputs and baselines, the comparison settings and the report format.
+    """
+    files = []
+    for baseline_file in case['baseline_files']:
+        hashes = []
+        for directory in (case['run_path'], case['input_path']):
+            path = find_output(os.path.join(directory, baseline_file))
+            hashes.append(file_digest(path) if os.path.isfile(path) else None)
+        files.append([baseline_file] + hashes)
+    inputs = {
+        'version': REPORT_VERSION,
+        'files': files,
+        'relative_tolerance': case.get('relative_tolerance'),
+        'absolute_tolerance': case.get('absolute_tolerance'),
+        'plot': bool(case.get('plot')),
+        'report': case.get('report') or "interactive",
+        'channel_include': case.get('channel_include') or "",
+        'channel_exclude': case.get('channel_exclude') or "",
+        'compare_window': case.get('compare_window'),
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+def compare_file(case: dict, baseline_file: str,
+                 block_index: bool = False) -> dict:
+    """
+    Compares one output of a case with its baseline.
+
+    Parameters
+    ----------
+    case : dict
+        Case with the baseline file in 'input_path' and the output of the
+        same name in 'run_path'. It isn't modified, so that the files of a
+        case can be compared concurrently.
+    baseline_file : str
+        Name of the baseline file.
+    block_index : bool, default: False
+        Flag to compare block hash indices of binary outputs first.
+
+    Returns
+    -------
+    dict
+        The 'file', its 'status', 'ok' flag and comparison 'time' in
+        seconds. Compared outputs also have the channel results and summary
+        'plots', and the 'finding' of `align_outputs`, 'missing' channels
+        and located 'difference', each None if there's nothing to report.
+    """
+    start = time.perf_counter()
+    result = {'file': baseline_file, 'finding': None, 'missing': [],
+              'difference': None}
+
+    # Create path to baseline and output files, which may be compressed
+    baseline_file_path = find_output(os.path.join(case['input_path'], baseline_file))
+    out_file_path = find_output(os.path.join(case['run_path'], baseline_file))
+
+    # Validate files
+    try:
+        validate_file(out_file_path)
+        validate_file(baseline_file_path)
+    except FileNotFoundError:
+        result.update(status='MISSING', ok=False,
+                      time=time.perf_counter() - start)
+        return result
+
+    # Check linearization files
+    if case['baseline_file_ext'] not in ['.outb', '.out']:
+        result.update(status='NOT_IMPL', ok=False,
+                      time=time.perf_counter() - start)
+        return result
+
+    # Compare block hashes to skip decoding identical files
+    identical = False
+    if block_index and baseline_file.endswith('.outb') and not (
+            codec_of(out_file_path) or codec_of(baseline_file_path)):
+        differences = []
+        identical = locate_difference({'differences': differences}, baseline_file,
+                                      out_file_path, baseline_file_path)
+        result['difference'] = differences[0] if differences else None
+
+    plots = []
+    finding = None
+    missing = []
+    if identical and not case['plot']:
+        layout = read_layout(out_file_path)
+        channel_names = select_channels(layout['names'],
+                                        case.get('channel_include') or "",
+                                        case.get('channel_exclude') or "")
+        channel_units = [layout['units'][layout['names'].index(name)]
+                         for name in channel_names]
+        channels_ok = np.ones(len(channel_names), dtype=bool)
+        norms = np.zeros((len(channel_names), 3))
+    else:
+        # Load the selected channels of the output and baseline files,
+        # paired by name
+        out_data, baseline_data, channel_names, channel_units, missing = \
+            load_case_outputs(case, out_file_path, baseline_file_path)
+        result['missing'] = missing
+
+        # Align outputs of different lengths or time steps, keeping the
+        # whole baseline to scale the absolute tolerance
+        full_baseline_data = baseline_data
+        try:
+            out_data, baseline_data, finding = align_outputs(
+                out_data, baseline_data)
+        except ValueError as error:
+            finding = {'error': str(error)}
+        if finding is not None:
+            finding['file'] = baseline_file
+            result['finding'] = finding
+        if finding is not None and 'error' in finding:
+            result.update(status='FAILED', ok=False,
+                          time=time.perf_counter() - start)
+            return result
+
+        # Determine which channels are passing relative to baseline
+        channels_ok = passing_channels(out_data.T, baseline_data.T,
+                                       case['relative_tolerance'],
+                                       case['absolute_tolerance'],
+                                       reference=full_baseline_data.T)
+
+        # Calculate norms
+        norms = calculateNorms(out_data, baseline_data)
+
+        # Plot channel data, as SVG sparklines for static summaries
+        if case['plot']:
+            plot = plot_channel_svgs if case.get('report') == "static" \
+                else plot_channel_data
+            plots = plot(channel_names, channel_units, out_data,
+                         baseline_data, case['relative_tolerance'],
+                         case['absolute_tolerance'],
+                         reference_data=full_baseline_data)
+
+    # Outputs missing baseline channels or not covering the baseline's time
+    # range fail
+    file_ok = bool(np.all(channels_ok)) and not missing and not (
+        finding is not None and finding['truncated'])
+    result.update(
+        status='PASSED' if file_ok else 'FAILED',
+        ok=file_ok,
+        channel_names=channel_names,
+        channel_units=channel_units,
+        channels_ok=channels_ok,
+        norms=norms,
+        plots=plots,
+        time=time.perf_counter() - start,
+    )
+    return result
+
+
+def compare_case(case: dict, block_index: bool = False,
+                 jobs: Optional[int] = None, force_report: bool = False) -> dict:
+    """
+    Compares the outputs of a case with their baselines concurrently and
+    writes the case summary to its run directory.
+
+    Parameters
+    ----------
+    case : dict
+        Case with its 'baseline_files' in 'input_path' and outputs of the
+        same names in 'run_path'.
+    block_index : bool, default: False
+        Flag to compare block hash indices of binary outputs first, see
+        `block_index`.
+    jobs : int, optional
+        Number of threads comparing the files of the case, by default one
+        per file up to `FILE_JOBS`.
+    force_report : bool, default: False
+        Flag to write the case summary even if the existing one has the
+        same `report_digest`. Otherwise it's kept and channels aren't
+        plotted.
+
+    Returns
+    -------
+    dict
+        The case, with 'check_ok', 'check_files_ok', 'check_times',
+        'check_results', 'alignments', 'missing_channels', 'differences',
+        'report_skipped' and 'status' set.
+    """
+
+    case['check_ok'] = True
+
+    case['check_files_ok'] = []
+    case['check_times'] = []
+    case['check_results'] = []
+    case['alignments'] = []
+    case['missing_channels'] = []
+    case['differences'] = []
+
+    # Keep the existing summary if its inputs haven't changed, and skip
+    # plotting which is the most expensive part of the comparison
+    report_name = os.path.basename(case['name'])
+    digest = report_digest(case)
+    case['report_skipped'] = not force_report and digest == read_report_digest(
+        os.path.join(case['run_path'], report_name + ".html"))
+    compared_case = dict(case, plot=False) if case['report_skipped'] else case
+
+    # Compare the files in threads, the comparisons mostly run in numpy and
+    # file reads which release the GIL
+    baseline_files = case['baseline_files']
+    if jobs is None:
+        jobs = min(len(baseline_files), FILE_JOBS)
+    if jobs > 1:
+        with ThreadPool(jobs) as pool:
+            results = pool.map(partial(compare_file, compared_case,
+                                       block_index=block_index),
+                               baseline_files)
+    else:
+        results = [compare_file(compared_case, f, block_index)
+                   for f in baseline_files]
+
+    # Aggregate the results in the order of the baseline files
+    status = None
+    for result in results:
+        case['check_ok'] &= result['ok']
+        case['check_files_ok'].append(result['ok'])
+        case['check_times'].append(result['time'])
+        if result['finding'] is not None:
+            case['alignments'].append(result['finding'])
+        if result['missing']:
+            case['missing_channels'].append({
+                'file': result['file'],
+                'channels': result['missing'],
+            })
+        if result['difference'] is not None:
+            case['differences'].append(result['difference'])
+        if result['status'] in ('MISSING', 'NOT_IMPL'):
+            status = result['status']
+        if 'channels_ok' not in result:
+            continue
+
+        # Export all case summaries, named after the case directory
+        if not case['report_skipped']:
+            export_case_summary(case['run_path'], report_name,
+                                result['channel_names'], result['channels_ok'],
+                                result['norms'], result['plots'], digest,
+                                case.get('report') or "interactive")
+
+        case['check_results'].append({
+            'file': result['file'],
+            'channel_names': result['channel_names'],
+            'channel_units': result['channel_units'],
+            'channels_ok': result['channels_ok'].tolist(),
+            'norms': result['norms'].tolist(),
+        })
+
+    case['status'] = status or ('PASSED' if case['check_ok'] else 'FAILED')
+
+    return case
+
+
+def check_status(case: dict) -> str:
+    """Formats the comparison results of a case for the log."""
+    status = ""
+    times = case.get('check_times') or [None] * len(case['check_files_ok'])
+    for baseline_file, file_ok, seconds in zip(case['baseline_files'],
+                                               case['check_files_ok'], times):
+        file_status = "PASSED" if file_ok else 'FAILED'
+        status += (f"\n{case['index']:>8}  Check: {baseline_file.ljust(42)} "
+                   f"{file_status:<8}")
+        if seconds is not None:
+            status += f" {seconds:>8.3f} seconds"
+    for finding in case.get('alignments', []):
+        text = finding.get('error') or format_finding(finding)
+        status += f"\n{case['index']:>8}   Time: {finding['file']} {text}"
+    for missing in case.get('missing_channels', []):
+        status += (f"\n{case['index']:>8}   Chan: {missing['file']} missing "
+                   f"{', '.join(missing['channels'])}")
+    for difference in case.get('differences', []):
+        start, end = difference['time']
+        status += (f"\n{case['index']:>8}   Diff: {difference['file']} first differs "
+                   f"at t = {start:g}-{end:g} s in {', '.join(difference['channels'])}")
+    status += (f"\n{case['index']:>8}    End: {case['name'].ljust(42, '.')} "
+               f"{case['status']:<8}")
+    return status
+
+
+def _compare(args: Tuple[dict, bool, bool, Optional[int]]) -> Tuple[dict, str]:
+    case, block_index, force_report, file_jobs = args
+    try:
+        compare_case(case, block_index, jobs=file_jobs, force_report=force_report)
+    except Exception as error:
+        case.update(check_ok=False, status='ERROR')
+        return case, f"\n{case['index']:>8}  Check: {case['name']} ERROR {error}"
+    return case, check_status(case)
+
+
+def compare_cases(cases: List[dict], jobs: int = 1, block_index: bool = False,
+                  force_report: bool = False) -> Iterator[Tuple[dict, str]]:
+    """
+    Compares the outputs of many cases in parallel.
+
+    Parameters
+    ----------
+    cases : List[dict]
+        Cases to compare, see `compare_case`.
+    jobs : int, default: 1
+        Number of processes comparing cases. With more than one process,
+        each compares the files of its case one after the other so that
+        the processes don't start more threads than there are cores.
+    block_index : bool, default: False
+        Flag to compare block hash indices of binary outputs first.
+    force_report : bool, default: False
+        Flag to write case summaries whose inputs haven't changed.
+
+    Yields
+    ------
+    Tuple[dict, str]
+        Compared case and its status message, in order of completion.
+    """
+    for i, case in enumerate(cases, 1):
+        case['num'] = i
+        case['index'] = f"{i}/{len(cases)}"
+        case['status'] = 'None'
+
+    if jobs == 1:
+        yield from map(_compare, [(case, block_index, force_report, None)
+                                  for case in cases])
+        return
+    arguments = [(case, block_index, force_report, 1) for case in cases]
+    with Pool(jobs) as pool:
+        yield from pool.imap_unordered(_compare, arguments)
+
+
+def directory_cases(run_dir: str, baseline_dir: str,
+                    relative_tolerance: float = RELATIVE_TOLERANCE,
+                    absolute_tolerance: float = ABSOLUTE_TOLERANCE,
+                    plot: bool = False) -> List[dict]:
+    """
+    Creates a case for every directory of the baseline tree holding output
+    files, compared with the same directory of the run tree.
+
+    Parameters
+    ----------
+    run_dir : str
+        Root of the tree of outputs to check.
+    baseline_dir : str
+        Root of the tree of baselines with the same layout.
+    relative_tolerance, absolute_tolerance : float
+        Tolerances in orders of magnitude.
+    plot : bool, default: False
+        Flag to plot the channels in the case summaries.
+
+    Returns
+    -------
+    List[dict]
+        Cases named by their directory relative to the roots.
+    """
+    cases = []
+    for dirpath, dirnames, filenames in os.walk(baseline_dir):
+        dirnames.sort()
+        relative = os.path.relpath(dirpath, baseline_dir)
+        for ext in OUTPUT_EXTENSIONS:
+            files = sorted({strip_codec(f) for f in filenames
+                            if strip_codec(f).endswith(ext)})
+            if not files:
+                continue
+            cases.append({
+                'name': relative if relative != "." else os.path.basename(
+                    os.path.abspath(baseline_dir)),
+                'driver': ext[1:],
+                'input_path': dirpath,
+                'run_path': os.path.join(run_dir, relative),
+                'baseline_file_ext': ext,
+                'baseline_files': files,
+                'relative_tolerance': relative_tolerance,
+                'absolute_tolerance': absolute_tolerance,
+                'plot': plot,
+            })
+    return cases
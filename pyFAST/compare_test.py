@@ -0,0 +1,166 @@
+import os
+import sys
+import tempfile
+import unittest
+import subprocess
+
+import numpy as np
+
+from .block_index_test import write_outb
+from .compare import compare_cases, directory_cases
+from .error_plotting import _envelope, export_case_summary, read_report_digest
+
+
+class TestCompare(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.run_dir = os.path.join(self.tmp.name, "build")
+        self.baseline_dir = os.path.join(self.tmp.name, "r-test")
+        t = np.arange(200) * 0.1
+        data = np.column_stack([np.sin(t), np.cos(t), 100 * t])
+        for name, offset in (("case_a", 0.0), ("case_b", 50.0)):
+            for root in (self.run_dir, self.baseline_dir):
+                os.makedirs(os.path.join(root, "openfast", name))
+            write_outb(os.path.join(self.baseline_dir, "openfast", name,
+                                    name + ".outb"), data)
+            test = data.copy()
+            test[:, 1] += offset
+            write_outb(os.path.join(self.run_dir, "openfast", name,
+                                    name + ".outb"), test)
+
+        # Baseline without output
+        os.makedirs(os.path.join(self.baseline_dir, "openfast", "case_c"))
+        write_outb(os.path.join(self.baseline_dir, "openfast", "case_c",
+                                "case_c.outb"), data)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_directory_cases(self):
+        cases = directory_cases(self.run_dir, self.baseline_dir)
+        self.assertListEqual([c['name'] for c in cases],
+                             ["openfast/case_a", "openfast/case_b",
+                              "openfast/case_c"])
+        self.assertListEqual(cases[0]['baseline_files'], ["case_a.outb"])
+
+    def test_compare_cases(self):
+        cases = directory_cases(self.run_dir, self.baseline_dir)
+        results = {c['name']: c for c, _ in compare_cases(cases, jobs=2)}
+        self.assertEqual(results["openfast/case_a"]['status'], 'PASSED')
+        self.assertEqual(results["openfast/case_b"]['status'], 'FAILED')
+        self.assertEqual(results["openfast/case_c"]['status'], 'MISSING')
+        self.assertListEqual(
+            results["openfast/case_b"]['check_results'][0]['channels_ok'],
+            [True, True, False, True])
+        self.assertTrue(os.path.isfile(os.path.join(
+            self.run_dir, "openfast", "case_a", "case_a.html")))
+
+    def test_plot_data_file(self):
+        cases = directory_cases(self.run_dir, self.baseline_dir, plot=True)
+        next(compare_cases(cases[:1]))
+        case_dir = os.path.join(self.run_dir, "openfast", "case_a")
+        with open(os.path.join(case_dir, "case_a.data.js")) as f:
+            self.assertTrue(f.read().startswith("var PYFAST_CASE_DATA = "))
+        with open(os.path.join(case_dir, "case_a.html")) as f:
+            html = f.read()
+        self.assertIn('<script src="case_a.data.js" defer></script>', html)
+        self.assertEqual(html.count('class="lazy-plot"'), 4)
+
+    def test_static_report(self):
+        cases = directory_cases(self.run_dir, self.baseline_dir, plot=True)
+        cases[0]['report'] = "static"
+        next(compare_cases(cases[:1]))
+        case_dir = os.path.join(self.run_dir, "openfast", "case_a")
+        with open(os.path.join(case_dir, "case_a.html")) as f:
+            html = f.read()
+        self.assertNotIn("<script", html)
+        self.assertEqual(html.count("<svg"), 8)
+        self.assertFalse(os.path.exists(os.path.join(case_dir, "case_a.data.js")))
+
+    def test_envelope_keeps_spikes(self):
+        t = np.arange(100000) * 0.01
+        values = np.zeros_like(t)
+        values[54321] = 7.0
+        x, y = _envelope(t, values, 640)
+        self.assertEqual(len(y), 1280)
+        self.assertEqual(y.max(), 7.0)
+
+    def test_unchanged_report_kept(self):
+        report = os.path.join(self.run_dir, "openfast", "case_a", "case_a.html")
+        cases = directory_cases(self.run_dir, self.baseline_dir)
+        case, _ = next(compare_cases(cases[:1]))
+        self.assertFalse(case['report_skipped'])
+        mtime = os.stat(report).st_mtime_ns
+
+        case, _ = next(compare_cases(cases[:1]))
+        self.assertTrue(case['report_skipped'])
+        self.assertEqual(case['status'], 'PASSED')
+        self.assertEqual(os.stat(report).st_mtime_ns, mtime)
+
+        case, _ = next(compare_cases(cases[:1], force_report=True))
+        self.assertFalse(case['report_skipped'])
+
+        # Changed tolerances change the digest
+        cases[0]['relative_tolerance'] = 3
+        case, _ = next(compare_cases(cases[:1]))
+        self.assertFalse(case['report_skipped'])
+
+    def test_interrupted_report_not_kept(self):
+        run_path = os.path.join(self.run_dir, "openfast", "case_a")
+        report = os.path.join(run_path, "case_a.html")
+        export_case_summary(run_path, "case_a", ["Time"], [True], [[0, 0, 0]], [],
+                            digest="abc", report="static")
+        self.assertEqual(read_report_digest(report), "abc")
+
+        # Writing fails after the head holding the new digest
+        with self.assertRaises(ValueError):
+            export_case_summary(run_path, "case_a", ["Time", "A"], [True, True],
+                                [[0, 0, 0], ["x", 0, 0]], [], digest="def",
+                                report="static")
+        self.assertEqual(read_report_digest(report), "abc")
+
+    def test_truncated_output(self):
+        path = os.path.join(self.run_dir, "openfast", "case_a", "case_a.outb")
+        t = np.arange(120) * 0.1
+        write_outb(path, np.column_stack([np.sin(t), np.cos(t), 100 * t]))
+        cases = directory_cases(self.run_dir, self.baseline_dir)
+        case, status = next(compare_cases(cases[:1]))
+        self.assertEqual(case['status'], 'FAILED')
+        self.assertTrue(all(case['check_results'][0]['channels_ok']))
+        self.assertTrue(case['alignments'][0]['truncated'])
+        self.assertIn("truncated", status)
+
+    def test_multiple_files(self):
+        case_dir = os.path.join(self.baseline_dir, "openfast", "case_a")
+        t = np.arange(200) * 0.1
+        data = np.column_stack([np.sin(t), np.cos(t), 100 * t])
+        for name in ("case_a.T1.outb", "case_a.T2.outb"):
+            write_outb(os.path.join(case_dir, name), data)
+        write_outb(os.path.join(self.run_dir, "openfast", "case_a",
+                                "case_a.T2.outb"), data)
+        cases = directory_cases(self.run_dir, self.baseline_dir)
+        case, status = next(compare_cases(cases[:1]))
+        self.assertListEqual(case['baseline_files'],
+                             ["case_a.T1.outb", "case_a.T2.outb", "case_a.outb"])
+        self.assertListEqual(case['check_files_ok'], [False, True, True])
+        self.assertEqual(len(case['check_times']), 3)
+        self.assertEqual(case['status'], 'MISSING')
+        self.assertListEqual([r['file'] for r in case['check_results']],
+                             ["case_a.T2.outb", "case_a.outb"])
+        self.assertEqual(status.count("seconds"), 3)
+
+    def test_norm_main(self):
+        files = [os.path.join(self.baseline_dir, "openfast", "case_a", "case_a.outb"),
+                 os.path.join(self.run_dir, "openfast", "case_b", "case_b.outb")]
+        result = subprocess.run(
+            [sys.executable, "-m", "pyFAST.norm", files[0], files[0],
+             "max_norm", "l2_norm"], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        result = subprocess.run(
+            [sys.executable, "-m", "pyFAST.norm", files[0], files[1],
+             "max_norm", "l2_norm"], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 1, result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
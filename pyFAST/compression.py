@@ -0,0 +1,160 @@
+"""
+Transparent compression of output and baseline files.
+
+An output `Case.outb` may be stored compressed as `Case.outb.zst`,
+`Case.outb.gz` or `Case.outb.xz`. Readers resolve the stored file with
+`find_output` and open it with `open_output`, which decompresses it as a
+stream. gzip and xz use the standard library. zstd requires the optional
+`zstandard` package.
+"""
+
+import os
+import gzip
+import lzma
+import shutil
+from typing import IO, List, Optional
+
+import numpy as np
+
+
+# Codecs by name, with their file extensions in order of preference when
+# several compressed copies exist
+CODECS = {
+    "zst": ".zst",
+    "gz": ".gz",
+    "xz": ".xz",
+}
+
+# Bytes copied at a time when compressing
+CHUNK_SIZE = 1 << 20
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("Reading or writing .zst files requires the "
+                          "'zstandard' package: pip install zstandard") from None
+    return zstandard
+
+
+def codec_of(path: str) -> Optional[str]:
+    """Returns the name of the codec compressing a file, None if it isn't."""
+    for codec, ext in CODECS.items():
+        if path.endswith(ext):
+            return codec
+    return None
+
+
+def strip_codec(path: str) -> str:
+    """Returns the path of a file without its compression extension."""
+    codec = codec_of(path)
+    return path[:-len(CODECS[codec])] if codec else path
+
+
+def find_output(path: str) -> str:
+    """
+    Returns the path of an output file as stored, either uncompressed or
+    with a compression extension, or the given path if none exists.
+    """
+    if os.path.isfile(path):
+        return path
+    for ext in CODECS.values():
+        if os.path.isfile(path + ext):
+            return path + ext
+    return path
+
+
+def open_output(path: str, mode: str = "rb") -> IO:
+    """
+    Opens an output file, decompressing it as it's read if it has a
+    compression extension.
+
+    Parameters
+    ----------
+    path : str
+        Path of the stored file.
+    mode : str, default: "rb"
+        "rb" or "rt".
+    """
+    codec = codec_of(path)
+    if codec == "gz":
+        return gzip.open(path, mode)
+    if codec == "xz":
+        return lzma.open(path, mode)
+    if codec == "zst":
+        return _zstandard().open(path, mode)
+    return open(path, mode)
+
+
+def read_array(f: IO, count: int, dtype) -> np.ndarray:
+    """
+    Reads an array from a file by decompressing or copying straight into
+    its buffer.
+
+    Raises
+    ------
+    EOFError
+        If the file ends before `count` values are read.
+    """
+    array = np.empty(count, dtype=dtype)
+    buffer = memoryview(array).cast("B")
+    read = 0
+    while read < len(buffer):
+        n = f.readinto(buffer[read:])
+        if not n:
+            raise EOFError(f"read {read // array.itemsize} of {count} values")
+        read += n
+    return array
+
+
+def compress_file(path: str, codec: str = "gz", level: Optional[int] = None) -> str:
+    """
+    Compresses a file next to it and removes the original.
+
+    Parameters
+    ----------
+    path : str
+        Path of the uncompressed file.
+    codec : str, default: "gz"
+        One of `CODECS`.
+    level : int, optional
+        Compression level, by default the codec's default.
+
+    Returns
+    -------
+    str
+        Path of the compressed file.
+    """
+    compressed_path = path + CODECS[codec]
+    if codec == "gz":
+        out = gzip.open(compressed_path, "wb", **({"compresslevel": level}
+                                                   if level is not None else {}))
+    elif codec == "xz":
+        out = lzma.open(compressed_path, "wb", preset=level)
+    else:
+        zstandard = _zstandard()
+        out = zstandard.open(compressed_path, "wb", cctx=zstandard.ZstdCompressor(
+            level=level if level is not None else 3))
+    with open(path, "rb") as f, out:
+        shutil.copyfileobj(f, out, CHUNK_SIZE)
+    shutil.copystat(path, compressed_path)
+    os.remove(path)
+    return compressed_path
+
+
+def compress_outputs(case: dict, codec: str = "gz") -> List[str]:
+    """
+    Compresses the outputs of a case that were compared with baselines.
+
+    Returns
+    -------
+    List[str]
+        Paths of the compressed files.
+    """
+    compressed = []
+    for baseline_file in case.get('baseline_files', []):
+        path = os.path.join(case['run_path'], baseline_file)
+        if os.path.isfile(path):
+            compressed.append(compress_file(path, codec))
+    return compressed
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+import importlib.util
+
+import numpy as np
+
+from .block_index_test import write_outb
+from .output_selection_test import write_out
+from .compare import compare_cases, directory_cases
+from .compression import compress_file, find_output, strip_codec
+from .fast_io import load_output
+from .output_selection import load_output_pair
+
+
+class TestCompression(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        t = np.arange(500) * 0.1
+        self.data = np.column_stack([np.sin(t), np.cos(t), 100 * t])
+        self.outb = os.path.join(self.tmp.name, "case.outb")
+        write_outb(self.outb, self.data)
+        self.out = os.path.join(self.tmp.name, "case.out")
+        write_out(self.out, np.column_stack([t, self.data]),
+                  ["Time", "Chan0", "Chan1", "Chan2"])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _check_codec(self, codec):
+        for path in (self.outb, self.out):
+            expected, info, _ = load_output(path)
+            compressed = compress_file(path, codec)
+            self.assertFalse(os.path.exists(path))
+            self.assertEqual(find_output(path), compressed)
+            self.assertEqual(strip_codec(compressed), path)
+            data, compressed_info, _ = load_output(path)
+            np.testing.assert_array_equal(data, expected)
+            self.assertDictEqual(compressed_info, info)
+            selected, _, names, _, _ = load_output_pair(
+                compressed, compressed, include="Chan1", window=(1.0, 2.0))
+            np.testing.assert_array_equal(selected, expected[10:21][:, [0, 2]])
+
+    def test_gzip(self):
+        self._check_codec("gz")
+
+    def test_xz(self):
+        self._check_codec("xz")
+
+    @unittest.skipUnless(importlib.util.find_spec("zstandard"), "requires zstandard")
+    def test_zstd(self):
+        self._check_codec("zst")
+
+    def test_truncated_file(self):
+        compressed = compress_file(self.outb, "gz")
+        with open(compressed, "rb") as f:
+            content = f.read()
+        with open(compressed, "wb") as f:
+            f.write(content[:len(content) // 2])
+        with self.assertRaises(Exception):
+            load_output(self.outb)
+
+    def test_compare_compressed_baselines(self):
+        run_dir = os.path.join(self.tmp.name, "build", "case")
+        baseline_dir = os.path.join(self.tmp.name, "r-test", "case")
+        os.makedirs(run_dir)
+        os.makedirs(baseline_dir)
+        write_outb(os.path.join(run_dir, "case.outb"), self.data)
+        compress_file(self.outb, "xz")
+        os.rename(self.outb + ".xz", os.path.join(baseline_dir, "case.outb.xz"))
+        cases = directory_cases(os.path.dirname(run_dir), os.path.dirname(baseline_dir))
+        self.assertListEqual(cases[0]['baseline_files'], ["case.outb"])
+        case, _ = next(compare_cases(cases))
+        self.assertEqual(case['status'], 'PASSED')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,252 @@
+"""Static runtime estimate of a case from its OpenFAST input files."""
+
+import os
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+# Aliases of the simulation length and time step in glue-code and driver
+# input files, in order of preference
+TMAX_KEYS = ("tmax", "t_final")
+DT_KEYS = ("dt", "dt_low", "timeinterval")
+NSTEPS_KEYS = ("nsteps", "numtsteps", "numtimesteps")
+
+# Number of steps assumed when the input file doesn't give them
+DEFAULT_STEPS = 1000
+
+# Relative cost per time step of the modules enabled in a glue-code input
+# file, indexed by the value of the module's switch. Switches that are off
+# (0) or not listed cost nothing.
+MODULE_WEIGHTS = {
+    "compelast": {1: 1.0, 2: 4.0, 3: 1.0},   # ElastoDyn, BeamDyn, SimplifiedElastoDyn
+    "compinflow": {1: 0.5, 2: 0.5},
+    "compaero": {1: 1.0, 2: 1.5},
+    "compservo": {1: 0.3},
+    "comphydro": {1: 2.0},
+    "compsub": {1: 2.0, 2: 0.5},
+    "compmooring": {1: 0.5, 2: 0.5, 3: 2.0, 4: 0.5},
+    "compice": {1: 0.5, 2: 0.5},
+}
+
+# Cost per time step of each output channel
+CHANNEL_WEIGHT = 0.005
+
+# Cost per time step of each squared OLAF wake panel count
+OLAF_WEIGHT = 1e-3
+
+# Module input files referenced by a glue-code input file
+MODULE_FILE_KEYS = ("edfile", "bdbldfile(1)", "inflowfile", "aerofile",
+                    "servofile", "hydrofile", "subfile", "mooringfile",
+                    "icefile")
+
+# Seconds per cost unit used before any runtime has been measured
+DEFAULT_SCALE = 1e-3
+
+
+def read_input_values(path: str) -> Dict[str, str]:
+    """
+    Reads the 'value  Key  - description' lines of an OpenFAST input file.
+
+    Parameters
+    ----------
+    path : str
+        Path to the input file.
+
+    Returns
+    -------
+    Dict[str, str]
+        Values by lower-case key. If a key appears several times, the first
+        value is kept.
+    """
+    values = {}
+    with open(path, errors="replace") as f:
+        for line in f:
+            tokens = line.split()
+            if len(tokens) < 2:
+                continue
+            key = tokens[1].lower()
+            if key not in values:
+                values[key] = tokens[0].strip('"\'')
+    return values
+
+
+def count_output_channels(path: str) -> int:
+    """
+    Counts the channels listed in the OutList sections of an input file.
+    """
+    count = 0
+    in_list = False
+    with open(path, errors="replace") as f:
+        for line in f:
+            if not in_list:
+                in_list = line.split()[:1] == ["OutList"]
+                continue
+            if line.strip().upper().startswith("END"):
+                in_list = False
+                continue
+            for quoted in re.findall(r'"([^"]*)"', line):
+                count += len([c for c in re.split(r"[,\s]+", quoted) if c])
+    return count
+
+
+def _number(values: Dict[str, str], keys) -> Optional[float]:
+    for key in keys:
+        try:
+            return float(values[key].replace("D", "E").replace("d", "e"))
+        except (KeyError, ValueError):
+            continue
+    return None
+
+
+def _referenced_file(values: Dict[str, str], key: str,
+                     directory: str) -> Optional[str]:
+    name = values.get(key)
+    if not name or name.lower() in ("unused", "none", "default"):
+        return None
+    path = os.path.join(directory, name)
+    return path if os.path.isfile(path) else None
+
+
+def _olaf_panels(path: str) -> float:
+    """Returns the number of near and far wake panels of an OLAF input."""
+    olaf = read_input_values(path)
+    return sum(_number(olaf, (key,)) or 0 for key in
+               ("nnwpanels", "nnwpanel", "nfwpanels", "nfwpanel"))
+
+
+def input_features(path: str) -> dict:
+    """
+    Extracts the features used by the cost model from a glue-code (.fst,
+    .fstf) or module driver input file and the module files it references.
+
+    Parameters
+    ----------
+    path : str
+        Path to the main input file.
+
+    Returns
+    -------
+    dict
+        Simulation length 'tmax', time step 'dt', number of steps 'steps',
+        module switches 'modules', 'channels' and OLAF wake panels
+        'olaf_panels' (0 without OLAF).
+    """
+    directory = os.path.dirname(path)
+    values = read_input_values(path)
+
+    tmax = _number(values, TMAX_KEYS)
+    dt = _number(values, DT_KEYS)
+    steps = _number(values, NSTEPS_KEYS)
+    if steps is None:
+        steps = tmax / dt if tmax and dt else DEFAULT_STEPS
+
+    modules = {}
+    for key in MODULE_WEIGHTS:
+        switch = _number(values, (key,))
+        if switch is not None:
+            modules[key] = int(switch)
+
+    channels = count_output_channels(path)
+    olaf_panels = 0
+    for key in MODULE_FILE_KEYS:
+        module_path = _referenced_file(values, key, directory)
+        if module_path is None:
+            continue
+        channels += count_output_channels(module_path)
+
+        # Free vortex wake cost grows with the square of the wake panels
+        if key == "aerofile":
+            aero = read_input_values(module_path)
+            if aero.get("wakemod") == "3":
+                olaf_path = _referenced_file(aero, "olafinputfilename",
+                                             os.path.dirname(module_path))
+                if olaf_path is not None:
+                    olaf_panels = _olaf_panels(olaf_path)
+
+    # Driver inputs referencing an OLAF file directly
+    olaf_path = _referenced_file(values, "olafinputfilename", directory)
+    if olaf_path is not None and not olaf_panels:
+        olaf_panels = _olaf_panels(olaf_path)
+
+    return {
+        "tmax": tmax,
+        "dt": dt,
+        "steps": steps,
+        "modules": modules,
+        "channels": channels,
+        "olaf_panels": olaf_panels,
+    }
+
+
+def estimate_cost(features: dict) -> float:
+    """
+    Estimates the cost of a simulation in arbitrary units proportional to
+    its runtime: the number of time steps times a per-step cost from the
+    enabled modules, output channels and OLAF wake size.
+    """
+    per_step = 1.0
+    for key, switch in features["modules"].items():
+        per_step += MODULE_WEIGHTS[key].get(switch, 0.0)
+    per_step += CHANNEL_WEIGHT * features["channels"]
+    per_step += OLAF_WEIGHT * features["olaf_panels"] ** 2
+    return features["steps"] * per_step
+
+
+def case_static_cost(case: dict) -> Optional[float]:
+    """
+    Returns the static cost estimate of a case from its input file in the
+    input directory, or None if it can't be read.
+    """
+    path = os.path.join(case['input_path'], case['input_file'])
+    try:
+        return estimate_cost(input_features(path))
+    except (OSError, ValueError, ZeroDivisionError):
+        return None
+
+
+def _ranks(values: np.ndarray) -> np.ndarray:
+    """Ranks of values, with tied values sharing their average rank."""
+    ranks = np.empty(values.size)
+    ranks[np.argsort(values, kind="mergesort")] = np.arange(values.size)
+    _, inverse = np.unique(values, return_inverse=True)
+    return (np.bincount(inverse, ranks) / np.bincount(inverse))[inverse]
+
+
+def evaluate(estimates: List[float], runtimes: List[float]) -> dict:
+    """
+    Compares static cost estimates with measured runtimes.
+
+    Parameters
+    ----------
+    estimates : List[float]
+        Static cost estimates of a set of cases.
+    runtimes : List[float]
+        Measured runtimes of the same cases in seconds.
+
+    Returns
+    -------
+    dict
+        'scale': median seconds per cost unit, used to convert estimates to
+        seconds; 'rank_correlation': Spearman correlation of estimates and
+        runtimes, the quantity that matters for ordering cases;
+        'median_error': median relative error of the scaled estimates.
+    """
+    estimates = np.asarray(estimates, dtype=float)
+    runtimes = np.asarray(runtimes, dtype=float)
+    valid = (estimates > 0) & (runtimes > 0)
+    estimates, runtimes = estimates[valid], runtimes[valid]
+    if estimates.size == 0:
+        return {"scale": DEFAULT_SCALE, "rank_correlation": np.nan,
+                "median_error": np.nan, "cases": 0}
+
+    scale = float(np.median(runtimes / estimates))
+    error = np.abs(scale * estimates - runtimes) / runtimes
+    rank_estimates, rank_runtimes = _ranks(estimates), _ranks(runtimes)
+    if np.ptp(rank_estimates) > 0 and np.ptp(rank_runtimes) > 0:
+        correlation = float(np.corrcoef(rank_estimates, rank_runtimes)[0, 1])
+    else:
+        correlation = np.nan
+    return {"scale": scale, "rank_correlation": correlation,
+            "median_error": float(np.median(error)), "cases": int(estimates.size)}
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+
+from .cost_model import estimate_cost, evaluate, input_features
+
+
+FST = """------- OpenFAST INPUT FILE -------------------------------------------
+Test case
+---------------------- SIMULATION CONTROL --------------------------------------
+False         Echo            - Echo input data to <RootName>.ech (flag)
+     60   TMax            - Total run time (s)
+  0.0125  DT              - Recommended module time step (s)
+---------------------- FEATURE SWITCHES AND FLAGS ------------------------------
+          1   CompElast       - Compute structural dynamics (switch) {1=ElastoDyn}
+          1   CompInflow      - Compute inflow wind velocities (switch)
+          2   CompAero        - Compute aerodynamic loads (switch)
+          0   CompHydro       - Compute hydrodynamic loads (switch)
+---------------------- INPUT FILES ---------------------------------------------
+"../Turbine/ElastoDyn.dat"    EDFile          - ElastoDyn input file (quoted string)
+"unused"      BDBldFile(1)    - BeamDyn input file for blade 1 (quoted string)
+"AeroDyn.dat"    AeroFile        - AeroDyn input file (quoted string)
+"""
+
+ELASTODYN = """---------------------- OUTPUT -------------------------------------------
+                   OutList     - The next line(s) contains a list of output parameters.
+"OoPDefl1,IPDefl1"
+"RotSpeed"            - Rotor speed
+END of input file (the word "END" must appear in the first 3 columns)
+"""
+
+AERODYN = """          3   WakeMod            - Type of wake/induction model (switch)
+"OLAF.dat"    OLAFInputFileName - Input file for OLAF [used only when WakeMod=3]
+                   OutList     - The next line(s) contains a list of output parameters.
+"RtAeroCp"
+END
+"""
+
+OLAF = """         40   nNWPanels      - Number of near-wake panels [integer] (-)
+         20   nFWPanels      - Number of far-wake panels [integer] (-)
+"""
+
+
+class TestCostModel(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        case_dir = os.path.join(self.tmp.name, "Case")
+        turbine_dir = os.path.join(self.tmp.name, "Turbine")
+        os.makedirs(case_dir)
+        os.makedirs(turbine_dir)
+        for path, text in ((os.path.join(case_dir, "Case.fst"), FST),
+                           (os.path.join(turbine_dir, "ElastoDyn.dat"), ELASTODYN),
+                           (os.path.join(case_dir, "AeroDyn.dat"), AERODYN),
+                           (os.path.join(case_dir, "OLAF.dat"), OLAF)):
+            with open(path, "w") as f:
+                f.write(text)
+        self.fst = os.path.join(case_dir, "Case.fst")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_input_features(self):
+        features = input_features(self.fst)
+        self.assertEqual(features["tmax"], 60)
+        self.assertEqual(features["dt"], 0.0125)
+        self.assertEqual(features["steps"], 4800)
+        self.assertDictEqual(features["modules"], {
+            "compelast": 1, "compinflow": 1, "compaero": 2, "comphydro": 0})
+        self.assertEqual(features["channels"], 4)
+        self.assertEqual(features["olaf_panels"], 60)
+
+    def test_olaf_dominates_cost(self):
+        features = input_features(self.fst)
+        cost_olaf = estimate_cost(features)
+        cost_bem = estimate_cost({**features, "olaf_panels": 0})
+        self.assertGreater(cost_olaf, cost_bem)
+        cost_large_wake = estimate_cost({**features, "olaf_panels": 600})
+        self.assertGreater(cost_large_wake, 50 * cost_bem)
+
+    def test_evaluate(self):
+        model = evaluate([1.0, 2.0, 4.0, 8.0], [10.0, 19.0, 42.0, 80.0])
+        self.assertAlmostEqual(model["scale"], 10.0, delta=0.3)
+        self.assertAlmostEqual(model["rank_correlation"], 1.0)
+        self.assertLess(model["median_error"], 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
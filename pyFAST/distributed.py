@@ -0,0 +1,355 @@
+"""
+Distributed execution of regression test cases over TCP.
+
+A coordinator, started by the CLI with '--listen', hands cases to
+'pyFAST worker' processes that connect to it. Workers run each case with
+`Executor._run_case` and send back the case results, including the norms
+of every checked channel and, if requested, the output files. A case held
+by a worker whose connection is lost is queued again for another worker.
+
+Messages are JSON objects preceded by their length as a 4-byte big-endian
+unsigned integer. The worker sends 'hello' when it connects and 'result'
+after each case; the coordinator sends 'case' and, when all cases have
+finished, 'shutdown'. While a worker runs a case it sends 'heartbeat'
+every few seconds. A worker that sends nothing for `heartbeat_timeout`
+seconds, e.g. because its host lost power without closing the connection,
+or whose case runs far longer than its expected runtime, is treated as
+lost and its case is queued again.
+
+The coordinator listens on the loopback interface unless a host is given.
+Workers can be required to present a shared token in their 'hello'. Files
+sent back by workers are only written to the coordinator's own run
+directory of the case, and only if they're among the case's expected
+outputs.
+"""
+
+import os
+import hmac
+import json
+import time
+import queue
+import base64
+import socket
+import struct
+import threading
+from typing import List, Tuple
+
+from .executor import Executor
+from .utilities import json_default
+from .retention import archive_name
+from .error_plotting import DATA_EXT
+
+
+HEADER = struct.Struct("!I")
+
+# Seconds without any message from a worker running a case before it's
+# considered lost. Workers send heartbeats four times as often.
+HEARTBEAT_TIMEOUT = 60.0
+
+# Multiple of its expected runtime, and minimum seconds, after which a case
+# whose worker still sends heartbeats is considered hung
+CASE_TIMEOUT_FACTOR = 5.0
+CASE_TIMEOUT_MIN = 600.0
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """Parses a 'host:port' address, the host defaulting to loopback."""
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def case_timeout(case: dict) -> float:
+    """
+    Returns the seconds a case may run on a worker before it's considered
+    hung, None if its runtime isn't known from previous runs.
+    """
+    if not case.get('expected_run_time'):
+        return None
+    return max(CASE_TIMEOUT_MIN, CASE_TIMEOUT_FACTOR * case['expected_run_time'])
+
+
+def send_message(sock: socket.socket, message: dict):
+    data = json.dumps(message, default=json_default).encode()
+    sock.sendall(HEADER.pack(len(data)) + data)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def recv_message(sock: socket.socket) -> dict:
+    size, = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+    return json.loads(_recv_exactly(sock, size))
+
+
+def output_names(case: dict) -> List[str]:
+    """
+    Returns the names of the files a worker may send back for a case: its
+    outputs, log, summary and archive.
+    """
+    report_name = os.path.basename(case['name'])
+    names = [os.path.basename(n) for n in case.get('baseline_files', [])]
+    return names + [os.path.basename(case['log_path']), report_name + '.html',
+                    report_name + DATA_EXT, archive_name(case)]
+
+
+def _output_files(case: dict) -> List[str]:
+    """Lists the files a worker sends back for a case."""
+    return [n for n in output_names(case)
+            if os.path.isfile(os.path.join(case['run_path'], n))]
+
+
+class Coordinator:
+    """
+    Distributes cases to connected workers and collects their results.
+    """
+
+    def __init__(self, address: str, stage: bool = False,
+                 fetch_outputs: bool = False, max_attempts: int = 3,
+                 token: str = None, heartbeat_timeout: float = HEARTBEAT_TIMEOUT):
+        """
+        Parameters
+        ----------
+        address : str
+            'host:port' to listen on, on the loopback interface if the host
+            is omitted. Port 0 selects a free port.
+        stage : bool, default: False
+            Flag for workers to copy the case inputs to the run directory
+            themselves, needed when they don't share the file system.
+        fetch_outputs : bool, default: False
+            Flag for workers to send back output, log and summary files,
+            which are written to the case run directory.
+        max_attempts : int, default: 3
+            Number of workers a case is sent to before it's marked as lost.
+        token : str, optional
+            Shared secret workers must send to be given cases.
+        heartbeat_timeout : float, default: HEARTBEAT_TIMEOUT
+            Seconds without a message from a worker running a case before
+            the worker is considered lost.
+        """
+        self.stage = stage
+        self.token = token
+        self.heartbeat_timeout = heartbeat_timeout
+        self.fetch_outputs = fetch_outputs
+        self.max_attempts = max_attempts
+        self.server = socket.create_server(parse_address(address))
+        self.server.settimeout(0.5)
+        self.address = "{}:{}".format(*self.server.getsockname()[:2])
+
+    def run(self, cases: List[dict]):
+        """
+        Runs the cases on the workers.
+
+        Parameters
+        ----------
+        cases : List[dict]
+            Staged cases to run.
+
+        Yields
+        ------
+        Tuple[dict, str]
+            Finished case and its status message, in order of completion.
+        """
+
+        self._pending = queue.Queue()
+        self._finished = queue.Queue()
+        self._done = threading.Event()
+        for case in cases:
+            case['attempts'] = 0
+            self._pending.put(case)
+
+        print(f"Waiting for workers on {self.address}", flush=True)
+        accept_thread = threading.Thread(target=self._accept, daemon=True)
+        accept_thread.start()
+
+        try:
+            for _ in range(len(cases)):
+                yield self._finished.get()
+        finally:
+            self._done.set()
+            accept_thread.join()
+            self.server.close()
+
+    def _accept(self):
+        handlers = []
+        while not self._done.is_set():
+            try:
+                conn, addr = self.server.accept()
+            except socket.timeout:
+                continue
+            conn.settimeout(self.heartbeat_timeout)
+            handler = threading.Thread(target=self._serve, args=(conn, addr),
+                                       daemon=True)
+            handler.start()
+            handlers.append(handler)
+        for handler in handlers:
+            handler.join()
+
+    def _serve(self, conn: socket.socket, addr):
+        """Feeds cases to one worker until all cases have finished."""
+        case = None
+        try:
+            hello = recv_message(conn)
+            if self.token is not None and not hmac.compare_digest(
+                    str(hello.get('token', '')), self.token):
+                print(f"Worker {addr[0]} rejected: invalid token", flush=True)
+                return
+            worker = f"{hello.get('host', addr[0])}:{hello.get('pid', '')}"
+            print(f"Worker connected: {worker}", flush=True)
+            while not self._done.is_set():
+                try:
+                    case = self._pending.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                case['attempts'] += 1
+                send_message(conn, {'type': 'case', 'case': case,
+                                    'stage': self.stage,
+                                    'fetch_outputs': self.fetch_outputs,
+                                    'heartbeat': self.heartbeat_timeout / 4})
+
+                # Wait for the result, each heartbeat showing the worker is
+                # alive until the case runs longer than expected
+                timeout = case_timeout(case)
+                deadline = time.monotonic() + timeout if timeout else None
+                reply = recv_message(conn)
+                while reply['type'] == 'heartbeat':
+                    if deadline is not None and time.monotonic() > deadline:
+                        raise TimeoutError(f"{case['name']} still running after "
+                                           f"{timeout:.0f} s")
+                    reply = recv_message(conn)
+                result = reply['case']
+
+                # Keep the coordinator's paths and only write expected files
+                # there, whatever the worker sent
+                result.update({key: case[key] for key in
+                               ('run_path', 'log_path', 'input_file_path')})
+                allowed = set(output_names(case))
+                for name, data in reply.get('files', {}).items():
+                    if name not in allowed:
+                        print(f"Worker {addr[0]} sent unexpected file {name!r} "
+                              f"for {case['name']}, ignored", flush=True)
+                        continue
+                    with open(os.path.join(case['run_path'], name), 'wb') as f:
+                        f.write(base64.b64decode(data))
+                case = None
+                self._finished.put((result, reply['status']))
+            send_message(conn, {'type': 'shutdown'})
+        except (OSError, ValueError, KeyError) as error:
+            print(f"Worker {addr[0]} lost: {error}", flush=True)
+            if case is not None:
+                self._requeue(case)
+        finally:
+            conn.close()
+
+    def _requeue(self, case: dict):
+        """Queues a case again after losing its worker, or marks it lost."""
+        if case['attempts'] < self.max_attempts:
+            self._pending.put(case)
+            return
+        case.update(status='LOST', run_ok=False, check_ok=False)
+        status = (f"{case['index']:>8}    Run: {case['name'].ljust(42, '.')} "
+                  f"LOST after {case['attempts']} attempts")
+        self._finished.put((case, status))
+
+
+def _send_heartbeats(sock: socket.socket, finished: threading.Event,
+                     interval: float):
+    """Tells the coordinator the worker is alive until a case finishes."""
+    while not finished.wait(interval):
+        try:
+            send_message(sock, {'type': 'heartbeat'})
+        except OSError:
+            return
+
+
+def _run_connection(address: Tuple[str, int], verbose: bool,
+                    connect_timeout: float, token: str = None):
+    """Runs cases received over one connection to the coordinator."""
+
+    # Wait for the coordinator to start listening
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            sock = socket.create_connection(address)
+            break
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.5)
+
+    executor = Executor([], verbose=verbose)
+    with sock:
+        send_message(sock, {'type': 'hello', 'host': socket.gethostname(),
+                            'pid': os.getpid(), 'token': token})
+        while True:
+            message = recv_message(sock)
+            if message['type'] != 'case':
+                break
+            case = message['case']
+
+            # Send heartbeats while the case is staged and runs
+            finished = threading.Event()
+            heartbeat = threading.Thread(
+                target=_send_heartbeats,
+                args=(sock, finished, message.get('heartbeat', 15.0)),
+                daemon=True)
+            heartbeat.start()
+            try:
+                # Copy inputs if the coordinator's staging isn't visible here
+                if message['stage']:
+                    executor.cases = [case]
+                    try:
+                        executor._build_local_case_directories()
+                    finally:
+                        executor.cases = []
+                case, status = executor._run_case(case)
+            except Exception as error:
+                case.update(status='ERROR', run_ok=False, check_ok=False)
+                status = (f"{case['index']:>8}    Run: "
+                          f"{case['name'].ljust(42, '.')} ERROR {error}")
+            finally:
+                finished.set()
+                heartbeat.join()
+            print(status, flush=True)
+
+            reply = {'type': 'result', 'case': case, 'status': status}
+            if message['fetch_outputs']:
+                reply['files'] = {}
+                for name in _output_files(case):
+                    with open(os.path.join(case['run_path'], name), 'rb') as f:
+                        reply['files'][name] = base64.b64encode(f.read()).decode()
+            send_message(sock, reply)
+
+
+def run_worker(address: str, jobs: int = 1, verbose: bool = False,
+               connect_timeout: float = 60.0, token: str = None):
+    """
+    Runs a worker that executes cases sent by a coordinator.
+
+    Parameters
+    ----------
+    address : str
+        'host:port' of the coordinator.
+    jobs : int, default: 1
+        Number of cases to run concurrently, each over its own connection.
+    verbose : bool, default: False
+        Flag to include the case logs in the status messages.
+    connect_timeout : float, default: 60.0
+        Seconds to keep retrying to connect to the coordinator.
+    token : str, optional
+        Shared secret expected by the coordinator.
+    """
+    address = parse_address(address)
+    threads = [threading.Thread(target=_run_connection,
+                                args=(address, verbose, connect_timeout, token))
+               for _ in range(max(1, jobs))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
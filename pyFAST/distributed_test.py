@@ -0,0 +1,219 @@
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+from .executor import Executor
+from .distributed import (
+    Coordinator,
+    parse_address,
+    recv_message,
+    run_worker,
+    send_message,
+)
+
+
+class TestDistributed(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        exe = os.path.join(root, "fakefast")
+        with open(exe, "w") as f:
+            f.write('#!/bin/sh\ntouch "$(basename "$1" .fst).lin"\n')
+        os.chmod(exe, 0o755)
+
+        self.cases = []
+        for name in ("case_a", "case_b", "case_c"):
+            input_path = os.path.join(root, "r-test", name)
+            run_path = os.path.join(root, "build", name)
+            os.makedirs(input_path)
+            for ext in (".fst", ".lin"):
+                with open(os.path.join(input_path, name + ext), "w") as f:
+                    f.write("\n")
+            self.cases.append({
+                "name": name, "driver": "openfast", "executable_path": exe,
+                "input_path": input_path, "run_path": run_path,
+                "input_file": name + ".fst",
+                "input_file_path": os.path.join(run_path, name + ".fst"),
+                "log_path": os.path.join(run_path, name + ".log"),
+                "baseline_file_ext": ".lin",
+            })
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parse_address(self):
+        self.assertEqual(parse_address("node1:5000"), ("node1", 5000))
+        self.assertEqual(parse_address(":5000"), ("127.0.0.1", 5000))
+        self.assertEqual(parse_address("0.0.0.0:5000"), ("0.0.0.0", 5000))
+
+    def _fake_worker(self, coordinator, reply, token=None):
+        """Worker answering every case with a reply built from the case."""
+        sock = socket.create_connection(parse_address(coordinator.address))
+        with sock:
+            send_message(sock, {"type": "hello", "token": token})
+            while True:
+                try:
+                    message = recv_message(sock)
+                except ConnectionError:
+                    return
+                if message["type"] != "case":
+                    return
+                send_message(sock, reply(message["case"]))
+
+    def test_only_expected_files_written(self):
+        coordinator = Coordinator("127.0.0.1:0", fetch_outputs=True)
+        executor = Executor(self.cases[:1], jobs=1, coordinator=coordinator)
+        outside = os.path.join(self.tmp.name, "outside")
+
+        def reply(case):
+            result = dict(case, run_path=self.tmp.name, status="NOT_IMPL",
+                          run_ok=True, check_ok=False)
+            return {"type": "result", "case": result, "status": "",
+                    "files": {"case_a.lin": "b3V0cHV0",
+                              "../../outside": "eA==", "evil.sh": "eA=="}}
+
+        run = threading.Thread(target=executor.run)
+        run.start()
+        worker = threading.Thread(target=self._fake_worker, args=(coordinator, reply))
+        worker.start()
+        for thread in (run, worker):
+            thread.join(timeout=20)
+            self.assertFalse(thread.is_alive())
+
+        case = executor.cases[0]
+        self.assertEqual(case["run_path"], self.cases[0]["run_path"])
+        with open(os.path.join(case["run_path"], "case_a.lin")) as f:
+            self.assertEqual(f.read(), "output")
+        self.assertFalse(os.path.exists(outside))
+        self.assertFalse(os.path.exists(os.path.join(case["run_path"], "evil.sh")))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "case_a.lin")))
+
+    def test_silent_worker_lost(self):
+        # Case running longer than the heartbeat timeout
+        slow = os.path.join(self.tmp.name, "slowfast")
+        with open(slow, "w") as f:
+            f.write('#!/bin/sh\nsleep 1.5\ntouch "$(basename "$1" .fst).lin"\n')
+        os.chmod(slow, 0o755)
+        self.cases[0]["executable_path"] = slow
+
+        coordinator = Coordinator("127.0.0.1:0", heartbeat_timeout=0.5)
+        executor = Executor(self.cases[:1], jobs=1, coordinator=coordinator)
+
+        # Worker that keeps its connection open but stops replying, as if
+        # its host lost power
+        received, release = threading.Event(), threading.Event()
+
+        def silent_worker():
+            sock = socket.create_connection(parse_address(coordinator.address))
+            with sock:
+                send_message(sock, {"type": "hello"})
+                recv_message(sock)
+                received.set()
+                release.wait(timeout=20)
+
+        run = threading.Thread(target=executor.run)
+        run.start()
+        silent = threading.Thread(target=silent_worker)
+        silent.start()
+        self.assertTrue(received.wait(timeout=10))
+
+        # Heartbeats keep a worker running a case alive past the timeout
+        worker = threading.Thread(target=run_worker, args=(coordinator.address,),
+                                  kwargs={"connect_timeout": 10})
+        worker.start()
+        run.join(timeout=20)
+        release.set()
+        for thread in (run, silent, worker):
+            thread.join(timeout=20)
+            self.assertFalse(thread.is_alive())
+        self.assertTrue(executor.cases[0]["run_ok"])
+        self.assertEqual(executor.cases[0]["attempts"], 2)
+
+    def test_token_required(self):
+        coordinator = Coordinator("127.0.0.1:0", token="secret")
+        executor = Executor(self.cases[:1], jobs=1, coordinator=coordinator)
+        run = threading.Thread(target=executor.run)
+        run.start()
+
+        # A worker without the token is disconnected without a case
+        sock = socket.create_connection(parse_address(coordinator.address))
+        with sock:
+            send_message(sock, {"type": "hello", "token": "guess"})
+            with self.assertRaises(ConnectionError):
+                recv_message(sock)
+
+        worker = threading.Thread(target=run_worker, args=(coordinator.address,),
+                                  kwargs={"connect_timeout": 10, "token": "secret"})
+        worker.start()
+        for thread in (run, worker):
+            thread.join(timeout=20)
+            self.assertFalse(thread.is_alive())
+        self.assertTrue(executor.cases[0]["run_ok"])
+
+    def test_staging_error_reported(self):
+        # Case without baselines, which fails to stage on the worker
+        os.remove(os.path.join(self.cases[0]["input_path"], "case_a.lin"))
+        server = socket.create_server(("127.0.0.1", 0))
+        port = server.getsockname()[1]
+        worker = threading.Thread(target=run_worker, args=(f"127.0.0.1:{port}",),
+                                  kwargs={"connect_timeout": 10})
+        worker.start()
+        conn, _ = server.accept()
+        with server, conn:
+            self.assertEqual(recv_message(conn)["type"], "hello")
+            send_message(conn, {"type": "case", "case": dict(self.cases[0], num=1,
+                                                             index="1/1"),
+                                "stage": True, "fetch_outputs": False,
+                                "heartbeat": 0.05})
+            message = recv_message(conn)
+            while message["type"] == "heartbeat":
+                message = recv_message(conn)
+            self.assertEqual(message["type"], "result")
+            self.assertEqual(message["case"]["status"], "ERROR")
+            self.assertIn("no baseline files", message["status"])
+            send_message(conn, {"type": "shutdown"})
+        worker.join(timeout=20)
+        self.assertFalse(worker.is_alive())
+
+    def test_workers_with_worker_loss(self):
+        coordinator = Coordinator("127.0.0.1:0")
+        executor = Executor(self.cases, jobs=1, coordinator=coordinator)
+
+        # Worker that disconnects after receiving its first case
+        received = threading.Event()
+
+        def lost_worker():
+            sock = socket.create_connection(parse_address(coordinator.address))
+            send_message(sock, {"type": "hello"})
+            recv_message(sock)
+            received.set()
+            sock.close()
+
+        run = threading.Thread(target=executor.run)
+        run.start()
+        lost = threading.Thread(target=lost_worker)
+        lost.start()
+        self.assertTrue(received.wait(timeout=10))
+
+        workers = [threading.Thread(target=run_worker,
+                                    args=(coordinator.address,),
+                                    kwargs={"connect_timeout": 10})
+                   for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        for thread in [run, lost, *workers]:
+            thread.join(timeout=20)
+            self.assertFalse(thread.is_alive())
+
+        self.assertListEqual([c["name"] for c in executor.cases],
+                             ["case_a", "case_b", "case_c"])
+        for case in executor.cases:
+            self.assertTrue(case["run_ok"])
+            self.assertEqual(case["status"], "NOT_IMPL")
+        self.assertEqual(executor.cases[0]["attempts"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
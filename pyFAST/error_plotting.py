@@ -23,141 +23,352 @@
 """
 
 import os
+import re
 import sys
+import json
+import base64
 import shutil
 import numpy as np
 from typing import List
 
+from .regression_tester import channel_tolerances
 
-def _plot_channel(time, test, baseline, xlabel, title1, title2, RTOL_MAGNITUDE, ATOL_MAGNITUDE):
-    from bokeh.plotting import figure
-    from bokeh.models.tools import HoverTool
-    from bokeh.layouts import gridplot
-    from bokeh.embed import components
-
-    # Plot the baseline and test channels
-    p1 = figure(title=title1)
-    p1.title.align = 'center'
-    p1.grid.grid_line_alpha = 0.3
-    p1.xaxis.axis_label = 'Time (s)'
-    p1.line(time, baseline, color='green',
-            line_width=3, legend_label='Baseline')
-    p1.line(time, test, color='red', line_width=1, legend_label='Local')
-    p1.add_tools(
-        HoverTool(tooltips=[('Time', '@x'), ('Value', '@y')], mode='vline'))
-
-    # Plot the error and threshold
-    p2 = figure(title=title2, x_range=p1.x_range)
-    p2.title.align = 'center'
-    p2.grid.grid_line_alpha = 0
-    p2.xaxis.axis_label = 'Time (s)'
-    p2.line(time, abs(baseline - test), color='blue', legend_label="Error")
-
-    # Calculate the threshold
-    NUMEPS = 1e-12
-    ATOL_MIN = 1e-6
-    baseline_offset = baseline - np.min(baseline)
-    b_order_of_magnitude = np.floor(np.log10(baseline_offset + NUMEPS))
-    rtol = 10**(-1 * RTOL_MAGNITUDE)
-    atol = 10**(max(b_order_of_magnitude) - ATOL_MAGNITUDE)
-    atol = max(atol, ATOL_MIN)
-    passfail_line = atol + rtol * abs(baseline)
-    p2.line(time, passfail_line, color='red', legend_label="Threshold")
-    # p2.cross(xseries, passfail_line)
-    p2.add_tools(
-        HoverTool(tooltips=[('Time', '@x'), ('Error', '@y')], mode='vline'))
-
-    grid = gridplot([[p1, p2]], width=650, height=375,
-                    sizing_mode="scale_both")
-
-    # Return script and div
-    return components(grid)
+
+# Extension of the file holding the plotted data of a case summary
+DATA_EXT = ".data.js"
+
+# Version of the case summary format, part of the report digest so that
+# reports are regenerated when the format changes
+REPORT_VERSION = 3
+
+# Case summary modes: Bokeh plots created by the page, or inline SVG
+# sparklines without any script
+REPORT_MODES = ("interactive", "static")
+
+# Size of each SVG sparkline panel in pixels
+SVG_WIDTH = 640
+SVG_HEIGHT = 140
+SVG_MARGIN = 16
+
+# Bytes at the start of a case summary searched for its digest
+_DIGEST_SEARCH_BYTES = 8192
 
 
 def plot_channel_data(channels: List[str], units: List[str],
-                      test_data, baseline_data, rtol, atol):
+                      test_data, baseline_data, rtol, atol, reference_data=None):
+    """
+    Prepares the channels of a case for plotting in its summary.
+
+    The plots aren't rendered here. `export_case_summary` writes the data of
+    all channels once to a file next to the summary, and the page creates
+    each plot when it's scrolled into view.
+
+    The threshold's absolute tolerance is scaled by `reference_data`, by
+    default `baseline_data`. Pass the whole baseline when `baseline_data`
+    is restricted to the time range of a truncated output.
+
+    Returns
+    -------
+    List[dict]
+        For each channel, its name, units, data columns and the absolute
+        and relative tolerances of its pass/fail threshold.
+    """
+    if reference_data is None:
+        reference_data = baseline_data
+    time = test_data[:, 0]
+    plots = []
+    for i, (channel, unit) in enumerate(zip(channels, units)):
+        baseline = baseline_data[:, i]
+        channel_rtol, channel_atol = channel_tolerances(
+            reference_data[np.newaxis, :, i], rtol, atol)
+        plots.append({'channel': channel, 'unit': unit, 'time': time,
+                      'test': test_data[:, i], 'baseline': baseline,
+                      'rtol': channel_rtol, 'atol': channel_atol})
+    return plots
+
+
+def _encode(values) -> str:
+    return base64.b64encode(
+        np.ascontiguousarray(values, dtype='<f8').tobytes()).decode('ascii')
+
+
+def export_case_data(path: str, plots: List[dict]):
+    """
+    Writes the plotted data of a case as a script defining
+    `PYFAST_CASE_DATA`, which loads from local files unlike a fetched
+    binary file. The time and each channel's local and baseline series are
+    base64-encoded little-endian float64 columns, decoded by the page only
+    for the channels it plots.
+    """
+    meta = {
+        'channels': [plot['channel'] for plot in plots],
+        'units': [plot['unit'] for plot in plots],
+        'rtol': [plot['rtol'] for plot in plots],
+        'atol': [plot['atol'] for plot in plots],
+    }
+    with open(path + ".tmp", "w") as f:
+        f.write("var PYFAST_CASE_DATA = " + json.dumps(meta)[:-1])
+        f.write(', "columns": [\n"' + _encode(plots[0]['time']) + '"')
+        for plot in plots:
+            f.write(',\n"' + _encode(plot['test']) + '"')
+            f.write(',\n"' + _encode(plot['baseline']) + '"')
+        f.write("]};\n")
+    os.replace(path + ".tmp", path)
+
+
+def _envelope(time, values, width: int):
+    """
+    Downsamples a series to the minimum and maximum of each of `width`
+    pixel columns, so that spikes narrower than a pixel remain visible.
+    """
+    if len(time) <= 2 * width:
+        return time, values
+    starts = np.linspace(0, len(time), width + 1).astype(int)[:-1]
+    low = np.fmin.reduceat(values, starts)
+    high = np.fmax.reduceat(values, starts)
+    return np.repeat(time[starts], 2), np.column_stack((low, high)).ravel()
+
+
+def _svg_panel(title: str, time, series: List[tuple]) -> str:
+    """
+    Renders series sharing their axes as an SVG panel of polylines.
+
+    series: (values, color, line width) of each polyline
+    """
+    lines = [_envelope(time, values, SVG_WIDTH) for values, _, _ in series]
+    finite = np.concatenate([y[np.isfinite(y)] for _, y in lines])
+    low, high = (finite.min(), finite.max()) if finite.size else (0.0, 1.0)
+    span = high - low if high > low else 1.0
+    t0, t1 = time[0], time[-1]
+    duration = t1 - t0 if t1 > t0 else 1.0
+
+    # Polylines use integer coordinates in tenths of a pixel, which are much
+    # faster to format than floats
+    scale = 10
+    width, height, margin = SVG_WIDTH * scale, SVG_HEIGHT * scale, SVG_MARGIN * scale
+    svg = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{SVG_WIDTH}" '
+           f'height="{SVG_HEIGHT}" viewBox="0 0 {width} {height}" font-size="{11 * scale}">',
+           f'<rect width="{width}" height="{height}" fill="white" stroke="#ccc" '
+           f'stroke-width="{scale}"/>',
+           f'<text x="{width // 2}" y="{12 * scale}" text-anchor="middle">{title}</text>']
+    for (x, y), (_, color, line_width) in zip(lines, series):
+        keep = np.isfinite(y)
+        points = np.empty((keep.sum(), 2), dtype=int)
+        points[:, 0] = (x[keep] - t0) * (width / duration)
+        points[:, 1] = margin + (high - y[keep]) * ((height - 2 * margin) / span)
+        svg.append(f'<polyline fill="none" stroke="{color}" '
+                   f'stroke-width="{line_width * scale}" points="'
+                   + " ".join(map(str, points.ravel().tolist())) + '"/>')
+    svg.append(f'<text x="{2 * scale}" y="{margin + 10 * scale}">{high:.4g}</text>')
+    svg.append(f'<text x="{2 * scale}" y="{height - margin - 2 * scale}">{low:.4g}</text>')
+    svg.append(f'<text x="{width - 2 * scale}" y="{height - 4 * scale}" '
+               f'text-anchor="end">t = {t0:g}-{t1:g} s</text>')
+    svg.append('</svg>')
+    return "".join(svg)
+
+
+def plot_channel_svgs(channels: List[str], units: List[str],
+                      test_data, baseline_data, rtol, atol, reference_data=None):
+    """
+    Renders the channels of a case as inline SVG sparklines with NumPy,
+    without Bokeh, for static case summaries. The threshold is scaled as
+    in `plot_channel_data`.
+
+    Returns
+    -------
+    List[dict]
+        For each channel, its name and the 'svg' of its baseline and local
+        values next to their error and pass/fail threshold.
+    """
+    if reference_data is None:
+        reference_data = baseline_data
+    time = test_data[:, 0]
     plots = []
     for i, (channel, unit) in enumerate(zip(channels, units)):
-        title1 = channel + " (" + unit + ")"
-        title2 = "abs(Local - Baseline)"
-        xlabel = 'Time (s)'
-        script, div = _plot_channel(test_data[:, 0],
-                                    test_data[:, i], baseline_data[:, i],
-                                    xlabel, title1, title2, rtol, atol)
-        plots.append({'channel': channel, 'script': script, 'div': div})
+        test, baseline = test_data[:, i], baseline_data[:, i]
+        channel_rtol, channel_atol = channel_tolerances(
+            reference_data[np.newaxis, :, i], rtol, atol)
+        values = _svg_panel(f"{channel} ({unit})", time, [
+            (baseline, "green", 3), (test, "red", 1)])
+        error = _svg_panel("abs(Local - Baseline)", time, [
+            (np.abs(baseline - test), "blue", 1),
+            (channel_atol + channel_rtol * np.abs(baseline), "red", 1)])
+        plots.append({'channel': channel, 'svg': values + error})
     return plots
 
 
+def read_report_digest(path: str):
+    """Returns the digest stored in a case summary, None if it has none."""
+    try:
+        with open(path) as html:
+            head = html.read(_DIGEST_SEARCH_BYTES)
+    except (OSError, UnicodeDecodeError):
+        return None
+    match = re.search(r'<meta name="pyfast-digest" content="(\w+)">', head)
+    return match.group(1) if match else None
+
+
 def export_case_summary(run_path: str, case: str, channel_names: List[str],
-                        channel_ok: List[bool], norms, plots: List[dict]):
+                        channel_ok: List[bool], norms, plots: List[dict],
+                        digest: str = "", report: str = "interactive"):
     """
     norms: first dimension is the channel and second dimension contains the norms
     channel_ok: 1d boolean array for whether a channel passed the comparison
+    plots: returned by `plot_channel_data`, or `plot_channel_svgs` for
+        static summaries
+    digest: digest of the report's inputs, stored in its head, see
+        `read_report_digest`. The summary and its data are written to
+        temporary files moved into place once complete, so that a summary
+        interrupted while being written isn't kept as up to date.
+    report: one of `REPORT_MODES`, static summaries are self-contained and
+        have no scripts
     """
 
-    with open(os.path.join(run_path, case+".html"), "w") as html:
-        html.write(_htmlHead(case + " Summary", plots))
+    # Write the plotted data once, the page creates plots on demand
+    data_file = case + DATA_EXT
+    static = report == "static"
+    if plots and not static:
+        export_case_data(os.path.join(run_path, data_file), plots)
+
+    html_path = os.path.join(run_path, case+".html")
+    with open(html_path + ".tmp", "w") as html:
+        if static:
+            html.write(_static_head_template.format(
+                title=case + " Summary", meta=_digest_meta(digest)))
+        else:
+            html.write(_htmlHead(case + " Summary", data_file if plots else None,
+                                 digest))
 
         html.write('<body>\n')
         html.write(
             '  <h2 class="text-center">{}</h2>\n'.format(case + " Summary"))
         html.write('  <div class="container">\n')
 
-        channel_tags = [
-            '<a href="#{0}">{0}</a>'.format(channel) for channel in channel_names]
-
         cols = [
             'Channel',
             'Relative Max Norm',
             'Relative L2 Norm',
             'Infinity Norm'
         ]
-        table = _tableHead(cols)
+        html.write(_tableHead(cols))
 
-        body = '      <tbody>' + '\n'
+        # Write the rows as they're formatted, the file buffers the writes
+        html.write('      <tbody>' + '\n')
+        for i, channel in enumerate(channel_names):
+            html.write('        <tr>' + '\n')
+            html.write('          <th scope="row">{}</th>'.format(i+1) + '\n')
+            html.write('          <td><a href="#{0}">{0}</a></td>'.format(channel) + '\n')
 
-        for i, channel_tag in enumerate(channel_tags):
-            body += '        <tr>' + '\n'
-            body += '          <th scope="row">{}</th>'.format(i+1) + '\n'
-            body += '          <td>{0:s}</td>'.format(channel_tag) + '\n'
-
-            fmt = '{0:0.4e}'
+            cell = ('          <td>{0:0.4e}</td>\n' if channel_ok[i] else
+                    '          <td class="cell-highlight">{0:0.4e}</td>\n')
             for val in norms[i]:
-                if not channel_ok[i]:
-                    body += ('          <td class="cell-highlight">' +
-                             fmt + '</td>\n').format(val)
-                else:
-                    body += ('          <td>' + fmt + '</td>\n').format(val)
-
-            body += '        </tr>' + '\n'
-        body += '      </tbody>' + '\n'
-        table += body
-        table += '    </table>' + '\n'
-        html.write(table)
+                html.write(cell.format(val))
+
+            html.write('        </tr>' + '\n')
+        html.write('      </tbody>' + '\n')
+        html.write('    </table>' + '\n')
 
         html.write('    <br>' + '\n')
-        for plot in plots:
-            html.write('    <div style="margin:10 auto"'
-                       ' id="{channel}">{div}</div>\n'.format(**plot))
+        for i, plot in enumerate(plots):
+            if static:
+                html.write('    <div class="plot" id="{channel}">{svg}</div>\n'.format(
+                    **plot))
+            else:
+                html.write('    <div class="lazy-plot" style="margin:10 auto; min-height:375px"'
+                           ' id="{channel}" data-index="{index}"></div>\n'.format(
+                               index=i, **plot))
 
         html.write('  </div>' + '\n')
 
         html.write('</body>' + '\n')
         html.write(_htmlTail())
+    os.replace(html_path + ".tmp", html_path)
+
+
+def _digest_meta(digest):
+    return f'\n  <meta name="pyfast-digest" content="{digest}">' if digest else ''
 
 
-def _htmlHead(title, plots):
+def _htmlHead(title, data_file=None, digest=""):
     from bokeh.resources import CDN
+    scripts = ''
+    if data_file:
+        scripts = _lazy_plot_template.format(
+            api_file=CDN.js_files[0].replace('/bokeh-', '/bokeh-api-'),
+            data_file=data_file)
     head = _html_head_template.format(
-        title=title, cdn_file_1=CDN.js_files[0], cdn_file_2=CDN.js_files[2],
-        scripts='\n'.join([plot['script'] for plot in plots]))
+        title=title, meta=_digest_meta(digest), cdn_file_1=CDN.js_files[0],
+        cdn_file_2=CDN.js_files[2], scripts=scripts)
     return head
 
 
+# Creates the plot of a channel from the case data when it's scrolled into
+# view, including by following its link in the table
+_lazy_plot_template = '''<script src="{api_file}"></script>
+  <script src="{data_file}" defer></script>
+  <script type="text/javascript">
+    function pyfastColumn(k) {{
+      var text = atob(PYFAST_CASE_DATA.columns[k]);
+      var bytes = new Uint8Array(text.length);
+      for (var j = 0; j < text.length; j++) {{ bytes[j] = text.charCodeAt(j); }}
+      return new Float64Array(bytes.buffer);
+    }}
+    function pyfastPlot(element) {{
+      var data = PYFAST_CASE_DATA, i = Number(element.dataset.index);
+      var time = pyfastColumn(0), test = pyfastColumn(1 + 2 * i),
+          baseline = pyfastColumn(2 + 2 * i);
+      var error = new Float64Array(time.length), threshold = new Float64Array(time.length);
+      for (var j = 0; j < time.length; j++) {{
+        error[j] = Math.abs(baseline[j] - test[j]);
+        threshold[j] = data.atol[i] + data.rtol[i] * Math.abs(baseline[j]);
+      }}
+      var source = new Bokeh.ColumnDataSource({{data: {{
+        time: time, test: test, baseline: baseline, error: error, threshold: threshold}}}});
+      var plt = Bokeh.Plotting;
+      var p1 = plt.figure({{title: data.channels[i] + " (" + data.units[i] + ")",
+                           width: 650, height: 375}});
+      p1.line({{field: "time"}}, {{field: "baseline"}}, {{source: source,
+               line_color: "green", line_width: 3, legend_label: "Baseline"}});
+      p1.line({{field: "time"}}, {{field: "test"}}, {{source: source,
+               line_color: "red", line_width: 1, legend_label: "Local"}});
+      p1.add_tools(new Bokeh.HoverTool({{tooltips: [["Time", "@time"], ["Value", "$y"]],
+                                        mode: "vline"}}));
+      var p2 = plt.figure({{title: "abs(Local - Baseline)", x_range: p1.x_range,
+                           width: 650, height: 375}});
+      p2.line({{field: "time"}}, {{field: "error"}}, {{source: source,
+               line_color: "blue", legend_label: "Error"}});
+      p2.line({{field: "time"}}, {{field: "threshold"}}, {{source: source,
+               line_color: "red", legend_label: "Threshold"}});
+      p2.add_tools(new Bokeh.HoverTool({{tooltips: [["Time", "@time"], ["Error", "@error"]],
+                                        mode: "vline"}}));
+      [p1, p2].forEach(function (p) {{
+        p.title.align = "center";
+        p.xaxis.axis_label = "Time (s)";
+      }});
+      p1.grid.grid_line_alpha = 0.3;
+      p2.grid.grid_line_alpha = 0;
+      plt.show(plt.gridplot([[p1, p2]]), element);
+    }}
+    window.addEventListener("load", function () {{
+      var observer = new IntersectionObserver(function (entries) {{
+        entries.forEach(function (entry) {{
+          if (entry.isIntersecting) {{
+            observer.unobserve(entry.target);
+            pyfastPlot(entry.target);
+          }}
+        }});
+      }}, {{rootMargin: "200px"}});
+      document.querySelectorAll(".lazy-plot").forEach(function (element) {{
+        observer.observe(element);
+      }});
+    }});
+  </script>'''
+
+
 _html_head_template = '''<!DOCTYPE html>
 <html>
 <head>
-  <title>{title}</title>
+  <title>{title}</title>{meta}
 
   <!-- CSS -->
   <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap@4.0.0/dist/css/bootstrap.min.css" integrity="sha384-Gn5384xqQ1aoWXA+058RXPxPg6fy4IWvTNh0E263XmFcJlSAwiGgFAW/dAiS6JXm" crossorigin="anonymous">
@@ -189,6 +400,42 @@ _html_head_template = '''<!DOCTYPE html>
 '''
 
 
+_static_head_template = '''<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8">
+  <title>{title}</title>{meta}
+
+  <style media="screen" type="text/css">
+    body {{
+      font-family: sans-serif;
+    }}
+    .text-center {{
+      text-align: center;
+    }}
+    .container {{
+      max-width: 1320px;
+      margin: auto;
+    }}
+    table, th, td {{
+      border: 1px solid #dee2e6;
+      border-collapse: collapse;
+      padding: 2px 6px;
+    }}
+    .plot svg {{
+      margin: 4px;
+    }}
+    .cell-warning {{
+      background-color: #efc15c;
+    }}
+    .cell-highlight {{
+      background-color: #f5ed86 ;
+    }}
+  </style>
+</head>
+'''
+
+
 def _htmlTail():
     tail = '</html>' + '\n'
     return tail
@@ -221,39 +468,31 @@ def export_results_summary(path, results):
         html.write('  <div class="container">' + '\n')
 
         # Test Case - Pass/Fail - Max Relative Norm
-        data = [('<a href="{0}/{0}.html">{0}</a>'.format(r[0]), r[1], r[2],
-                 '<a href="{0}/{0}.log">{0}.log</a>'.format(r[0])) for i, r in enumerate(results)]
-        table = _tableHead(
-            ['Test Case', 'Pass/Fail', 'Completion Code', 'Screen Output'])
-        body = '      <tbody>' + '\n'
-        for i, d in enumerate(data):
-            body += '        <tr>' + '\n'
-            body += '          <th scope="row">{}</th>'.format(i+1) + '\n'
-            body += '          <td>{0:s}</td>'.format(d[0]) + '\n'
-
-            fmt = '{0:s}'
-            if d[1] == "FAIL":
-                body += ('          <td class="cell-warning">' +
-                         fmt + '</td>').format(d[1]) + '\n'
+        html.write(_tableHead(
+            ['Test Case', 'Pass/Fail', 'Completion Code', 'Screen Output']))
+        html.write('      <tbody>' + '\n')
+        for i, r in enumerate(results):
+            html.write('        <tr>' + '\n')
+            html.write('          <th scope="row">{}</th>'.format(i+1) + '\n')
+            html.write('          <td><a href="{0}/{0}.html">{0}</a></td>'.format(r[0]) + '\n')
+
+            if r[1] == "FAIL":
+                html.write('          <td class="cell-warning">{0:s}</td>'.format(r[1]) + '\n')
             else:
-                body += ('          <td>' + fmt + '</td>').format(d[1]) + '\n'
+                html.write('          <td>{0:s}</td>'.format(r[1]) + '\n')
 
-            if d[2] != 0:
-                body += ('          <td class="cell-warning">{}</td>').format(
-                    d[2]) + '\n'
+            if r[2] != 0:
+                html.write('          <td class="cell-warning">{}</td>'.format(r[2]) + '\n')
             else:
-                body += ('          <td>{}</td>').format(d[2]) + '\n'
+                html.write('          <td>{}</td>'.format(r[2]) + '\n')
 
-            body += '          <td>{0:s}</td>'.format(d[3]) + '\n'
+            html.write('          <td><a href="{0}/{0}.log">{0}.log</a></td>'.format(r[0]) + '\n')
 
-            body += '        </tr>' + '\n'
-        body += '      </tbody>' + '\n'
-        table += body
-        table += '    </table>' + '\n'
-        html.write(table)
+            html.write('        </tr>' + '\n')
+        html.write('      </tbody>' + '\n')
+        html.write('    </table>' + '\n')
 
         html.write('    <br>' + '\n')
         html.write('  </div>' + '\n')
         html.write('</body>' + '\n')
         html.write(_htmlTail())
-    html.close()
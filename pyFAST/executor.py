@@ -1,23 +1,45 @@
 
 import os
+import queue
 import shutil
 from typing import List, Tuple
-from multiprocessing import cpu_count
 from multiprocessing.pool import Pool
 from time import perf_counter
 import subprocess
-import glob
-
-import numpy as np
 
 from .utilities import (
     validate_file,
     validate_directory,
-    validate_executable
+    validate_executable,
+    wait_with_rusage,
+    file_digest,
+    directory_signature,
+    set_affinity,
+    pin_to_cores,
+)
+from .resources import (
+    usable_cores,
+    available_memory,
+    parse_size,
+    thread_environment,
 )
-from .fast_io import load_output
-from .regression_tester import passing_channels, calculateNorms
-from .error_plotting import export_case_summary, plot_channel_data
+from .scheduling import case_cost
+from . import warm_worker
+from .output_watcher import DivergenceMonitor
+from .block_index import INDEX_EXT
+from .compression import compress_outputs
+from .retention import retention_policy, prune_case, prune_turbine_directories
+from .scratch import (
+    scratch_capacity,
+    directory_size,
+    create_scratch_root,
+    layout_base,
+    stage_inputs,
+    remove_outputs,
+    stage_case,
+    persist_case,
+)
+from .compare import compare_case, check_status, find_baseline_files
 
 
 class Executor:
@@ -38,6 +60,17 @@ class Executor:
             show_only: bool = False,
             verbose: bool = False,
             jobs: bool = -1,
+            pin: bool = True,
+            memory: int = None,
+            coordinator=None,
+            journal=None,
+            warm: bool = False,
+            kill_diverged: int = 0,
+            block_index: bool = False,
+            force_report: bool = False,
+            compress: str = None,
+            scratch: str = None,
+            stream=None,
     ):
         """
         Initialize the required inputs
@@ -60,14 +93,68 @@ class Executor:
             Flag to include system ouptut.
         jobs : int, default: -1
             Maximum number of parallel jobs to run:
-             - -1: Number of nodes available minus 1
-             - >0: Minimum of the number passed and the number of nodes available
+             - -1: Number of usable cores minus 1
+             - >0: Minimum of the number passed and the number of usable cores
+        pin : bool, default: True
+            Flag to pin each running case to its own disjoint set of cores.
+        memory : int, optional
+            Memory in bytes that running cases may use together, by default
+            the memory available to this process when the run starts.
+        coordinator : distributed.Coordinator, optional
+            Coordinator listening for 'pyFAST worker' processes, to run the
+            cases on them instead of locally.
+        journal : journal.RunJournal, optional
+            Journal recording each finished case. Cases it already holds
+            for the same executable and inputs are skipped and their
+            recorded results reused.
+        warm : bool, default: False
+            Flag to run script cases on long-lived Python workers that keep
+            the script's modules and libraries loaded between cases.
+        kill_diverged : int, default: 0
+            Number of failed channels at which a case writing ASCII outputs
+            is terminated while running. 0 disables the live comparison.
+        block_index : bool, default: False
+            Flag to compare block hash indices of binary outputs and their
+            baselines, writing missing baseline indices. Identical outputs
+            aren't decoded unless plotted, and the first differing time
+            window and channels of other outputs are reported.
+        force_report : bool, default: False
+            Flag to rewrite case summaries whose outputs, baselines and
+            settings haven't changed since they were written.
+        compress : str, optional
+            Codec of `compression.CODECS` compressing the outputs of cases
+            that pass the comparison.
+        scratch : str, optional
+            Fast local directory, e.g. /dev/shm, to stage and run each case
+            in. Only what is kept of a case is copied to its run directory:
+            everything if it fails, otherwise what its retention setting
+            keeps, by default the log and case summary. See `scratch`.
+        stream : result_stream.ResultStream, optional
+            Stream receiving the results of each case when it finishes,
+            including the cases resumed from the journal.
         """
 
         self.cases = cases
         self.verbose = verbose
         self.show_only = show_only
         self.jobs = jobs if jobs != 0 else -1
+        self.pin = pin
+
+        # Get cores usable given the process affinity and cgroup quotas
+        self.cores = usable_cores()
+        self.memory = memory
+        self.coordinator = coordinator
+        self.journal = journal
+        self.resumed = []
+        self.warm = warm
+        self.kill_diverged = kill_diverged
+        self.block_index = block_index
+        self.force_report = force_report
+        self.compress = compress
+        self.scratch = scratch
+        self._scratch_root = None
+        self._scratch_base = None
+        self.stream = stream
 
         # Set case index
         for i, case in enumerate(self.cases, 1):
@@ -78,26 +165,52 @@ class Executor:
 
         # Set the appropriate number of parallel jobs to run
         if self.jobs == -1:
-            self.jobs = max(1, cpu_count() - 1)
+            self.jobs = max(1, len(self.cores) - 1)
         if self.jobs > 0:
-            self.jobs = min(self.jobs, cpu_count())
+            self.jobs = min(self.jobs, len(self.cores))
         if self.jobs > len(self.cases):
             self.jobs = len(self.cases)
 
+    def __getstate__(self) -> dict:
+        """
+        Returns the state sent to worker processes with each case, without
+        the open journal, results stream and coordinator, which only the
+        main process writes to.
+        """
+        state = self.__dict__.copy()
+        state.update(journal=None, stream=None, coordinator=None)
+        return state
+
     def _validate_inputs(self):
 
+        # Create dict to cache executable hashes shared by many cases
+        digests = {}
+
         # Loop through cases
         for case in self.cases:
 
             # Validate path to case executable or script
             if 'executable_path' in case:
                 validate_executable(case['executable_path'])
+                exe_path = case['executable_path']
             elif 'script_path' in case:
                 validate_file(case['script_path'])
+                exe_path = case['script_path']
+            else:
+                exe_path = None
+
+            # Hash executable so results can be attributed to a build
+            if exe_path is not None:
+                if exe_path not in digests:
+                    digests[exe_path] = file_digest(exe_path)
+                case['exe_hash'] = digests[exe_path]
 
             # Validate path to case input directory
             validate_directory(case['input_path'])
 
+            # Validate what is kept of the run directory if the case passes
+            retention_policy(case)
+
         #  Is the jobs flag within the supported range?
         if self.jobs < -1:
             raise ValueError("Invalid value given for 'jobs'")
@@ -113,25 +226,23 @@ class Executor:
         # Loop through cases
         for case in self.cases:
 
-            # Copy files from driver's input directory to output directory.
-            # Overwrite existing files
-            shutil.copytree(case['input_path'], case['run_path'],
-                            dirs_exist_ok=True)
-
             # Get list of baseline files
-            case['baseline_files'] = \
-                [os.path.basename(f) for f in
-                 glob.glob(os.path.join(case['input_path'],
-                                        '*' + case['baseline_file_ext']))]
+            case['baseline_files'] = find_baseline_files(case)
 
             # If no baseline files found, raise exception
             if len(case['baseline_files']) == 0:
                 raise Exception(
                     f"no baseline files found for case '{case['name']}'")
 
-            # Remove baseline files from run path
-            for baseline_file in case['baseline_files']:
-                os.remove(os.path.join(case['run_path'], baseline_file))
+            # Copy files from driver's input directory to output directory,
+            # overwriting existing files, and remove baseline files and
+            # outputs of previous runs. Cases run in the scratch directory
+            # are staged there when they start.
+            if self._scratch_root is None:
+                stage_inputs(case, case['run_path'])
+            else:
+                os.makedirs(case['run_path'], exist_ok=True)
+                remove_outputs(case, case['run_path'])
 
             # If case has a turbine directory and it hasn't been copied
             # by a previous case, copy directory and overwrite existing files
@@ -180,26 +291,87 @@ class Executor:
         env = os.environ.copy()
         if 'lib_path' in case:
             env["PATH"] = case['lib_path'] + os.pathsep + env["PATH"]
+        if 'num_threads' in case:
+            env.update(thread_environment(case['num_threads']))
 
-        # Run command
+        # Run script on a warm worker if possible, otherwise run command
         start_time = perf_counter()
-        with open(case['log_path'], 'w') as w:
-            case['ret_code'] = subprocess.call(command, stdout=w, stderr=w,
-                                               cwd=case['run_path'], env=env)
+        result = None
+        if self.warm and 'script_path' in case:
+            result = self._execute_warm(case, env)
+        if result is not None:
+            case['ret_code'], usage = result
+        else:
+            monitor = None
+            if self.kill_diverged > 0:
+                monitor = DivergenceMonitor(case, self.kill_diverged)
+
+            # Only time this run, not a failed attempt on a warm worker
+            start_time = perf_counter()
+            with open(case['log_path'], 'w') as w:
+                process = subprocess.Popen(command, stdout=w, stderr=w,
+                                           cwd=case['run_path'], env=env,
+                                           preexec_fn=pin_to_cores(case.get('cpus')))
+                if monitor is not None:
+                    monitor.start(process)
+                case['ret_code'], usage = wait_with_rusage(process)
+                if monitor is not None:
+                    monitor.stop()
         end_time = perf_counter()
 
-        # Calculate elapsed time
+        # Calculate elapsed time and store resource usage of the process
         case['run_time'] = end_time - start_time
+        case.update(usage or {})
 
         # Set flag for run completed successfully
         case['run_ok'] = case['ret_code'] == 0
 
         # Set case status based on return code
         case['status'] = 'COMPLETE' if case['run_ok'] else 'FAILED'
+        if case.get('diverged'):
+            case['status'] = 'DIVERGED'
+
+    def _execute_warm(self, case: dict, env: dict):
+        """
+        Runs a script case on a warm worker.
+
+        A case that fails on a worker which already ran other cases may be
+        failing because the script's library can't be reused within one
+        process. The script's cases are then run in their own process from
+        now on, starting with this one.
+
+        Returns
+        -------
+        Tuple[int, dict] or None
+            Return code and resource usage of the case, or None if it has to
+            be run in its own process.
+        """
+        script_path = case['script_path']
+        if warm_worker.is_disabled(script_path):
+            return None
+
+        worker = warm_worker.get_worker(script_path, env)
+        reused = worker.cases_run > 0
+        set_affinity(worker.pid, case.get('cpus') or self.cores)
+        try:
+            usage = worker.run(case['input_file'], case['run_path'],
+                               case['log_path'])
+        except warm_worker.WorkerLost as error:
+            if not reused:
+                return error.ret_code, None
+            usage = {'ret_code': error.ret_code}
+
+        if usage['ret_code'] != 0 and reused:
+            print(f"{case['index']:>8}   Warm: {script_path} can't be reused, "
+                  "running its cases in their own process", flush=True)
+            warm_worker.disable(script_path)
+            return None
+        return usage.pop('ret_code'), usage
 
     def _run_case(self, case: dict):
         """
-        Runs a single OpenFAST test case
+        Runs a single OpenFAST test case, in the scratch directory if space
+        was reserved for it there.
 
         Parameters
         ----------
@@ -207,6 +379,23 @@ class Executor:
             Case name.
         """
 
+        if not case.get('in_scratch'):
+            if self._scratch_root is not None:
+                stage_inputs(case, case['run_path'])
+            return self._run_and_check_case(case)
+
+        # Passing cases run in the scratch directory keep only their log
+        # and summary unless configured otherwise
+        case.setdefault('retention', 'summary')
+        paths = stage_case(case, self._scratch_root, self._scratch_base)
+        try:
+            return self._run_and_check_case(case)
+        finally:
+            persist_case(case, paths)
+
+    def _run_and_check_case(self, case: dict):
+        """Runs a staged case and compares its outputs with the baselines."""
+
         case['status'] = 'None'
         case['run_ok'] = False
         case['check_ok'] = False
@@ -220,38 +409,219 @@ class Executor:
                 status += f"\n{case['index']:>8}    Log: {line}"
         status = (f"{case['index']:>8}    Run: {case['name'].ljust(42, '.')} {case['status']:<8} with code "
                   f"{case['ret_code']} {case['run_time']:>8.3f} seconds")
+        if case.get('diverged'):
+            status += (f"\n{case['index']:>8}  Check: terminated after "
+                       f"{self.kill_diverged} channels diverged from the baseline "
+                       f"at t = {case['diverged_time']}")
         if not case['run_ok']:
             return case, status
 
         # Compare test case output to baseline
         self._compare_results_to_baseline(case)
 
+        # Outputs of passing cases are only kept for reference
+        if self.compress and case['check_ok']:
+            compress_outputs(case, self.compress)
+
         # Add to status
-        for baseline_file, file_ok in zip(case['baseline_files'], case['check_files_ok']):
-            file_status = "PASSED" if file_ok else 'FAILED'
-            status += f"\n{case['index']:>8}  Check: {baseline_file.ljust(42)} {file_status:<8}"
-        status += f"\n{case['index']:>8}    End: {case['name'].ljust(42, '.')} {case['status']:<8}"
+        status += check_status(case)
+
+        # Prune the run directory of a passing case while others still run
+        freed = prune_case(case)
+        if freed:
+            status += (f"\n{case['index']:>8}  Prune: {retention_policy(case)}, "
+                       f"{freed / 2**20:.1f} MB freed")
 
         # Return message to display
         return case, status
 
+    def _case_threads(self, case: dict) -> int:
+        """Returns the number of cores to reserve for a case."""
+        return max(1, min(int(case.get('threads', 1)), len(self.cores)))
+
+    def _case_memory(self, case: dict) -> int:
+        """
+        Returns the expected peak memory of a case in bytes, from the
+        'memory' field of its configuration, its peak memory in previous
+        runs, or an equal share of the memory budget per job.
+        """
+        if 'memory' in case:
+            return parse_size(case['memory'])
+        if case.get('expected_memory'):
+            return int(case['expected_memory'])
+        return self._memory_budget // self.jobs if self._memory_budget else 0
+
+    def _reserve(self, case: dict, free: List[int], running: int = 0) -> bool:
+        """
+        Reserves cores, memory and scratch space for a case if enough are
+        free. A case that doesn't fit in the free scratch space when no
+        other case is running is run in its run directory instead.
+
+        Parameters
+        ----------
+        case : dict
+            Case to be started.
+        free : List[int]
+            Cores not used by running cases, modified in place.
+        running : int, default: 0
+            Number of running cases. A case that doesn't fit in the memory
+            budget is still started when no other case is running.
+
+        Returns
+        -------
+        bool
+            True if the resources were reserved and the case may start.
+        """
+        num_threads = self._case_threads(case)
+        if num_threads > len(free):
+            return False
+        memory = self._case_memory(case)
+        if self._memory_budget is not None and \
+                memory > self._memory_free and running > 0:
+            return False
+        scratch = 0
+        if self._scratch_root is not None:
+            if 'scratch_size' not in case:
+                case['scratch_size'] = directory_size(case['input_path'])
+            scratch = case['scratch_size']
+            fits = scratch <= self._scratch_free
+            if not fits and running > 0:
+                return False
+            case['in_scratch'] = fits
+            scratch = scratch if fits else 0
+        case['num_threads'] = num_threads
+        case['reserved_cores'] = free[:num_threads]
+        case['reserved_memory'] = memory
+        case['reserved_scratch'] = scratch
+        case['cpus'] = case['reserved_cores'] if self.pin else []
+        del free[:num_threads]
+        if self._memory_budget is not None:
+            self._memory_free -= memory
+        if self._scratch_root is not None:
+            self._scratch_free -= scratch
+        return True
+
+    def _release(self, case: dict, free: List[int]):
+        """Returns the cores, memory and scratch space reserved by a finished case."""
+        free.extend(case['reserved_cores'])
+        if self._memory_budget is not None:
+            self._memory_free += case['reserved_memory']
+        if self._scratch_root is not None:
+            self._scratch_free += case['reserved_scratch']
+
     def _run_cases(self) -> List[dict]:
         """
         Runs all of the OpenFAST cases in parallel, if defined.
+
+        Cases are started, most expensive first, as soon as a worker and the
+        cores and memory they need are available. When the next case doesn't
+        fit, later cases that do are started first so that multi-threaded or
+        memory-heavy cases interleave with light ones instead of leaving
+        resources idle.
         """
+        # Run cases on remote workers
+        if self.coordinator is not None:
+            self._run_cases_distributed()
+            return
+
+        self._memory_budget = self.memory if self.memory is not None \
+            else available_memory()
+        self._memory_free = self._memory_budget
+
         cases = []
         if self.jobs == 1:
-            for case, status in map(self._run_case, self.cases):
-                print(status, flush=True)
+            free = list(self.cores)
+            for case in self.cases:
+                self._reserve(case, free)
+                case, status = self._run_case(case)
+                self._release(case, free)
+                self._finish_case(case, status)
                 cases.append(case)
         else:
+            free = list(self.cores)
+            pending = sorted(self.cases, key=case_cost, reverse=True)
+            finished = queue.Queue()
+            running = 0
             with Pool(self.jobs) as pool:
-                for case, status in pool.imap_unordered(self._run_case, self.cases):
-                    print(status, flush=True)
+                while pending or running:
+
+                    # Start pending cases while workers and cores are free
+                    i = 0
+                    while i < len(pending) and running < self.jobs:
+                        if not self._reserve(pending[i], free, running):
+                            i += 1
+                            continue
+                        pool.apply_async(self._run_case, (pending.pop(i),),
+                                         callback=finished.put,
+                                         error_callback=finished.put)
+                        running += 1
+
+                    # Wait for a case to finish
+                    result = finished.get()
+                    running -= 1
+                    if isinstance(result, BaseException):
+                        raise result
+                    case, status = result
+                    self._release(case, free)
+                    self._finish_case(case, status)
                     cases.append(case)
 
         self.cases = sorted(cases, key=lambda c: c['num'])
 
+    def _run_cases_distributed(self):
+        """
+        Runs the cases on workers connected to a coordinator.
+        """
+        cases = []
+        for case, status in self.coordinator.run(self.cases):
+            self._finish_case(case, status)
+            cases.append(case)
+
+        self.cases = sorted(cases, key=lambda c: c['num'])
+
+    def _finish_case(self, case: dict, status: str):
+        """
+        Reports a finished case and records it in the journal and the
+        results stream.
+        """
+        print(status, flush=True)
+        if self.journal is not None:
+            self.journal.append(case)
+        if self.stream is not None:
+            self.stream.append(case)
+
+    def _skip_journaled_cases(self):
+        """
+        Removes the cases already finished according to the journal from
+        the cases to run, restoring their recorded results.
+        """
+
+        # Fingerprint inputs by file sizes and modification times, which
+        # only needs a stat per file, caching turbine directories shared by
+        # many cases
+        digests = {}
+        for case in self.cases:
+            paths = [case['input_path'], case.get('turbine_input_path')]
+            for path in filter(None, paths):
+                if path not in digests:
+                    digests[path] = directory_signature(path, ignore=(INDEX_EXT,))
+            case['inputs_hash'] = "-".join(digests[p] for p in filter(None, paths))
+
+        remaining = []
+        for case in self.cases:
+            record = self.journal.completed(case)
+            if record is None:
+                remaining.append(case)
+                continue
+            case.update(record)
+            case['resumed'] = True
+            self.resumed.append(case)
+            print(f"{case['index']:>8}    Run: {case['name'].ljust(42, '.')} "
+                  f"{case['status']:<8} (resumed)", flush=True)
+            if self.stream is not None:
+                self.stream.append(case)
+        self.cases = remaining
+
     def run(self):
         """
         Function to build the references to ouput directories. If executing
@@ -263,66 +633,26 @@ class Executor:
                 print(f"  Test {case['num']:>3}: {case['name']}")
             print(f"\nTotal Tests: {len(self.cases)}")
         else:
-            self._build_local_case_directories()
-            self._run_cases()
+            if self.journal is not None:
+                self._skip_journaled_cases()
+            if self.cases and self.scratch and self.coordinator is None:
+                self._scratch_root = create_scratch_root(self.scratch)
+                self._scratch_base = layout_base(self.cases)
+                self._scratch_free = scratch_capacity(self._scratch_root)
+            try:
+                if self.cases:
+                    self._build_local_case_directories()
+                    self._run_cases()
+            finally:
+                if self._scratch_root is not None:
+                    shutil.rmtree(self._scratch_root, ignore_errors=True)
+                    self._scratch_root = None
+            self.cases = sorted(self.cases + self.resumed,
+                                key=lambda c: c['num'])
+            prune_turbine_directories(self.cases)
 
     def _compare_results_to_baseline(self, case: dict):
-
-        case['check_ok'] = True
-
-        case['check_files_ok'] = []
-
-        # Loop through baseline files
-        for baseline_file in case['baseline_files']:
-
-            # Create path to baseline and output files
-            baseline_file_path = os.path.join(
-                case['input_path'], baseline_file)
-            out_file_path = os.path.join(case['run_path'], baseline_file)
-
-            # Validate files
-            try:
-                validate_file(out_file_path)
-                validate_file(baseline_file_path)
-            except FileNotFoundError as error:
-                return f"\x1b[1;31m{case['name']}\x1b[0m: {error}\n"
-
-            # Check output files
-            if case['baseline_file_ext'] in ['.outb', '.out']:
-
-                # Load output and baseline files
-                out_data, out_info, _ = load_output(out_file_path)
-                baseline_data, _, _ = load_output(baseline_file_path)
-
-                # Get channel names
-                channel_names = out_info["attribute_names"]
-                channel_units = out_info["attribute_units"]
-
-                # Determine which channels are passing relative to baseline
-                channels_ok = passing_channels(out_data.T, baseline_data.T,
-                                               case['relative_tolerance'],
-                                               case['absolute_tolerance'])
-
-                # Calculate norms
-                norms = calculateNorms(out_data, baseline_data)
-
-                # Plot channel data
-                plots = []
-                if case['plot']:
-                    plots = plot_channel_data(channel_names, channel_units, out_data,
-                                              baseline_data, case['relative_tolerance'],
-                                              case['absolute_tolerance'])
-
-                # Export all case summaries
-                export_case_summary(case['run_path'], case['name'],
-                                    channel_names, channels_ok, norms, plots)
-
-                case['check_ok'] &= np.all(channels_ok)
-                case['check_files_ok'].append(np.all(channels_ok))
-                case['status'] = 'PASSED' if case['check_ok'] else 'FAILED'
-
-            # Check linearization files
-            elif case['baseline_file_ext'] == '.lin':
-                case['check_ok'] &= False
-                case['check_files_ok'].append(False)
-                case['status'] = 'NOT_IMPL'
+        # Compare files in as many threads as cores were reserved for the case
+        compare_case(case, block_index=self.block_index,
+                     jobs=case.get('num_threads', 1),
+                     force_report=self.force_report)
@@ -0,0 +1,94 @@
+import os
+import json
+import tempfile
+import unittest
+
+from .executor import Executor
+from .journal import RunJournal
+from .result_stream import ResultStream
+
+
+class TestExecutor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+
+        # Executable logging when each case starts and ends
+        self.log_path = os.path.join(root, "times")
+        exe = os.path.join(root, "fakefast")
+        with open(exe, "w") as f:
+            f.write('#!/bin/sh\nname=$(basename "$1" .fst)\n'
+                    f'echo "$name start $(date +%s.%N)" >> {self.log_path}\n'
+                    'sleep 0.3\n'
+                    f'echo "$name end $(date +%s.%N)" >> {self.log_path}\n')
+        os.chmod(exe, 0o755)
+
+        self.cases = []
+        for name, threads, run_time in (("light1", 1, 30), ("heavy", 2, 20),
+                                        ("light2", 1, 10), ("light3", 1, 5)):
+            input_path = os.path.join(root, "r-test", name)
+            run_path = os.path.join(root, "build", name)
+            os.makedirs(input_path)
+            for file_name in (name + ".fst", name + ".out"):
+                with open(os.path.join(input_path, file_name), "w") as f:
+                    f.write("\n")
+            self.cases.append({
+                "name": name, "driver": "openfast", "executable_path": exe,
+                "input_path": input_path, "run_path": run_path,
+                "input_file": name + ".fst",
+                "input_file_path": os.path.join(run_path, name + ".fst"),
+                "log_path": os.path.join(run_path, name + ".log"),
+                "baseline_file_ext": ".out",
+                "relative_tolerance": 2, "absolute_tolerance": 1.9,
+                "plot": False, "threads": threads, "expected_run_time": run_time,
+            })
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_threaded_case_waits_for_cores(self):
+        executor = Executor(self.cases, jobs=2, pin=False)
+        executor.cores = [0, 1]
+        executor.jobs = 2
+        executor.run()
+
+        intervals = {}
+        with open(self.log_path) as f:
+            for line in f:
+                name, event, seconds = line.split()
+                intervals.setdefault(name, {})[event] = float(seconds)
+        self.assertListEqual(sorted(intervals), ["heavy", "light1", "light2", "light3"])
+
+        # The two-threaded case ran alone, the light cases ran in pairs
+        heavy = intervals.pop("heavy")
+        for name, interval in intervals.items():
+            self.assertTrue(interval['end'] <= heavy['start'] or
+                            interval['start'] >= heavy['end'], name)
+        self.assertLess(intervals['light2']['start'], intervals['light1']['end'])
+        self.assertListEqual(sorted(c['name'] for c in executor.cases),
+                             ["heavy", "light1", "light2", "light3"])
+
+    def test_parallel_run_with_journal_and_stream(self):
+        journal_path = os.path.join(self.tmp.name, "build", "journal.jsonl")
+        stream_path = os.path.join(self.tmp.name, "build", "results.jsonl")
+        journal = RunJournal(journal_path)
+        stream = ResultStream(stream_path)
+        executor = Executor(self.cases[:3], jobs=2, pin=False, journal=journal,
+                            stream=stream)
+        executor.jobs = 2
+        try:
+            executor.run()
+        finally:
+            journal.close()
+            stream.close()
+
+        # The main process recorded every case
+        for path in (journal_path, stream_path):
+            with open(path) as f:
+                self.assertListEqual(sorted(json.loads(line)['name'] for line in f),
+                                     ["heavy", "light1", "light2"])
+        self.assertIs(executor.journal, journal)
+
+
+if __name__ == '__main__':
+    unittest.main()
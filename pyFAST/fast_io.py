@@ -23,15 +23,18 @@ import os
 import numpy as np
 import struct
 
+from .compression import find_output, open_output, read_array, strip_codec
+
 
 def load_output(filename):
     """
-    Load a FAST binary or ascii output file
+    Load a FAST binary or ascii output file, which may be compressed, see
+    `compression`
 
     Parameters
     ----------
     filename : str
-        filename
+        filename, with or without the compression extension
 
     Returns
     -------
@@ -45,8 +48,9 @@ def load_output(filename):
             - attribute_units: list of attribute units
     """
 
+    filename = find_output(filename)
     assert os.path.isfile(filename), "File, %s, does not exists" % filename
-    with open(filename, 'r') as f:
+    with open_output(filename, 'rt') as f:
         if "outb" in filename:
             return load_binary_output(filename)
         elif "out" in filename:
@@ -58,16 +62,16 @@ def load_output(filename):
 
 
 def load_ascii_output(filename):
-    with open(filename) as f:
+    with open_output(filename, 'rt') as f:
         info = {}
-        info['name'] = os.path.splitext(os.path.basename(filename))[0]
+        info['name'] = os.path.splitext(os.path.basename(strip_codec(filename)))[0]
         header = [f.readline() for _ in range(8)]
         info['description'] = header[4].strip()
         info['attribute_names'] = header[6].split()
         info['attribute_units'] = [unit[1:-1]
                                    for unit in header[7].split()]  # removing "()"
         data = np.array([line.split()
-                        for line in f.readlines()], dtype=np.float)
+                        for line in f.readlines()], dtype=float)
         return data, info
 
 
@@ -90,7 +94,7 @@ def load_binary_output(filename):
     FileFmtID_NoCompressWithoutTime = 3
     FileFmtID_ChanLen_In = 4
 
-    with open(filename, 'rb') as fid:
+    with open_output(filename, 'rb') as fid:
         # FAST output file format, INT(2)
         FileID = fread(fid, 1, 'int16')[0]
 
@@ -141,42 +145,42 @@ def load_binary_output(filename):
             ChanUnitASCII = fread(fid, LenName, 'uint8')
             ChanUnit.append("".join(map(chr, ChanUnitASCII)).strip()[1:-1])
 
-        # get the channel time series
+        # get the channel time series, decompressed or read straight into
+        # the arrays
         nPts = NT * NumOutChans                   # number of data points in the file
         if FileID == FileFmtID_WithTime:
-            PackedTime = fread(fid, NT, 'int32')  # read the time data
-            cnt = len(PackedTime)
-            if cnt < NT:
-                raise Exception('Could not read entire %s file: read %d of %d time values' % (
-                    filename, cnt, NT))
-
-        if FileID == FileFmtID_NoCompressWithoutTime:
-            PackedData = fread(fid, nPts, 'float64')    # read the channel data
-        else:
-            PackedData = fread(fid, nPts, 'int16')    # read the channel data
-
-        cnt = len(PackedData)
-        if cnt < nPts:
+            try:
+                PackedTime = read_array(fid, NT, '<i4')  # read the time data
+            except EOFError as error:
+                raise Exception('Could not read entire %s file: %s time values' % (
+                    filename, error))
+
+        try:
+            if FileID == FileFmtID_NoCompressWithoutTime:
+                PackedData = read_array(fid, nPts, '<f8')    # read the channel data
+            else:
+                PackedData = read_array(fid, nPts, '<i2')    # read the channel data
+        except EOFError as error:
             raise Exception(
-                'Could not read entire %s file: read %d of %d values' % (filename, cnt, nPts))
+                'Could not read entire %s file: %s values' % (filename, error))
 
     if FileID == FileFmtID_NoCompressWithoutTime:
-        pack = np.array(PackedData).reshape(NT, NumOutChans)
+        pack = PackedData.reshape(NT, NumOutChans)
         data = pack
     else:
         # Scale the packed binary to real data
-        pack = np.array(PackedData).reshape(NT, NumOutChans)
+        pack = PackedData.reshape(NT, NumOutChans).astype(float)
         data = (pack - ColOff) / ColScl
 
     if FileID == FileFmtID_WithTime:
-        time = (np.array(PackedTime) - TimeOff) / TimeScl
+        time = (PackedTime - TimeOff) / TimeScl
     else:
         time = TimeOut1 + TimeIncr * np.arange(NT)
 
     data = np.concatenate([time.reshape(NT, 1), data], 1)
     pack = np.concatenate([time.reshape(NT, 1), pack], 1)
 
-    info = {'name': os.path.splitext(os.path.basename(filename))[0],
+    info = {'name': os.path.splitext(os.path.basename(strip_codec(filename)))[0],
             'description': DescStr,
             'attribute_names': ChanName,
             'attribute_units': ChanUnit}
@@ -0,0 +1,100 @@
+"""Journal of finished cases, used to resume interrupted suite runs."""
+
+import os
+import json
+from typing import Optional
+
+from .utilities import json_default
+
+
+# Case fields stored in the journal, enough to rebuild the case summary
+RESULT_KEYS = (
+    "status",
+    "run_ok",
+    "check_ok",
+    "ret_code",
+    "run_time",
+    "user_time",
+    "sys_time",
+    "max_rss",
+    "baseline_files",
+    "check_files_ok",
+    "check_times",
+    "check_results",
+)
+
+
+class RunJournal:
+    """
+    Append-only JSON lines file holding the result of every finished case,
+    keyed by the case, the hash of its executable and a signature of the
+    names, sizes and modification times of its inputs. Each line is flushed
+    to disk when the case finishes, so the journal survives an interrupted
+    run.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        """
+        Opens the journal.
+
+        Parameters
+        ----------
+        path : str
+            Path to the journal file.
+        resume : bool, default: False
+            Flag to keep the results of a previous run so its finished cases
+            can be skipped. Otherwise the journal is started afresh.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.records = {}
+        if resume and os.path.isfile(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Last line may be truncated by the interruption
+                        continue
+                    self.records[self._key(record)] = record
+        self.file = open(path, "a" if resume else "w")
+
+    def close(self):
+        self.file.close()
+
+    @staticmethod
+    def _key(case: dict) -> tuple:
+        return (case['driver'], case['name'], case.get('exe_hash'),
+                case.get('inputs_hash'))
+
+    def completed(self, case: dict) -> Optional[dict]:
+        """
+        Returns the recorded results of a case, or None if the case hasn't
+        finished with the same executable and inputs.
+        """
+        record = self.records.get(self._key(case))
+        if record is None or not _exited(record):
+            return None
+        return record
+
+    def append(self, case: dict):
+        """
+        Records the results of a finished case. Cases that didn't produce a
+        result, e.g. those lost by a remote worker, and cases killed by a
+        signal, e.g. by the OOM killer or a preemption, aren't recorded so
+        that they're run again when resuming.
+        """
+        if not _exited(case):
+            return
+        record = {key: case[key] for key in
+                  ('driver', 'name', 'exe_hash', 'inputs_hash') + RESULT_KEYS
+                  if key in case}
+        self.file.write(json.dumps(record, default=json_default) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.records[self._key(case)] = record
+
+
+def _exited(case: dict) -> bool:
+    """Checks whether a case's process exited by itself, with any code."""
+    return case.get('ret_code') is not None and case['ret_code'] >= 0
@@ -0,0 +1,106 @@
+import os
+import copy
+import tempfile
+import unittest
+
+from .executor import Executor
+from .journal import RunJournal
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.journal_path = os.path.join(root, "build", "journal.jsonl")
+
+        # Executable counting its invocations in a shared file
+        self.calls_path = os.path.join(root, "calls")
+        exe = os.path.join(root, "fakefast")
+        with open(exe, "w") as f:
+            f.write(f'#!/bin/sh\necho "$1" >> {self.calls_path}\n'
+                    'touch "$(basename "$1" .fst).lin"\n')
+        os.chmod(exe, 0o755)
+
+        self.cases = []
+        for name in ("case_a", "case_b"):
+            input_path = os.path.join(root, "r-test", name)
+            run_path = os.path.join(root, "build", name)
+            os.makedirs(input_path)
+            for ext in (".fst", ".lin"):
+                with open(os.path.join(input_path, name + ext), "w") as f:
+                    f.write("\n")
+            self.cases.append({
+                "name": name, "driver": "openfast", "executable_path": exe,
+                "input_path": input_path, "run_path": run_path,
+                "input_file": name + ".fst",
+                "input_file_path": os.path.join(run_path, name + ".fst"),
+                "log_path": os.path.join(run_path, name + ".log"),
+                "baseline_file_ext": ".lin",
+            })
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _run(self, resume):
+        journal = RunJournal(self.journal_path, resume=resume)
+        executor = Executor(copy.deepcopy(self.cases), jobs=1, journal=journal)
+        executor.run()
+        journal.close()
+        return executor.cases
+
+    def _calls(self):
+        with open(self.calls_path) as f:
+            return f.read().split()
+
+    def test_resume_skips_finished_cases(self):
+        self._run(resume=False)
+        self.assertEqual(len(self._calls()), 2)
+
+        # Modified inputs invalidate the journal entry of that case only
+        with open(os.path.join(self.cases[1]['input_path'], "case_b.fst"), "a") as f:
+            f.write("changed\n")
+        cases = self._run(resume=True)
+        self.assertListEqual(self._calls(), ["case_a.fst", "case_b.fst", "case_b.fst"])
+        self.assertListEqual([c['name'] for c in cases], ["case_a", "case_b"])
+        self.assertTrue(cases[0]['resumed'])
+        self.assertEqual(cases[0]['status'], 'NOT_IMPL')
+        self.assertNotIn('resumed', cases[1])
+
+    def test_fresh_run_discards_journal(self):
+        self._run(resume=False)
+        self._run(resume=False)
+        self.assertEqual(len(self._calls()), 4)
+
+    def test_killed_case_is_rerun(self):
+        # case_b is killed by a signal, as by the OOM killer, in the first run
+        exe = self.cases[0]['executable_path']
+        marker = os.path.join(self.tmp.name, "kill_case_b")
+        with open(exe, "a") as f:
+            f.write(f'case "$1" in case_b*) if [ -f {marker} ]; then kill -9 $$; fi;; '
+                    'esac\n')
+        open(marker, "w").close()
+        cases = self._run(resume=False)
+        self.assertEqual(cases[1]['ret_code'], -9)
+        journal = RunJournal(self.journal_path, resume=True)
+        self.assertIsNotNone(journal.completed(cases[0]))
+        self.assertIsNone(journal.completed(cases[1]))
+        journal.close()
+
+        os.remove(marker)
+        cases = self._run(resume=True)
+        self.assertListEqual(self._calls(), ["case_a.fst", "case_b.fst", "case_b.fst"])
+        self.assertTrue(cases[0]['resumed'])
+        self.assertNotIn('resumed', cases[1])
+        self.assertEqual(cases[1]['ret_code'], 0)
+
+    def test_truncated_line_is_ignored(self):
+        self._run(resume=False)
+        with open(self.journal_path, "a") as f:
+            f.write('{"driver": "openfast", "na')
+        journal = RunJournal(self.journal_path, resume=True)
+        self.assertEqual(len(journal.records), 2)
+        journal.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
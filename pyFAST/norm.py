@@ -216,11 +216,10 @@ if __name__ == "__main__":
         "baseline",
         metavar="Baseline",
         type=str,
-        nargs=1,
         help="Baseline data file for comparison.",
     )
     parser.add_argument(
-        "test", metavar="Test", type=str, nargs=1, help="Test-produced data file."
+        "test", metavar="Test", type=str, help="Test-produced data file."
     )
     parser.add_argument(
         "norms",
@@ -235,28 +234,10 @@ if __name__ == "__main__":
         "-tol",
         dest="tolerance",
         default=1e-5,
-        nargs=1,
+        type=float,
         metavar="Tolerance",
         help="Tolerance level for pass/fail condition.",
     )
-    parser.add_argument(
-        "-a",
-        "-abs",
-        dest="abs_val",
-        action="store_false",
-        metavar="Absolute-value-flag",
-        help="Indicate absolute value of differences.",
-    )
-    parser.add_argument(
-        "-x",
-        "-axis",
-        dest="axis",
-        default=0,
-        metavar="Axis",
-        type=int,
-        nargs=1,
-        help="Axis to compute the norm over.",
-    )
 
     args = parser.parse_args()
 
@@ -266,15 +247,16 @@ if __name__ == "__main__":
     baseline, *_ = load_output(args.baseline)
     test, *_ = load_output(args.test)
 
-    results = calculate_norms(baseline, test, args.norms, args.abs_val, args.axis)
+    results = calculate_norms(baseline, test, args.norms)
 
+    # Each column of the results holds one norm for all channels
     norms_pass = np.array(
-        [pass_regression_test(norm, args.tolerance) for norm in results]
+        [pass_regression_test(norm, args.tolerance) for norm in results.T]
     )
-    if norms_pass.sum() == norms_pass.shape[0]:
+    if norms_pass.all():
         print(f"All norms pass with a {args.tolerance:.5f} tolerance.")
         sys.exit(0)
     else:
-        fail_norms = args.norms[~norms_pass]
+        fail_norms = [n for n, ok in zip(args.norms, norms_pass) if not ok]
         print(f"{fail_norms} did not pass all cases within {args.tolerance}")
         sys.exit(1)
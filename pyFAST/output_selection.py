@@ -0,0 +1,205 @@
+"""
+Reading of selected channels and time windows of output files.
+
+Channels are selected by name with include and exclude regular expressions
+and paired between an output and its baseline by name, so that adding a
+channel to OpenFAST doesn't shift the comparison. Binary files are memory
+mapped and only the selected columns of the rows inside the time window
+are decoded. Compressed files can't be mapped and are decoded whole with
+`load_output` before selecting.
+"""
+
+import re
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .block_index import read_layout, FILE_ID_WITH_TIME
+from .alignment import TIME_EPS
+from .compression import codec_of, open_output, strip_codec
+from .fast_io import load_output
+
+
+# Lines before the first row of data in an ASCII output file
+ASCII_HEADER_LINES = 8
+
+
+def is_binary(path: str) -> bool:
+    """Checks whether an output file is binary, as `load_output` does."""
+    if strip_codec(path).endswith(".outb"):
+        return True
+    try:
+        with open_output(path, "rt") as f:
+            f.readline()
+    except UnicodeDecodeError:
+        return True
+    return False
+
+
+def read_channel_names(path: str) -> Tuple[List[str], List[str]]:
+    """Returns the channel names and units of an output file, time first."""
+    if codec_of(path):
+        _, info, _ = load_output(path)
+        return info['attribute_names'], info['attribute_units']
+    if is_binary(path):
+        layout = read_layout(path)
+        return layout['names'], layout['units']
+    with open(path) as f:
+        header = [f.readline() for _ in range(ASCII_HEADER_LINES)]
+    return header[6].split(), [unit[1:-1] for unit in header[7].split()]
+
+
+def select_channels(names: Sequence[str], include: str = "",
+                    exclude: str = "") -> List[str]:
+    """
+    Selects channel names with regular expressions, ignoring case. The
+    first channel, time, is always selected.
+
+    Parameters
+    ----------
+    names : Sequence[str]
+        Channel names, time first.
+    include : str, optional
+        Expression that selected names must match.
+    exclude : str, optional
+        Expression that selected names must not match.
+    """
+    selected = list(names[1:])
+    if include:
+        _re = re.compile(include, re.IGNORECASE)
+        selected = [n for n in selected if _re.search(n)]
+    if exclude:
+        _re = re.compile(exclude, re.IGNORECASE)
+        selected = [n for n in selected if not _re.search(n)]
+    return list(names[:1]) + selected
+
+
+def _window_rows(time_start: float, time_step: float, num_rows: int,
+                 window: Optional[Sequence]) -> Tuple[int, int]:
+    """Rows of a uniform time series inside a time window."""
+    if not window or time_step <= 0:
+        return 0, num_rows
+    start, end = window[0], window[1] if len(window) > 1 else None
+    first, last = 0, num_rows
+    if start is not None:
+        first = int(np.ceil((start - time_start) / time_step - TIME_EPS))
+    if end is not None:
+        last = int(np.floor((end - time_start) / time_step + TIME_EPS)) + 1
+    return max(0, first), max(0, min(num_rows, last))
+
+
+def _window_mask(time: np.ndarray, window: Optional[Sequence]) -> slice:
+    """Rows of an increasing time series inside a time window."""
+    if not window:
+        return slice(None)
+    start, end = window[0], window[1] if len(window) > 1 else None
+    first = 0 if start is None else np.searchsorted(time, start, side='left')
+    last = len(time) if end is None else np.searchsorted(time, end, side='right')
+    return slice(first, last)
+
+
+def read_selection(path: str, names: Sequence[str],
+                   window: Optional[Sequence] = None) -> np.ndarray:
+    """
+    Reads selected channels of an output file inside a time window.
+
+    Parameters
+    ----------
+    path : str
+        Path to the .outb or .out file.
+    names : Sequence[str]
+        Names of the channels to read, time first. All must exist.
+        Compressed files are read whole.
+    window : Sequence, optional
+        Start and end times of the rows to read, either may be None.
+
+    Returns
+    -------
+    np.ndarray
+        Data of shape [rows, len(names)].
+    """
+    if codec_of(path):
+        all_names, _, data = _open_selection(path)
+        return _select(path, all_names, data, names, window)
+
+    all_names, _ = read_channel_names(path)
+    columns = [all_names.index(name) for name in names]
+
+    if not is_binary(path):
+        data = np.loadtxt(path, skiprows=ASCII_HEADER_LINES, usecols=columns,
+                          ndmin=2)
+        return data[_window_mask(data[:, 0], window)]
+
+    layout = read_layout(path)
+    num_rows, num_channels = layout['num_rows'], layout['num_channels']
+    if num_rows == 0:
+        return np.empty((0, len(names)))
+
+    # Find the rows in the time window from the time data or metadata
+    if layout['file_id'] == FILE_ID_WITH_TIME:
+        packed_time = np.memmap(path, dtype=np.int32, mode='r',
+                                offset=layout['time'], shape=(num_rows,))
+        time = (packed_time - layout['time_offset']) / layout['time_scale']
+        rows = _window_mask(time, window)
+        time = time[rows]
+    else:
+        first, last = _window_rows(layout['time_start'], layout['time_step'],
+                                   num_rows, window)
+        rows = slice(first, last)
+        time = layout['time_start'] + layout['time_step'] * np.arange(first, last)
+
+    # Decode only the selected columns of the selected rows
+    channels = [c - 1 for c in columns[1:]]
+    pack = np.memmap(path, dtype=layout['dtype'], mode='r',
+                     offset=layout['data'], shape=(num_rows, num_channels))
+    data = pack[rows][:, channels].astype(float)
+    if layout['scale'] is not None:
+        data = (data - layout['offset'][channels]) / layout['scale'][channels]
+    return np.column_stack((time, data))
+
+
+def _open_selection(path: str):
+    """
+    Returns the channel names and units of an output file, and its data if
+    it's compressed and had to be decoded whole.
+    """
+    if codec_of(path):
+        data, info, _ = load_output(path)
+        return info['attribute_names'], info['attribute_units'], data
+    return read_channel_names(path) + (None,)
+
+
+def _select(path: str, all_names: Sequence[str], data: Optional[np.ndarray],
+            names: Sequence[str], window: Optional[Sequence]) -> np.ndarray:
+    if data is None:
+        return read_selection(path, names, window)
+    columns = [all_names.index(name) for name in names]
+    return data[_window_mask(data[:, 0], window)][:, columns]
+
+
+def load_output_pair(out_path: str, baseline_path: str, include: str = "",
+                     exclude: str = "", window: Optional[Sequence] = None):
+    """
+    Reads the selected channels shared by an output and its baseline.
+
+    Returns
+    -------
+    out_data, baseline_data : np.ndarray
+        Data of the paired channels, time first.
+    names, units : List[str]
+        Names and units of the paired channels.
+    missing : List[str]
+        Selected baseline channels missing from the output.
+    """
+    out_names, _, out_data = _open_selection(out_path)
+    baseline_names, baseline_units, baseline_data = _open_selection(baseline_path)
+    selected = select_channels(baseline_names, include, exclude)
+    available = set(out_names)
+    names = [n for n in selected if n in available]
+    missing = [n for n in selected if n not in available]
+    units = [baseline_units[baseline_names.index(n)] for n in names]
+
+    out_data = _select(out_path, out_names, out_data, names, window)
+    baseline_data = _select(baseline_path, baseline_names, baseline_data,
+                            names, window)
+    return out_data, baseline_data, names, units, missing
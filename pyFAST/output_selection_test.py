@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from .fast_io import load_output
+from .block_index_test import write_outb
+from .compare import compare_case
+from .output_selection import (
+    load_output_pair,
+    read_channel_names,
+    read_selection,
+    select_channels,
+)
+
+
+def write_out(path, data, names):
+    """Writes time and channel data as an ASCII output file."""
+    with open(path, "w") as f:
+        f.write("\n" * 6)
+        f.write("\t".join(names) + "\n")
+        f.write("\t".join("(-)" for _ in names) + "\n")
+        np.savetxt(f, data, delimiter="\t")
+
+
+class TestOutputSelection(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        t = np.arange(100) * 0.1
+        self.names = ["GenPwr", "RotSpeed", "Wave1Elev"]
+        self.data = np.column_stack([100 * t, np.sin(t), np.cos(t)])
+        self.outb = os.path.join(self.tmp.name, "case.outb")
+        write_outb(self.outb, self.data, names=self.names)
+        self.out = os.path.join(self.tmp.name, "case.out")
+        write_out(self.out, np.column_stack([t, self.data]), ["Time"] + self.names)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_select_channels(self):
+        names = ["Time"] + self.names
+        self.assertListEqual(select_channels(names), names)
+        self.assertListEqual(select_channels(names, include="^(gen|rot)"),
+                             ["Time", "GenPwr", "RotSpeed"])
+        self.assertListEqual(select_channels(names, exclude="wave"),
+                             ["Time", "GenPwr", "RotSpeed"])
+
+    def test_read_selection_matches_load_output(self):
+        for path in (self.outb, self.out):
+            full, _, _ = load_output(path)
+            self.assertListEqual(read_channel_names(path)[0], ["Time"] + self.names)
+            data = read_selection(path, ["Time", "Wave1Elev", "GenPwr"], (2.0, 5.0))
+            np.testing.assert_allclose(data, full[20:51][:, [0, 3, 1]])
+            np.testing.assert_allclose(read_selection(path, ["Time"] + self.names),
+                                       full)
+
+    def test_channels_paired_by_name(self):
+        # A new channel inserted in the output doesn't shift the comparison
+        out = os.path.join(self.tmp.name, "run", "case.outb")
+        os.makedirs(os.path.dirname(out))
+        data = np.insert(self.data, 1, 5.0, axis=1)
+        write_outb(out, data, names=["GenPwr", "NewChan", "RotSpeed", "Wave1Elev"])
+        out_data, baseline_data, names, _, missing = load_output_pair(
+            out, self.outb, exclude="^wave", window=(1.0, None))
+        self.assertListEqual(names, ["Time", "GenPwr", "RotSpeed"])
+        self.assertListEqual(missing, [])
+        np.testing.assert_allclose(out_data, baseline_data)
+        self.assertEqual(len(out_data), 90)
+
+        case = {
+            'name': "case", 'input_path': self.tmp.name,
+            'run_path': os.path.dirname(out), 'baseline_file_ext': ".outb",
+            'baseline_files': ["case.outb"], 'relative_tolerance': 2,
+            'absolute_tolerance': 1.9, 'plot': False, 'status': 'None',
+        }
+        self.assertEqual(compare_case(case)['status'], 'PASSED')
+
+        # Baseline channels missing from the output fail the comparison
+        write_outb(out, self.data[:, :2], names=self.names[:2])
+        case = compare_case(case)
+        self.assertEqual(case['status'], 'FAILED')
+        self.assertListEqual(case['missing_channels'][0]['channels'], ["Wave1Elev"])
+        case['channel_exclude'] = "^wave"
+        self.assertEqual(compare_case(case)['status'], 'PASSED')
+        self.assertListEqual(case['missing_channels'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+"""Live comparison of growing ASCII output files against their baselines."""
+
+import os
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+from .fast_io import load_ascii_output
+from .regression_tester import channel_tolerances
+
+
+# Lines before the first row of data in an ASCII output file, the last two
+# holding the channel names and units
+HEADER_LINES = 8
+
+
+class OutputWatcher:
+    """
+    Compares the rows of an ASCII output file with the corresponding rows of
+    its baseline as the simulation writes them, using the same tolerances as
+    `passing_channels`.
+    """
+
+    def __init__(self, out_path: str, baseline_path: str,
+                 rtol: float, atol: float):
+        """
+        Parameters
+        ----------
+        out_path : str
+            Path of the output file, which may not exist yet.
+        baseline_path : str
+            Path of the complete baseline file.
+        rtol, atol : float
+            Relative and absolute tolerances in orders of magnitude, as in
+            the case configuration.
+        """
+        self.out_path = out_path
+        self.baseline, _ = load_ascii_output(baseline_path)
+        self.rtol, self.atol = channel_tolerances(self.baseline.T, rtol, atol)
+        self.failed = np.zeros(self.baseline.shape[1], dtype=bool)
+        self.first_failure_time = None
+        self._offset = 0
+        self._lines = 0
+        self._partial = b""
+
+    def _new_rows(self) -> Optional[np.ndarray]:
+        """Reads the complete data rows written since the last call."""
+        try:
+            with open(self.out_path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+        except OSError:
+            return None
+        self._offset += len(data)
+        data = self._partial + data
+        end = data.rfind(b"\n") + 1
+        self._partial = data[end:]
+
+        rows = []
+        for line in data[:end].decode(errors="replace").splitlines():
+            self._lines += 1
+            if self._lines > HEADER_LINES and line.strip():
+                rows.append(line.split())
+        if not rows:
+            return None
+        try:
+            return np.array(rows, dtype=float)
+        except ValueError:
+            return None
+
+    def poll(self) -> int:
+        """
+        Checks the rows written since the last call.
+
+        Returns
+        -------
+        int
+            Number of channels that have failed so far.
+        """
+        first = self._lines - HEADER_LINES if self._lines > HEADER_LINES else 0
+        rows = self._new_rows()
+        if rows is None or rows.shape[1] != self.baseline.shape[1]:
+            return int(self.failed.sum())
+
+        # Rows beyond the baseline length are left to the final comparison
+        rows = rows[:max(0, self.baseline.shape[0] - first)]
+        baseline = self.baseline[first:first + rows.shape[0]]
+        # NaN samples fail, infinite ones only if they don't match the
+        # baseline, leaving those that do to the final comparison
+        ok = np.isclose(rows, baseline, atol=self.atol, rtol=self.rtol) \
+            & ~np.isnan(rows)
+        failed_rows = ~ok.all(axis=1)
+        if failed_rows.any() and self.first_failure_time is None:
+            self.first_failure_time = float(rows[failed_rows.argmax(), 0])
+        self.failed |= ~ok.all(axis=0)
+        return int(self.failed.sum())
+
+
+class DivergenceMonitor:
+    """
+    Thread comparing a case's ASCII outputs with their baselines while the
+    case runs, which terminates the process once enough channels have
+    failed.
+    """
+
+    def __init__(self, case: dict, max_failed: int, interval: float = 1.0):
+        """
+        Parameters
+        ----------
+        case : dict
+            Case being run, with its 'baseline_files'.
+        max_failed : int
+            Number of failed channels at which the process is terminated.
+        interval : float, default: 1.0
+            Seconds between checks of the output files.
+        """
+        self.case = case
+        self.max_failed = max_failed
+        self.interval = interval
+        self.watchers: List[OutputWatcher] = []
+        for baseline_file in case.get('baseline_files', []):
+            if not baseline_file.endswith('.out'):
+                continue
+            try:
+                self.watchers.append(OutputWatcher(
+                    os.path.join(case['run_path'], baseline_file),
+                    os.path.join(case['input_path'], baseline_file),
+                    case['relative_tolerance'], case['absolute_tolerance']))
+            except (OSError, ValueError, UnicodeDecodeError):
+                # Binary or unreadable baselines are only checked at the end
+                continue
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self, process):
+        """Starts watching the outputs written by a running process."""
+        if self.watchers:
+            self._thread = threading.Thread(target=self._watch,
+                                            args=(process,), daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stops watching, to be called once the process has exited."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _watch(self, process):
+        while not self._stopped.wait(self.interval):
+            for watcher in self.watchers:
+                if watcher.poll() >= self.max_failed:
+                    self.case['diverged'] = True
+                    self.case['diverged_time'] = watcher.first_failure_time
+                    process.terminate()
+                    return
@@ -0,0 +1,112 @@
+import os
+import tempfile
+import warnings
+import unittest
+
+import numpy as np
+
+from .executor import Executor
+from .output_watcher import OutputWatcher
+
+
+HEADER = "\n\n\n\n Test output\n\nTime     RotSpeed  GenPwr\n(s)      (rpm)     (kW)\n"
+
+
+def _rows(values):
+    return "".join("  ".join(f"{v:.6E}" for v in row) + "\n" for row in values)
+
+
+class TestOutputWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.baseline = np.column_stack((np.arange(10) * 0.1,
+                                         np.full(10, 12.1),
+                                         np.linspace(0, 5000, 10)))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_poll_incremental(self):
+        baseline_path = os.path.join(self.tmp.name, "baseline.out")
+        out_path = os.path.join(self.tmp.name, "case.out")
+        with open(baseline_path, "w") as f:
+            f.write(HEADER + _rows(self.baseline))
+        watcher = OutputWatcher(out_path, baseline_path, 2, 1.9)
+
+        # Output doesn't exist yet
+        self.assertEqual(watcher.poll(), 0)
+
+        # Matching rows, the last one incomplete
+        text = HEADER + _rows(self.baseline[:4])
+        with open(out_path, "w") as f:
+            f.write(text[:-10])
+        self.assertEqual(watcher.poll(), 0)
+
+        # Diverging generator power from the fifth row on
+        test = self.baseline.copy()
+        test[4:, 2] *= 2
+        with open(out_path, "a") as f:
+            f.write(text[-10:] + _rows(test[4:6]))
+        self.assertEqual(watcher.poll(), 1)
+        self.assertAlmostEqual(watcher.first_failure_time, 0.4)
+
+    def test_nan_and_inf(self):
+        baseline = self.baseline.copy()
+        baseline[:, 1] = np.inf
+        baseline_path = os.path.join(self.tmp.name, "baseline.out")
+        out_path = os.path.join(self.tmp.name, "case.out")
+        with open(baseline_path, "w") as f:
+            f.write(HEADER + _rows(baseline))
+
+        # Infinite values matching the baseline don't fail, NaN values do
+        test = baseline[:4].copy()
+        test[3, 2] = np.nan
+        with open(out_path, "w") as f:
+            f.write(HEADER + _rows(test))
+        with warnings.catch_warnings():
+            # An infinite baseline channel has no finite tolerance
+            warnings.simplefilter("ignore", RuntimeWarning)
+            watcher = OutputWatcher(out_path, baseline_path, 2, 1.9)
+            self.assertEqual(watcher.poll(), 1)
+        self.assertListEqual(watcher.failed.tolist(), [False, False, True])
+
+    def test_executor_terminates_diverged_case(self):
+        root = self.tmp.name
+        input_path = os.path.join(root, "r-test", "bd_case")
+        run_path = os.path.join(root, "build", "bd_case")
+        os.makedirs(input_path)
+        with open(os.path.join(input_path, "bd_case.inp"), "w") as f:
+            f.write("\n")
+        with open(os.path.join(input_path, "bd_case.out"), "w") as f:
+            f.write(HEADER + _rows(self.baseline))
+
+        # Driver writing diverging rows, then hanging
+        test = self.baseline.copy()
+        test[2:, 1] = np.nan
+        with open(os.path.join(root, "rows.txt"), "w") as f:
+            f.write(HEADER + _rows(test[:5]))
+        exe = os.path.join(root, "fakedriver")
+        with open(exe, "w") as f:
+            f.write(f'#!/bin/sh\ncat {root}/rows.txt > bd_case.out\nsleep 30\n')
+        os.chmod(exe, 0o755)
+
+        case = {
+            "name": "bd_case", "driver": "beamdyn", "executable_path": exe,
+            "input_path": input_path, "run_path": run_path,
+            "input_file": "bd_case.inp",
+            "input_file_path": os.path.join(run_path, "bd_case.inp"),
+            "log_path": os.path.join(run_path, "bd_case.log"),
+            "baseline_file_ext": ".out", "relative_tolerance": 2,
+            "absolute_tolerance": 1.9, "plot": False,
+        }
+        executor = Executor([case], jobs=1, kill_diverged=1)
+        executor.run()
+        case = executor.cases[0]
+        self.assertEqual(case['status'], 'DIVERGED')
+        self.assertFalse(case['run_ok'])
+        self.assertLess(case['run_time'], 20)
+        self.assertAlmostEqual(case['diverged_time'], 0.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
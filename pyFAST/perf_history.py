@@ -0,0 +1,166 @@
+"""Persistent performance history of the regression test cases."""
+
+import os
+import sqlite3
+from time import time
+from urllib.parse import quote
+from typing import List, Optional
+
+import numpy as np
+
+
+# Scale factor relating the median absolute deviation to the standard
+# deviation of normally distributed data
+MAD_SCALE = 1.4826
+
+
+class PerfHistory:
+    """
+    SQLite database holding the runtime and resource usage of every case
+    for every suite run, keyed by the hash of the executable that ran it.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            run_id TEXT NOT NULL,
+            timestamp REAL NOT NULL,
+            driver TEXT NOT NULL,
+            name TEXT NOT NULL,
+            exe_hash TEXT,
+            ret_code INTEGER,
+            status TEXT,
+            run_time REAL,
+            user_time REAL,
+            sys_time REAL,
+            max_rss INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS runs_case ON runs (driver, name, timestamp);
+    """
+
+    def __init__(self, db_path: str, read_only: bool = False):
+        """
+        Opens the history database, creating it if it doesn't exist.
+
+        Parameters
+        ----------
+        db_path : str
+            Path to the SQLite database file.
+        read_only : bool, default: False
+            Flag to open an existing database without modifying it, e.g. one
+            shared between machines. Recording runs then fails.
+        """
+        self.db_path = db_path
+        self.run_id = f"{time():.6f}-{os.getpid()}"
+        if read_only:
+            uri = f"file:{quote(os.path.abspath(db_path))}?mode=ro"
+            self.connection = sqlite3.connect(uri, uri=True)
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.executescript(self.SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def record(self, cases: List[dict]):
+        """
+        Stores the results of the cases that were executed in this run.
+
+        Parameters
+        ----------
+        cases : List[dict]
+            Cases returned by `Executor.run`.
+        """
+        rows = [
+            (self.run_id, time(), case['driver'], case['name'],
+             case.get('exe_hash'), case['ret_code'], case['status'],
+             case['run_time'], case.get('user_time'), case.get('sys_time'),
+             case.get('max_rss'))
+            for case in cases if 'run_time' in case
+        ]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows)
+
+    def recent(self, case: dict, column: str = 'run_time',
+               window: int = 10) -> np.ndarray:
+        """
+        Returns values of `column` from the most recent successful previous
+        runs of a case, excluding the current run.
+
+        Parameters
+        ----------
+        case : dict
+            Case to look up.
+        column : str, default: 'run_time'
+            Column to return, one of 'run_time', 'user_time', 'sys_time'
+            or 'max_rss'.
+        window : int, default: 10
+            Maximum number of runs to return.
+
+        Returns
+        -------
+        np.ndarray
+            Values ordered from newest to oldest.
+        """
+        if column not in ('run_time', 'user_time', 'sys_time', 'max_rss'):
+            raise ValueError(f"invalid history column '{column}'")
+        rows = self.connection.execute(
+            f"SELECT {column} FROM runs WHERE driver = ? AND name = ? "
+            f"AND run_id != ? AND ret_code = 0 AND {column} IS NOT NULL "
+            "ORDER BY timestamp DESC LIMIT ?",
+            (case['driver'], case['name'], self.run_id, window)).fetchall()
+        return np.array([row[0] for row in rows], dtype=float)
+
+    def median(self, case: dict, column: str = 'run_time',
+               window: int = 10) -> Optional[float]:
+        """Median of the recent values of `column`, None if there are none."""
+        values = self.recent(case, column, window)
+        return float(np.median(values)) if values.size else None
+
+    def maximum(self, case: dict, column: str = 'max_rss',
+                window: int = 10) -> Optional[float]:
+        """Maximum of the recent values of `column`, None if there are none."""
+        values = self.recent(case, column, window)
+        return float(np.max(values)) if values.size else None
+
+    def check(self, case: dict, window: int = 10, threshold: float = 3.0,
+              min_runs: int = 3, min_increase: float = 0.05) -> bool:
+        """
+        Checks whether a case's runtime is within the statistical spread of
+        its recent history.
+
+        The runtime is flagged as a regression when it exceeds the median of
+        the recent runs by more than `threshold` scaled median absolute
+        deviations, and by more than `min_increase` of the median to avoid
+        flagging noise when the history is nearly constant.
+
+        Parameters
+        ----------
+        case : dict
+            Case that has been executed in this run.
+        window : int, default: 10
+            Number of recent runs to compare against.
+        threshold : float, default: 3.0
+            Number of scaled median absolute deviations allowed.
+        min_runs : int, default: 3
+            Minimum number of previous runs needed to make a decision.
+        min_increase : float, default: 0.05
+            Minimum relative increase over the median to be flagged.
+
+        Returns
+        -------
+        bool
+            False if the runtime is a regression, otherwise True.
+        """
+        history = self.recent(case, 'run_time', window)
+        if history.size < min_runs or 'run_time' not in case:
+            return True
+
+        median = np.median(history)
+        mad = MAD_SCALE * np.median(np.abs(history - median))
+        allowed = max(threshold * mad, min_increase * median)
+        case['perf_median'] = median
+        case['perf_limit'] = median + allowed
+        return case['run_time'] <= case['perf_limit']
@@ -0,0 +1,64 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from .perf_history import PerfHistory
+
+
+def _case(run_time, ret_code=0):
+    return {"driver": "openfast", "name": "AWT_YFix_WSt", "exe_hash": "abc",
+            "ret_code": ret_code, "status": "PASSED", "run_time": run_time}
+
+
+class TestPerfHistory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "build", "perf.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _fill(self, run_times):
+        for run_time in run_times:
+            history = PerfHistory(self.db_path)
+            history.record([_case(run_time)])
+            history.close()
+
+    def test_recent_excludes_current_run_and_failures(self):
+        self._fill([10.0, 11.0])
+        history = PerfHistory(self.db_path)
+        history.record([_case(50.0), _case(99.0, ret_code=1)])
+        self.assertListEqual(sorted(history.recent(_case(0))), [10.0, 11.0])
+        history.close()
+
+    def test_check(self):
+        self._fill([10.0, 10.2, 9.9, 10.1, 10.0])
+        history = PerfHistory(self.db_path)
+        self.assertTrue(history.check(_case(10.3)))
+        self.assertFalse(history.check(_case(13.0)))
+        history.close()
+
+    def test_check_needs_history(self):
+        self._fill([10.0, 10.0])
+        history = PerfHistory(self.db_path)
+        self.assertTrue(history.check(_case(100.0)))
+        history.close()
+
+    def test_read_only(self):
+        self._fill([10.0, 12.0])
+        mtime = os.stat(self.db_path).st_mtime_ns
+        history = PerfHistory(self.db_path, read_only=True)
+        self.assertEqual(history.median(_case(0), 'run_time'), 11.0)
+        with self.assertRaises(sqlite3.OperationalError):
+            history.record([_case(50.0)])
+        history.close()
+        self.assertEqual(os.stat(self.db_path).st_mtime_ns, mtime)
+
+        with self.assertRaises(sqlite3.OperationalError):
+            PerfHistory(os.path.join(self.tmp.name, "missing.sqlite"), read_only=True)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "missing.sqlite")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -256,14 +256,13 @@ class SummaryHandler():
 
         script_ix = html_head.rfind("</script>\n") + len("</script>\n")
 
-        div_body = ""
-        script_body = "\n"
+        divs = []
+        scripts = [""]
         for script, div, attribute in plots:
-            div = self._replace_id_div_string(div, attribute)
-            div_body = "".join((div_body, div))
-
-            script = self._replace_id_script_string(script, attribute)
-            script_body = "\n".join((script_body, script))
+            divs.append(self._replace_id_div_string(div, attribute))
+            scripts.append(self._replace_id_script_string(script, attribute))
+        div_body = "".join(divs)
+        script_body = "\n" + "\n".join(scripts)
 
         html_head = script_body.join((html_head[:script_ix], html_head[script_ix:]))
 
@@ -310,42 +309,20 @@ class SummaryHandler():
 
         if plots:
             # creates a reference to the plot if they exist
-            data = [
+            data = (
                 (f'<a href="#{attribute}">{attribute}</a>', *norms)
                 for (attribute, _), *norms in zip(attributes, results)
-            ]
+            )
         else:
-            data = [
+            data = (
                 (attribute, *norms) for (attribute, _), *norms in zip(attributes, results)
-            ]
-        table_body = ""
-        for i, d in enumerate(data):
-            table_body = "\n".join(
-                (
-                    table_body,
-                    f"{self.INDENT * 3}<tr>",
-                    # f'{INDENT * 4}<th scope="row">{i + 1}</th>',
-                    f"{self.INDENT * 4}<td>{d[0]}</td>",
-                )
             )
-            for j, val in enumerate(d[1]):
-                if i == results_max[j]:
-                    _class = ' class="cell-highlight"'
-                elif val > tolerance:
-                    _class = ' class="cell-warning"'
-                else:
-                    _class = ""
-
-                cell = f"{self.INDENT * 4}<td{_class}>{val:0.4e}</td>"
-
-                table_body = "\n".join((table_body, cell))
-            table_body = "\n".join((table_body, f"{self.INDENT * 3}</tr>"))
-        table_body = "\n".join((table_body, f"{self.INDENT * 2}</table>"))
 
         html_head, plot_body = self.create_plot_body(html_head, plots)
 
-        html = "\n".join(
-            (
+        # Write the table rows as they're formatted, the file buffers the writes
+        with open(os.path.join(path, ".".join((case, "html"))), "w") as f:
+            for line in (
                 html_head,
                 "",
                 "<body>",
@@ -353,17 +330,35 @@ class SummaryHandler():
                 f'{self.INDENT}<h4 class="text-center">Maximum values for each norm are <span class="cell-highlight">highlighted</span> and failing norms (norm >= {tolerance}) are <span class="cell-warning">highlighted</span></h4>',
                 f'{self.INDENT}<div class="container">',
                 table_head,
-                table_body,
+                "",
+            ):
+                f.write(line + "\n")
+
+            for i, d in enumerate(data):
+                f.write(f"{self.INDENT * 3}<tr>\n")
+                # f.write(f'{INDENT * 4}<th scope="row">{i + 1}</th>\n')
+                f.write(f"{self.INDENT * 4}<td>{d[0]}</td>\n")
+                for j, val in enumerate(d[1]):
+                    if i == results_max[j]:
+                        _class = ' class="cell-highlight"'
+                    elif val > tolerance:
+                        _class = ' class="cell-warning"'
+                    else:
+                        _class = ""
+
+                    f.write(f"{self.INDENT * 4}<td{_class}>{val:0.4e}</td>\n")
+                f.write(f"{self.INDENT * 3}</tr>\n")
+
+            for line in (
+                f"{self.INDENT * 2}</table>",
                 f"{self.INDENT * 2}<br>",
                 f"{self.INDENT}</div>",
                 plot_body,
                 "</body>",
-                self.create_tail(),
-            )
-        )
-        with open(os.path.join(path, ".".join((case, "html"))), "w") as f:
-            f.write(html)
-            
+            ):
+                f.write(line + "\n")
+            f.write(self.create_tail())
+
     def plot_error(self, baseline_data: list, test_data: list, attributes: List[Tuple[str, str]],) -> List[Tuple[str, str, str]]:
         """
         Plots the raw baseline vs test results for each attribute in one column and
@@ -393,8 +388,8 @@ class SummaryHandler():
             title2 = "Normalized Difference"
             xlabel = "Time (s)"
 
-            y1 = np.array(baseline_data[:, i], dtype=np.float)
-            y2 = np.array(test_data[:, i], dtype=np.float)
+            y1 = np.array(baseline_data[:, i], dtype=float)
+            y2 = np.array(test_data[:, i], dtype=float)
 
             script, div = self.plot_single_attribute_error(x, y1, y2, xlabel, title1, title2)
             plots.append((script, div, name))
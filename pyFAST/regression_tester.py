@@ -4,6 +4,7 @@ import numpy as np
 from functools import partial
 from multiprocessing.pool import Pool
 from .norm import calculate_norms, pass_regression_test
+from .alignment import align_outputs
 
 
 class RegressionTester:
@@ -95,30 +96,56 @@ class RegressionTester:
         return norm_results, pass_fail_list, norm_list
 
 
-def passing_channels(test, baseline, rtol, atol) -> np.ndarray:
+NUM_EPS = 1e-12
+ATOL_MIN = 1e-6
+
+
+def baseline_magnitude(baseline) -> float:
     """
-    test, baseline: arrays containing the results from OpenFAST in the following format
-        [
-            channels,
-            data
-        ]
-    So that test[0,:] are the data for the 0th channel and test[:,0] are the 0th entry in each channel.
+    Returns the largest order of magnitude of the baseline channels relative
+    to their minimum, which scales the absolute tolerance.
+
+    baseline: array containing the baseline results in the format described
+        in `passing_channels`.
     """
+    baseline_offset = baseline - np.amin(baseline, axis=1, keepdims=True)
+    b_order_of_magnitude = np.floor(np.log10(baseline_offset + NUM_EPS))
+    return np.amax(b_order_of_magnitude)
 
-    NUM_EPS = 1e-12
-    ATOL_MIN = 1e-6
 
-    n_channels = np.shape(test)[0]
-    where_close = np.zeros_like(test, dtype=bool)
+def channel_tolerances(baseline, rtol, atol) -> Tuple[float, float]:
+    """
+    Converts the relative and absolute tolerances, given as orders of
+    magnitude, to the values passed to `np.isclose` for a baseline.
+
+    baseline: array containing the baseline results in the format described
+        in `passing_channels`.
+    """
 
     rtol = 10**(-1 * rtol)
-    baseline_offset = baseline - np.amin(baseline, axis=1, keepdims=True)
-    b_order_of_magnitude = np.floor(np.log10(baseline_offset + NUM_EPS))
     # atol = 10**(-1 * atol)
     # atol = max( atol, 1e-6 )
     # atol[atol < ATOL_MIN] = ATOL_MIN
-    atol = 10**(np.amax(b_order_of_magnitude) - atol)
+    atol = 10**(baseline_magnitude(baseline) - atol)
     atol = max(atol, ATOL_MIN)
+    return rtol, atol
+
+
+def passing_channels(test, baseline, rtol, atol, reference=None) -> np.ndarray:
+    """
+    test, baseline: arrays containing the results from OpenFAST in the following format
+        [
+            channels,
+            data
+        ]
+    So that test[0,:] are the data for the 0th channel and test[:,0] are the 0th entry in each channel.
+    reference: baseline whose magnitude scales the absolute tolerance, in the same
+        format, by default `baseline`. Pass the whole baseline when `baseline` is
+        restricted to the time range of a truncated output.
+    """
+
+    rtol, atol = channel_tolerances(baseline if reference is None else reference,
+                                    rtol, atol)
     where_close = np.isclose(test, baseline, atol=atol, rtol=rtol)
 
     where_not_nan = ~np.isnan(test)
@@ -167,6 +194,12 @@ def calculate_max_norm(testData, baselineData):
 
 
 def calculateNorms(test_data, baseline_data):
+    # Compare outputs of different lengths or time steps on their overlap
+    if test_data.size != baseline_data.size:
+        try:
+            test_data, baseline_data, _ = align_outputs(test_data, baseline_data)
+        except ValueError:
+            pass
     if test_data.size != baseline_data.size:
         # print("Calculate Norms size(testdata)={}".format(test_data.size))
         # print("Calculate Norms size(baseline)={}".format(baseline_data.size))
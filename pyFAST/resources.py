@@ -0,0 +1,211 @@
+"""Detection of the compute resources usable by the regression tests."""
+
+import os
+import re
+import math
+from typing import List, Optional
+
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+# Environment variables controlling the thread count of OpenMP and the
+# common math libraries
+THREAD_VARIABLES = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+)
+
+
+def affinity_cores() -> List[int]:
+    """Returns the indices of the cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except (OSError, ValueError):
+        return None
+
+
+def _cgroup_dirs(controller: str, cgroup_root: str = CGROUP_ROOT,
+                 proc_cgroup: str = "/proc/self/cgroup") -> List[str]:
+    """
+    Lists the cgroup directories that may hold limits for this process,
+    from its own cgroup up to the hierarchy root.
+
+    Parameters
+    ----------
+    controller : str
+        Name of the cgroup v1 controller, e.g. 'cpu' or 'memory'. For
+        cgroup v2 the unified hierarchy is used.
+    cgroup_root : str
+        Mount point of the cgroup file system.
+    proc_cgroup : str
+        File listing the cgroups of this process.
+
+    Returns
+    -------
+    List[str]
+        Existing cgroup directories, innermost first.
+    """
+
+    # Find the path of this process's cgroup for the v2 hierarchy ("0::")
+    # or the v1 hierarchy containing the controller
+    relative = "/"
+    v1_root = os.path.join(cgroup_root, controller)
+    for line in (_read(proc_cgroup) or "").splitlines():
+        hierarchy, controllers, path = line.split(":", 2)
+        if hierarchy == "0" and not os.path.isdir(v1_root):
+            relative = path
+            break
+        if controller in controllers.split(","):
+            relative = path
+            break
+
+    root = v1_root if os.path.isdir(v1_root) else cgroup_root
+    dirs = []
+    path = relative.strip("/")
+    while True:
+        directory = os.path.join(root, path)
+        if os.path.isdir(directory):
+            dirs.append(directory)
+        if not path:
+            break
+        path = os.path.dirname(path)
+    return dirs
+
+
+def cgroup_cpu_limit(cgroup_root: str = CGROUP_ROOT,
+                     proc_cgroup: str = "/proc/self/cgroup") -> Optional[float]:
+    """
+    Returns the number of CPUs allowed by the cgroup CPU quota, or None if
+    the process isn't limited.
+
+    Supports both cgroup v2 (cpu.max) and cgroup v1 (cpu.cfs_quota_us and
+    cpu.cfs_period_us). The smallest limit along the hierarchy is returned.
+    """
+    limits = []
+    for directory in _cgroup_dirs("cpu", cgroup_root, proc_cgroup):
+
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        cpu_max = _read(os.path.join(directory, "cpu.max"))
+        if cpu_max is not None:
+            quota, _, period = cpu_max.partition(" ")
+            if quota != "max" and period:
+                limits.append(int(quota) / int(period))
+            continue
+
+        # cgroup v1: a quota of -1 means unlimited
+        quota = _read(os.path.join(directory, "cpu.cfs_quota_us"))
+        period = _read(os.path.join(directory, "cpu.cfs_period_us"))
+        if quota is not None and period is not None and int(quota) > 0:
+            limits.append(int(quota) / int(period))
+
+    return min(limits) if limits else None
+
+
+def usable_cores(cgroup_root: str = CGROUP_ROOT,
+                 proc_cgroup: str = "/proc/self/cgroup") -> List[int]:
+    """
+    Returns the cores the test cases may use, taking into account the CPU
+    affinity of this process and any cgroup CPU quota.
+
+    Returns
+    -------
+    List[int]
+        Indices of the usable cores.
+    """
+    cores = affinity_cores()
+    limit = cgroup_cpu_limit(cgroup_root, proc_cgroup)
+    if limit is not None:
+        cores = cores[:max(1, math.floor(limit))]
+    return cores
+
+
+def meminfo_available(meminfo: str = "/proc/meminfo") -> Optional[int]:
+    """Returns the available system memory in bytes from /proc/meminfo."""
+    for line in (_read(meminfo) or "").splitlines():
+        if line.startswith("MemAvailable:"):
+            return int(line.split()[1]) * 1024
+    return None
+
+
+def cgroup_memory_available(cgroup_root: str = CGROUP_ROOT,
+                            proc_cgroup: str = "/proc/self/cgroup") -> Optional[int]:
+    """
+    Returns the memory in bytes that may still be allocated before reaching
+    a cgroup memory limit, or None if the process isn't limited.
+
+    Supports both cgroup v2 (memory.max and memory.current) and cgroup v1
+    (memory.limit_in_bytes and memory.usage_in_bytes).
+    """
+    available = []
+    for directory in _cgroup_dirs("memory", cgroup_root, proc_cgroup):
+        for limit_file, usage_file in (("memory.max", "memory.current"),
+                                       ("memory.limit_in_bytes",
+                                        "memory.usage_in_bytes")):
+            limit = _read(os.path.join(directory, limit_file))
+            usage = _read(os.path.join(directory, usage_file))
+            if limit is None or usage is None or limit == "max":
+                continue
+            # cgroup v1 reports an unlimited group as a huge number
+            if int(limit) >= 1 << 60:
+                continue
+            available.append(max(0, int(limit) - int(usage)))
+    return min(available) if available else None
+
+
+def available_memory(cgroup_root: str = CGROUP_ROOT,
+                     proc_cgroup: str = "/proc/self/cgroup",
+                     meminfo: str = "/proc/meminfo") -> Optional[int]:
+    """
+    Returns the memory in bytes available to the test cases, the smaller of
+    the system's available memory and the room left in the cgroup limit.
+    None is returned if neither can be determined.
+    """
+    values = [v for v in (meminfo_available(meminfo),
+                          cgroup_memory_available(cgroup_root, proc_cgroup))
+              if v is not None]
+    return min(values) if values else None
+
+
+def parse_size(size) -> int:
+    """
+    Converts a memory size to bytes.
+
+    Parameters
+    ----------
+    size : int, float or str
+        Size as a number of MiB or a string with a unit suffix, e.g.
+        '512M', '4G', '2GiB' or '100B' for bytes.
+
+    Returns
+    -------
+    int
+        Size in bytes.
+
+    Raises
+    ------
+    ValueError
+        If the string isn't a number with a known unit suffix.
+    """
+    if isinstance(size, (int, float)):
+        return int(size * 1024**2)
+    match = re.fullmatch(r"(\d+\.?\d*|\.\d+)\s*(?:([KMGT])(?:I?B)?|(B))?",
+                         str(size).strip().upper())
+    if match is None:
+        raise ValueError(f"invalid size '{size}'")
+    number, unit, byte = match.groups()
+    if unit:
+        return int(float(number) * 1024**" KMGT".index(unit))
+    return int(float(number) * (1 if byte else 1024**2))
+
+
+def thread_environment(num_threads: int) -> dict:
+    """Returns environment variables limiting threads to `num_threads`."""
+    return {name: str(num_threads) for name in THREAD_VARIABLES}
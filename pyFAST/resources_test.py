@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+from .resources import (
+    available_memory,
+    cgroup_cpu_limit,
+    parse_size,
+    thread_environment,
+    usable_cores,
+)
+
+
+class TestResources(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.proc_cgroup = os.path.join(self.root, "cgroup")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, path, text):
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def test_cgroup_v2(self):
+        self._write("cgroup", "0::/ci/job\n")
+        self._write("fs/cpu.max", "max 100000\n")
+        self._write("fs/ci/cpu.max", "400000 100000\n")
+        self._write("fs/ci/job/cpu.max", "250000 100000\n")
+        limit = cgroup_cpu_limit(os.path.join(self.root, "fs"), self.proc_cgroup)
+        self.assertAlmostEqual(limit, 2.5)
+
+    def test_cgroup_v2_unlimited(self):
+        self._write("cgroup", "0::/\n")
+        self._write("fs/cpu.max", "max 100000\n")
+        limit = cgroup_cpu_limit(os.path.join(self.root, "fs"), self.proc_cgroup)
+        self.assertIsNone(limit)
+
+    def test_cgroup_v1(self):
+        self._write("cgroup", "4:cpu,cpuacct:/docker/abc\n2:memory:/docker/abc\n")
+        self._write("fs/cpu/docker/abc/cpu.cfs_quota_us", "300000\n")
+        self._write("fs/cpu/docker/abc/cpu.cfs_period_us", "100000\n")
+        self._write("fs/cpu/cpu.cfs_quota_us", "-1\n")
+        self._write("fs/cpu/cpu.cfs_period_us", "100000\n")
+        limit = cgroup_cpu_limit(os.path.join(self.root, "fs"), self.proc_cgroup)
+        self.assertAlmostEqual(limit, 3.0)
+
+    def test_usable_cores(self):
+        self._write("cgroup", "0::/\n")
+        self._write("fs/cpu.max", "100000 100000\n")
+        cores = usable_cores(os.path.join(self.root, "fs"), self.proc_cgroup)
+        self.assertEqual(len(cores), 1)
+
+    def test_available_memory(self):
+        self._write("cgroup", "0::/job\n")
+        self._write("meminfo", "MemTotal: 16384000 kB\nMemAvailable: 8192000 kB\n")
+        self._write("fs/job/memory.max", "4294967296\n")
+        self._write("fs/job/memory.current", "1073741824\n")
+        memory = available_memory(os.path.join(self.root, "fs"), self.proc_cgroup,
+                                  os.path.join(self.root, "meminfo"))
+        self.assertEqual(memory, 3 * 1024**3)
+
+        self._write("fs/job/memory.max", "max\n")
+        memory = available_memory(os.path.join(self.root, "fs"), self.proc_cgroup,
+                                  os.path.join(self.root, "meminfo"))
+        self.assertEqual(memory, 8192000 * 1024)
+
+    def test_parse_size(self):
+        self.assertEqual(parse_size(512), 512 * 1024**2)
+        self.assertEqual(parse_size("4G"), 4 * 1024**3)
+        self.assertEqual(parse_size("1.5GiB"), int(1.5 * 1024**3))
+        self.assertEqual(parse_size("100k"), 100 * 1024)
+        self.assertEqual(parse_size("2 MB"), 2 * 1024**2)
+        self.assertEqual(parse_size("100B"), 100)
+        self.assertEqual(parse_size("512"), 512 * 1024**2)
+        for size in ("100X", "1.5GiBs", "4Gi", "iB", "G", "-1G"):
+            with self.assertRaises(ValueError):
+                parse_size(size)
+
+    def test_thread_environment(self):
+        env = thread_environment(4)
+        self.assertEqual(env["OMP_NUM_THREADS"], "4")
+
+
+if __name__ == '__main__':
+    unittest.main()
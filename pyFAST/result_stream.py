@@ -0,0 +1,178 @@
+"""
+Machine readable results of suite runs for CI dashboards.
+
+`ResultStream` appends a JSON Lines record per case as soon as the case
+finishes, so progress can be followed while a long run goes on. The
+records hold no runtime regression verdict, which is only computed once
+the run is over. Then `write_junit` writes the results as a JUnit XML
+file, with a test suite per driver and a test case per case, failing the
+cases whose runtime regressed.
+"""
+
+import os
+import json
+from typing import List
+from xml.etree import ElementTree
+
+from .utilities import json_default
+
+
+# Case fields copied to the records
+CASE_KEYS = (
+    "driver",
+    "name",
+    "index",
+    "status",
+    "run_ok",
+    "check_ok",
+    "ret_code",
+    "run_time",
+    "user_time",
+    "sys_time",
+    "max_rss",
+    "diverged_time",
+    "resumed",
+)
+
+
+def failed_channels(result: dict) -> List[dict]:
+    """
+    Returns the channels that failed in the comparison of a file, with
+    their norms.
+
+    Parameters
+    ----------
+    result : dict
+        Entry of the 'check_results' of a case set by `compare.compare_case`.
+    """
+    return [{'channel': name, 'units': unit, 'relative_max_norm': norms[0],
+             'relative_l2_norm': norms[1], 'infinity_norm': norms[2]}
+            for name, unit, norms, ok in zip(result['channel_names'],
+                                             result['channel_units'],
+                                             result['norms'],
+                                             result['channels_ok'])
+            if not ok]
+
+
+def case_record(case: dict) -> dict:
+    """
+    Returns the record of a finished case: its status, return code and
+    timings, and per file its verdict, check time, missing channels and
+    failed channels.
+    """
+    record = {key: case[key] for key in CASE_KEYS if key in case}
+    results = {r['file']: r for r in case.get('check_results', [])}
+    missing = {m['file']: m['channels'] for m in case.get('missing_channels', [])}
+    files_ok = case.get('check_files_ok') or []
+    times = case.get('check_times') or [None] * len(files_ok)
+    record['files'] = []
+    for baseline_file, file_ok, seconds in zip(case.get('baseline_files', []),
+                                               files_ok, times):
+        record['files'].append({
+            'file': baseline_file,
+            'ok': file_ok,
+            'time': seconds,
+            'missing': missing.get(baseline_file, []),
+            'failed_channels': failed_channels(results[baseline_file])
+            if baseline_file in results else [],
+        })
+    return record
+
+
+class ResultStream:
+    """
+    JSON lines file with the record of every finished case, flushed as each
+    case finishes.
+    """
+
+    def __init__(self, path: str):
+        """
+        Creates the file, replacing the results of a previous run.
+
+        Parameters
+        ----------
+        path : str
+            Path to the file, created with its directory.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.file = open(path, "w")
+
+    def close(self):
+        self.file.close()
+
+    def append(self, case: dict):
+        """Writes the record of a finished case, see `case_record`."""
+        self.file.write(json.dumps(case_record(case), default=json_default) + "\n")
+        self.file.flush()
+
+
+def _case_time(case: dict) -> float:
+    return (case.get('run_time') or 0.0) + sum(case.get('check_times') or [])
+
+
+def _failure_text(record: dict) -> str:
+    lines = []
+    for result in record['files']:
+        if result['ok']:
+            continue
+        lines.append(f"{result['file']}: FAILED")
+        if result['missing']:
+            lines.append(f"  missing channels: {', '.join(result['missing'])}")
+        for channel in result['failed_channels']:
+            lines.append(f"  {channel['channel']} relative max norm "
+                         f"{channel['relative_max_norm']}")
+    return "\n".join(lines)
+
+
+def write_junit(path: str, cases: List[dict], name: str = "pyFAST"):
+    """
+    Writes the results of finished cases to a JUnit XML file.
+
+    Cases that didn't run successfully are reported as errors, cases whose
+    outputs or runtime didn't pass as failures.
+
+    Parameters
+    ----------
+    path : str
+        Path to the file, created with its directory.
+    cases : List[dict]
+        Finished cases.
+    name : str, default: "pyFAST"
+        Name of the collection of test suites.
+    """
+    drivers = {}
+    for case in cases:
+        drivers.setdefault(case['driver'], []).append(case)
+
+    root = ElementTree.Element("testsuites", name=name)
+    for driver, driver_cases in drivers.items():
+        suite = ElementTree.SubElement(root, "testsuite", name=driver)
+        errors = failures = 0
+        for case in driver_cases:
+            record = case_record(case)
+            testcase = ElementTree.SubElement(
+                suite, "testcase", name=case['name'], classname=driver,
+                time=f"{_case_time(case):.3f}")
+            if not case.get('run_ok', True):
+                errors += 1
+                error = ElementTree.SubElement(
+                    testcase, "error", message=f"{case.get('status')} with code "
+                                               f"{case.get('ret_code')}")
+                if case.get('log_path'):
+                    error.text = f"log: {case['log_path']}"
+            elif not case.get('check_ok') or not case.get('perf_ok', True):
+                failures += 1
+                failure = ElementTree.SubElement(testcase, "failure",
+                                                 message=str(case.get('status')))
+                failure.text = _failure_text(record)
+            if case.get('resumed'):
+                ElementTree.SubElement(testcase, "system-out").text = \
+                    "result reused from the run journal"
+        suite.set("tests", str(len(driver_cases)))
+        suite.set("errors", str(errors))
+        suite.set("failures", str(failures))
+        suite.set("time", f"{sum(_case_time(c) for c in driver_cases):.3f}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    ElementTree.ElementTree(root).write(path, encoding="utf-8", xml_declaration=True)
@@ -0,0 +1,83 @@
+import os
+import json
+import tempfile
+import unittest
+from xml.etree import ElementTree
+
+from .result_stream import ResultStream, case_record, write_junit
+
+
+def _case(name, driver="openfast", run_ok=True, check_ok=True):
+    return {
+        "name": name, "driver": driver, "index": "1/3",
+        "status": "PASSED" if check_ok else "FAILED", "run_ok": run_ok,
+        "check_ok": check_ok, "ret_code": 0 if run_ok else 1, "run_time": 1.5,
+        "baseline_files": [name + ".outb", name + ".out"],
+        "check_files_ok": [True, check_ok], "check_times": [0.25, 0.25],
+        "check_results": [{
+            "file": name + ".out", "channel_names": ["Time", "GenPwr", "RotSpeed"],
+            "channel_units": ["s", "kW", "rpm"],
+            "channels_ok": [True, check_ok, True],
+            "norms": [[0, 0, 0], [0.5, 0.25, 2.0], [0, 0, 0]],
+        }],
+        "missing_channels": [] if check_ok else
+        [{"file": name + ".out", "channels": ["Wind1VelX"]}],
+        "log_path": f"/build/{name}/{name}.log",
+    }
+
+
+class TestResultStream(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cases = [_case("pass"), _case("fail", check_ok=False),
+                      _case("crash", driver="beamdyn", run_ok=False, check_ok=False)]
+        del self.cases[2]['check_results']
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_case_record(self):
+        record = case_record(self.cases[1])
+        self.assertEqual(record['status'], "FAILED")
+        self.assertEqual(record['ret_code'], 0)
+        self.assertListEqual([f['ok'] for f in record['files']], [True, False])
+        failed = record['files'][1]
+        self.assertListEqual(failed['missing'], ["Wind1VelX"])
+        self.assertListEqual([c['channel'] for c in failed['failed_channels']],
+                             ["GenPwr"])
+        self.assertEqual(failed['failed_channels'][0]['infinity_norm'], 2.0)
+        passed = case_record(self.cases[0])['files'][1]
+        self.assertListEqual(passed['failed_channels'], [])
+
+    def test_stream(self):
+        path = os.path.join(self.tmp.name, "results", "run.jsonl")
+        stream = ResultStream(path)
+        stream.append(self.cases[0])
+
+        # Records are readable while the run goes on
+        with open(path) as f:
+            self.assertEqual(json.loads(f.readline())['name'], "pass")
+        stream.append(self.cases[1])
+        stream.close()
+        with open(path) as f:
+            self.assertListEqual([json.loads(line)['name'] for line in f],
+                                 ["pass", "fail"])
+
+    def test_junit(self):
+        path = os.path.join(self.tmp.name, "junit.xml")
+        write_junit(path, self.cases)
+        root = ElementTree.parse(path).getroot()
+        suites = {s.get('name'): s for s in root.iter('testsuite')}
+        self.assertListEqual(sorted(suites), ["beamdyn", "openfast"])
+        self.assertEqual(suites['openfast'].get('tests'), "2")
+        self.assertEqual(suites['openfast'].get('failures'), "1")
+        self.assertEqual(suites['beamdyn'].get('errors'), "1")
+        testcases = {c.get('name'): c for c in root.iter('testcase')}
+        self.assertEqual(testcases['pass'].get('time'), "2.000")
+        self.assertIsNone(testcases['pass'].find('failure'))
+        self.assertIn("GenPwr", testcases['fail'].find('failure').text)
+        self.assertIsNotNone(testcases['crash'].find('error'))
+
+
+if __name__ == '__main__':
+    unittest.main()
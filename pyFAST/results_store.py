@@ -0,0 +1,244 @@
+"""
+Columnar store of the per-channel comparison results of suite runs.
+
+Each run is written to one .npz file with a row per compared channel. String
+columns (driver, case, file, channel, units) are dictionary encoded as an
+array of their distinct values, '<column>.values', and an array of integer
+codes, '<column>.codes'. The norms, tolerances and verdicts are plain
+numeric columns. The rows are sorted by their key, the driver, case, file
+and channel joined by `KEY_SEP`, which is stored as the index column. Two runs
+are matched on this index with vectorized set operations, so diffing
+thousands of channels takes milliseconds.
+"""
+
+import os
+import json
+from time import strftime, time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+# Version of the file layout. Version 1 keys didn't include the driver
+STORE_VERSION = 2
+
+# Columns of the norms returned by `calculateNorms`
+NORM_NAMES = ("relative_max_norm", "relative_l2_norm", "infinity_norm")
+
+# Dictionary-encoded columns
+STRING_COLUMNS = ("driver", "case", "file", "channel", "units")
+
+# Separator of the parts of a row key, which can't appear in names
+KEY_SEP = "\x1f"
+
+
+class ResultSet:
+    """
+    Per-channel comparison results of a run, as columns of equal length.
+
+    Columns are 'key', the `STRING_COLUMNS`, the `NORM_NAMES`,
+    'relative_tolerance', 'absolute_tolerance' and 'passed'. Diffs add
+    columns holding the values of the older run, prefixed with 'old_'.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray],
+                 metadata: Optional[dict] = None):
+        self.columns = columns
+        self.metadata = metadata or {}
+
+    def __len__(self) -> int:
+        return len(self.columns['key'])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def select(self, rows) -> "ResultSet":
+        """Returns the rows selected by a boolean mask or index array."""
+        return ResultSet({name: column[rows]
+                          for name, column in self.columns.items()},
+                         self.metadata)
+
+    def failed(self) -> "ResultSet":
+        """Returns the rows of the channels that failed."""
+        return self.select(~self.columns['passed'])
+
+    def records(self) -> List[dict]:
+        """Returns the rows as dicts, without their key."""
+        names = [name for name in self.columns if name != 'key']
+        return [dict(zip(names, values)) for values in
+                zip(*(self.columns[name].tolist() for name in names))]
+
+
+def collect_results(cases: List[dict]) -> ResultSet:
+    """
+    Gathers the per-channel results of compared cases.
+
+    Parameters
+    ----------
+    cases : List[dict]
+        Cases with 'check_results' set by `compare.compare_case`.
+
+    Returns
+    -------
+    ResultSet
+        Rows sorted by key.
+    """
+    rows = {name: [] for name in STRING_COLUMNS}
+    norms, passed, rtol, atol = [], [], [], []
+    for case in cases:
+        for result in case.get('check_results', []):
+            # The first channel, time, isn't compared
+            names = result['channel_names'][1:]
+            count = len(names)
+            rows['driver'] += [case['driver']] * count
+            rows['case'] += [case['name']] * count
+            rows['file'] += [result['file']] * count
+            rows['channel'] += names
+            rows['units'] += list(result['channel_units'][1:])
+            norms += result['norms'][1:]
+            passed += result['channels_ok'][1:]
+            rtol += [case['relative_tolerance']] * count
+            atol += [case['absolute_tolerance']] * count
+
+    columns = {name: np.array(values, dtype=str) for name, values in rows.items()}
+    norms = np.array(norms, dtype=float).reshape(-1, len(NORM_NAMES))
+    for i, name in enumerate(NORM_NAMES):
+        columns[name] = norms[:, i]
+    columns['relative_tolerance'] = np.array(rtol, dtype=float)
+    columns['absolute_tolerance'] = np.array(atol, dtype=float)
+    columns['passed'] = np.array(passed, dtype=bool)
+
+    columns = {'key': _row_keys(columns), **columns}
+    order = np.argsort(columns['key'], kind='stable')
+    return ResultSet(columns).select(order)
+
+
+def _row_keys(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """Joins the driver, case, file and channel of each row into its key."""
+    key = columns['driver']
+    for name in ('case', 'file', 'channel'):
+        key = np.char.add(np.char.add(key, KEY_SEP), columns[name])
+    return key.astype(str)
+
+
+def write_results(path: str, results: ResultSet, **metadata):
+    """
+    Writes a result set to a compressed .npz file.
+
+    Parameters
+    ----------
+    path : str
+        Path of the file, created with its directory.
+    results : ResultSet
+        Results sorted by key, see `collect_results`.
+    metadata
+        Values stored with the results, e.g. the run's executable hash.
+    """
+    arrays = {}
+    for name, column in results.columns.items():
+        if name in STRING_COLUMNS:
+            values, codes = np.unique(column, return_inverse=True)
+            arrays[name + ".values"] = values
+            arrays[name + ".codes"] = codes.astype(np.int32)
+        else:
+            arrays[name] = column
+    metadata = {'version': STORE_VERSION, 'created': time(), **metadata}
+    arrays['metadata'] = np.array(json.dumps(metadata))
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "wb") as f:
+        np.savez_compressed(f, **arrays)
+
+
+def load_results(path: str) -> ResultSet:
+    """Reads a result set written by `write_results`."""
+    with np.load(path, allow_pickle=False) as data:
+        metadata = json.loads(str(data['metadata']))
+        if metadata.get('version') not in (1, STORE_VERSION):
+            raise ValueError(f"unsupported results file version "
+                             f"{metadata.get('version')} in {path}")
+        columns = {}
+        for name in data.files:
+            if name == 'metadata' or name.endswith(".values"):
+                continue
+            if name.endswith(".codes"):
+                name = name[:-len(".codes")]
+                columns[name] = data[name + ".values"][data[name + ".codes"]]
+            else:
+                columns[name] = data[name]
+    columns = {'key': columns.pop('key'), **columns}
+    if metadata['version'] == 1:
+        columns['key'] = _row_keys(columns)
+        order = np.argsort(columns['key'], kind='stable')
+        return ResultSet(columns, metadata).select(order)
+    return ResultSet(columns, metadata)
+
+
+def diff_results(old: ResultSet, new: ResultSet,
+                 norm: str = "relative_max_norm",
+                 factor: float = 1.0) -> Dict[str, ResultSet]:
+    """
+    Compares the results of two runs channel by channel.
+
+    Parameters
+    ----------
+    old, new : ResultSet
+        Results of the earlier and later run.
+    norm : str, default: 'relative_max_norm'
+        Norm compared to find the channels that got worse.
+    factor : float, default: 1.0
+        A channel got worse if its norm is larger than `factor` times its
+        norm in the earlier run.
+
+    Returns
+    -------
+    Dict[str, ResultSet]
+        Rows of the later run that are 'regressed' (passed before, fail
+        now), 'fixed' (failed before, pass now) and 'worse' (larger norm),
+        with the earlier 'old_passed' and 'old_' norm columns added, and
+        the rows 'added' to the later run and 'removed' from the earlier.
+    """
+    _, old_rows, new_rows = np.intersect1d(old['key'], new['key'],
+                                           assume_unique=True,
+                                           return_indices=True)
+    matched = new.select(new_rows)
+    matched.columns['old_passed'] = old['passed'][old_rows]
+    for name in NORM_NAMES:
+        matched.columns['old_' + name] = old[name][old_rows]
+
+    # NaN norms, e.g. of channels that couldn't be compared, never compare
+    # as worse, but their verdicts do
+    was_passed, passed = matched['old_passed'], matched['passed']
+    with np.errstate(invalid='ignore'):
+        worse = matched[norm] > factor * matched['old_' + norm]
+
+    added = np.ones(len(new), dtype=bool)
+    added[new_rows] = False
+    removed = np.ones(len(old), dtype=bool)
+    removed[old_rows] = False
+    return {
+        'regressed': matched.select(was_passed & ~passed),
+        'fixed': matched.select(~was_passed & passed),
+        'worse': matched.select(worse),
+        'added': new.select(added),
+        'removed': old.select(removed),
+    }
+
+
+def default_results_dir(root_path: str) -> str:
+    """Returns the default directory of the result files of suite runs."""
+    return os.path.join(root_path, "build", "pyfast_results")
+
+
+def new_results_path(directory: str) -> str:
+    """Returns a path for the results of a run, named by its start time."""
+    return os.path.join(directory, strftime("%Y%m%d-%H%M%S") +
+                        f"-{os.getpid()}.npz")
+
+
+def latest_results(directory: str, count: int = 2) -> List[str]:
+    """Returns the paths of the most recent result files of a directory."""
+    if not os.path.isdir(directory):
+        return []
+    files = sorted(f for f in os.listdir(directory) if f.endswith(".npz"))
+    return [os.path.join(directory, f) for f in files[-count:]]
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+from time import perf_counter
+
+import numpy as np
+
+from .results_store import (
+    collect_results,
+    diff_results,
+    load_results,
+    write_results,
+)
+
+
+def _case(name, channels_ok, norms):
+    channels = [f"Chan{i}" for i in range(len(channels_ok))]
+    return {
+        'driver': "openfast", 'name': name,
+        'relative_tolerance': 2, 'absolute_tolerance': 1.9,
+        'check_results': [{
+            'file': name + ".outb",
+            'channel_names': ["Time"] + channels,
+            'channel_units': ["(s)"] + ["(-)"] * len(channels),
+            'channels_ok': [True] + list(channels_ok),
+            'norms': [[0, 0, 0]] + [[n, n, n] for n in norms],
+        }],
+    }
+
+
+class TestResultsStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        cases = [_case("b", [True, False], [1e-3, 0.5]),
+                 _case("a", [True], [1e-4])]
+        path = os.path.join(self.tmp.name, "results", "run.npz")
+        write_results(path, collect_results(cases), exe_hash="abc")
+        results = load_results(path)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results.metadata['exe_hash'], "abc")
+        self.assertListEqual(results['case'].tolist(), ["a", "b", "b"])
+        self.assertListEqual(results['channel'].tolist(), ["Chan0", "Chan0", "Chan1"])
+        np.testing.assert_array_equal(results['passed'], [True, True, False])
+        np.testing.assert_allclose(results['infinity_norm'], [1e-4, 1e-3, 0.5])
+        self.assertListEqual([r['channel'] for r in results.failed().records()],
+                             ["Chan1"])
+
+    def test_diff(self):
+        old = collect_results([_case("a", [True, False, True], [0.1, 0.5, 0.2])])
+        new = collect_results([_case("a", [False, True, True, True],
+                                     [0.3, 0.1, 0.2, 0.0])])
+        new = new.select(new['channel'] != "Chan2")
+        diff = diff_results(old, new)
+        self.assertListEqual(diff['regressed']['channel'].tolist(), ["Chan0"])
+        self.assertListEqual(diff['fixed']['channel'].tolist(), ["Chan1"])
+        self.assertListEqual(diff['worse']['channel'].tolist(), ["Chan0"])
+        self.assertListEqual(diff['added']['channel'].tolist(), ["Chan3"])
+        self.assertListEqual(diff['removed']['channel'].tolist(), ["Chan2"])
+        self.assertAlmostEqual(diff['worse']['old_relative_max_norm'][0], 0.1)
+
+    def test_same_case_of_two_drivers(self):
+        cases = [_case("a", [True], [0.1]), dict(_case("a", [True], [0.2]),
+                                                 driver="beamdyn")]
+        old = collect_results(cases)
+        cases[1]['check_results'][0]['channels_ok'] = [True, False]
+        diff = diff_results(old, collect_results(cases))
+        self.assertListEqual(diff['regressed']['driver'].tolist(), ["beamdyn"])
+        self.assertEqual(len(diff['added']) + len(diff['removed']), 0)
+
+        # Files of the previous layout are keyed the same way when loaded
+        path = os.path.join(self.tmp.name, "v1.npz")
+        write_results(path, old, version=1)
+        np.testing.assert_array_equal(load_results(path)['key'], old['key'])
+
+    def test_diff_many_channels(self):
+        rng = np.random.default_rng(0)
+        cases = [_case(f"case{i}", rng.random(500) > 0.1, rng.random(500))
+                 for i in range(40)]
+        paths = [os.path.join(self.tmp.name, f"{i}.npz") for i in range(2)]
+        write_results(paths[0], collect_results(cases))
+        for case in cases:
+            case['check_results'][0]['channels_ok'][5] = False
+        write_results(paths[1], collect_results(cases))
+
+        start = perf_counter()
+        diff = diff_results(load_results(paths[0]), load_results(paths[1]))
+        elapsed = perf_counter() - start
+        self.assertEqual(len(diff['added']) + len(diff['removed']), 0)
+        self.assertLessEqual(len(diff['regressed']), 40)
+        self.assertLess(elapsed, 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+"""
+Pruning of the run directories of passing cases.
+
+A run stages a copy of every case's inputs and keeps all of its outputs,
+which fills the disks of nightly runners. The 'retention' setting of a case,
+usually set per driver in the test configuration, decides what is kept of
+the run directory of a case that passes:
+
+ - 'keep': everything, the default.
+ - 'summary': only the log and the case summary.
+ - 'archive': the log and the case summary, and the rest of the directory
+   in a compressed tar archive next to them.
+
+Failing cases are always kept whole. Turbine directories shared by several
+cases are pruned by `prune_turbine_directories` once every case using them
+has passed.
+"""
+
+import os
+import shutil
+import tarfile
+from typing import List
+
+from .error_plotting import DATA_EXT
+
+
+# Retention settings, the first is the default
+RETENTION_POLICIES = ("keep", "summary", "archive")
+
+# Extension of the archive of a pruned run directory
+ARCHIVE_EXT = ".tar.gz"
+
+
+def retention_policy(case: dict) -> str:
+    """
+    Returns the retention setting of a case.
+
+    Raises
+    ------
+    ValueError
+        If the setting isn't one of `RETENTION_POLICIES`.
+    """
+    policy = case.get('retention') or RETENTION_POLICIES[0]
+    if policy not in RETENTION_POLICIES:
+        raise ValueError(f"invalid retention '{policy}' for case '{case['name']}', "
+                         f"expected one of {', '.join(RETENTION_POLICIES)}")
+    return policy
+
+
+def archive_name(case: dict) -> str:
+    """Returns the file name of the archive of a case's run directory."""
+    return os.path.basename(case['name']) + ARCHIVE_EXT
+
+
+def kept_files(case: dict) -> List[str]:
+    """Returns the names of the files kept in a pruned run directory."""
+    report_name = os.path.basename(case['name'])
+    names = [report_name + ".html", report_name + DATA_EXT, archive_name(case)]
+    if 'log_path' in case:
+        names.append(os.path.basename(case['log_path']))
+    return names
+
+
+def prune_case(case: dict, policy: str = None, keep_paths: List[str] = ()) -> int:
+    """
+    Prunes the run directory of a passing case.
+
+    Parameters
+    ----------
+    case : dict
+        Case with 'check_ok' set by `compare.compare_case`. Nothing is
+        removed unless it passed.
+    policy : str, optional
+        One of `RETENTION_POLICIES`, by default the case's setting.
+    keep_paths : List[str], optional
+        Run directories of other cases, which may be nested in the case's
+        run directory when comparing a directory tree. Entries holding them
+        are neither archived nor removed.
+
+    Returns
+    -------
+    int
+        Number of bytes removed, net of the archive's size.
+    """
+    policy = policy or retention_policy(case)
+    if policy == "keep" or not case.get('check_ok') or \
+            not os.path.isdir(case['run_path']):
+        return 0
+
+    keep = set(kept_files(case))
+    nested = [os.path.abspath(path) for path in keep_paths]
+    names = sorted(n for n in os.listdir(case['run_path'])
+                   if n not in keep and not _holds(os.path.join(case['run_path'], n),
+                                                   nested))
+    if not names:
+        return 0
+
+    freed = _size(case['run_path'], names)
+    if policy == "archive":
+        archive_path = os.path.join(case['run_path'], archive_name(case))
+        with tarfile.open(archive_path, "w:gz") as archive:
+            for name in names:
+                archive.add(os.path.join(case['run_path'], name), arcname=name)
+        freed -= os.path.getsize(archive_path)
+
+    for name in names:
+        path = os.path.join(case['run_path'], name)
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+    return freed
+
+
+def prune_turbine_directories(cases: List[dict]) -> int:
+    """
+    Removes the staged turbine directories whose cases all passed and
+    aren't kept whole.
+
+    Returns
+    -------
+    int
+        Number of bytes removed.
+    """
+    prunable = {}
+    for case in cases:
+        if 'turbine_run_path' in case:
+            path = case['turbine_run_path']
+            prunable[path] = prunable.get(path, True) and \
+                bool(case.get('check_ok')) and retention_policy(case) != "keep"
+
+    freed = 0
+    for path, prune in prunable.items():
+        if prune and os.path.isdir(path):
+            freed += _size(path, os.listdir(path))
+            shutil.rmtree(path)
+    return freed
+
+
+def _holds(path: str, paths: List[str]) -> bool:
+    """Checks whether a path is or contains any of the absolute `paths`."""
+    path = os.path.abspath(path)
+    return any(os.path.commonpath([path, other]) == path for other in paths)
+
+
+def _size(directory: str, names: List[str]) -> int:
+    """Total size of files and directory trees in a directory."""
+    size = 0
+    for name in names:
+        path = os.path.join(directory, name)
+        if os.path.isdir(path) and not os.path.islink(path):
+            for root, _, files in os.walk(path):
+                size += sum(os.path.getsize(os.path.join(root, f)) for f in files
+                            if not os.path.islink(os.path.join(root, f)))
+        elif os.path.isfile(path):
+            size += os.path.getsize(path)
+    return size
@@ -0,0 +1,89 @@
+import os
+import tarfile
+import tempfile
+import unittest
+
+from .retention import prune_case, prune_turbine_directories, retention_policy
+
+
+class TestRetention(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        run_path = os.path.join(self.tmp.name, "Case")
+        os.makedirs(os.path.join(run_path, "Airfoils"))
+        files = ["Case.fst", "Case.outb", "Case.log", "Case.html",
+                 "Case.data.js", os.path.join("Airfoils", "foil.dat")]
+        for name in files:
+            with open(os.path.join(run_path, name), "w") as f:
+                f.write(name * 100)
+        self.case = {'name': "Case", 'run_path': run_path, 'check_ok': True,
+                     'log_path': os.path.join(run_path, "Case.log")}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _listing(self):
+        return sorted(os.listdir(self.case['run_path']))
+
+    def test_keep(self):
+        before = self._listing()
+        self.assertEqual(prune_case(self.case), 0)
+        self.assertEqual(self._listing(), before)
+
+    def test_summary(self):
+        self.assertGreater(prune_case(self.case, "summary"), 0)
+        self.assertEqual(self._listing(), ["Case.data.js", "Case.html", "Case.log"])
+
+    def test_archive(self):
+        self.case['retention'] = "archive"
+        prune_case(self.case)
+        self.assertEqual(self._listing(), ["Case.data.js", "Case.html",
+                                           "Case.log", "Case.tar.gz"])
+        archive_path = os.path.join(self.case['run_path'], "Case.tar.gz")
+        with tarfile.open(archive_path) as archive:
+            self.assertEqual(sorted(archive.getnames()),
+                             ["Airfoils", "Airfoils/foil.dat", "Case.fst", "Case.outb"])
+
+        # Pruning again keeps the archive
+        self.assertEqual(prune_case(self.case), 0)
+        self.assertIn("Case.tar.gz", self._listing())
+
+    def test_nested_case_kept(self):
+        nested_path = os.path.join(self.case['run_path'], "Airfoils")
+        prune_case(self.case, "archive",
+                   keep_paths=[self.case['run_path'], nested_path])
+        self.assertEqual(self._listing(), ["Airfoils", "Case.data.js",
+                                           "Case.html", "Case.log", "Case.tar.gz"])
+        self.assertTrue(os.path.isfile(os.path.join(nested_path, "foil.dat")))
+        archive_path = os.path.join(self.case['run_path'], "Case.tar.gz")
+        with tarfile.open(archive_path) as archive:
+            self.assertEqual(sorted(archive.getnames()), ["Case.fst", "Case.outb"])
+
+    def test_failed_case_kept(self):
+        self.case['check_ok'] = False
+        before = self._listing()
+        self.assertEqual(prune_case(self.case, "summary"), 0)
+        self.assertEqual(self._listing(), before)
+
+    def test_turbine_directories(self):
+        turbine_path = os.path.join(self.tmp.name, "Turbine")
+        os.makedirs(turbine_path)
+        with open(os.path.join(turbine_path, "Turbine.dat"), "w") as f:
+            f.write("x" * 10)
+        cases = [dict(self.case, turbine_run_path=turbine_path, retention="summary"),
+                 dict(self.case, turbine_run_path=turbine_path, retention="summary",
+                      check_ok=False)]
+        self.assertEqual(prune_turbine_directories(cases), 0)
+        self.assertTrue(os.path.isdir(turbine_path))
+
+        cases[1]['check_ok'] = True
+        self.assertEqual(prune_turbine_directories(cases), 10)
+        self.assertFalse(os.path.exists(turbine_path))
+
+    def test_invalid_policy(self):
+        with self.assertRaises(ValueError):
+            retention_policy(dict(self.case, retention="all"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+"""Cost-based ordering and partitioning of the regression test cases."""
+
+import os
+import hashlib
+from typing import Callable, Dict, List, Tuple
+
+from .cost_model import DEFAULT_SCALE
+
+
+# Cost in seconds assumed for a case without runtime history or estimate
+DEFAULT_COST = 60.0
+
+
+def parse_shard(text: str) -> Tuple[int, int]:
+    """
+    Parses a shard specification.
+
+    Parameters
+    ----------
+    text : str
+        Shard as 'K/N', selecting the K-th (1-based) of N shards.
+
+    Returns
+    -------
+    Tuple[int, int]
+        Shard index K and number of shards N.
+    """
+    try:
+        shard, num_shards = (int(v) for v in text.split("/"))
+    except ValueError:
+        raise ValueError(f"invalid shard '{text}', expected K/N") from None
+    if num_shards < 1 or not 1 <= shard <= num_shards:
+        raise ValueError(f"invalid shard '{text}', expected 1 <= K <= N")
+    return shard, num_shards
+
+
+def case_cost(case: dict) -> float:
+    """
+    Returns the scheduling cost of a case in seconds: its historical runtime
+    if known, otherwise its static cost estimate converted to seconds with
+    the case's 'cost_scale'.
+    """
+    if case.get('expected_run_time') is not None:
+        return float(case['expected_run_time'])
+    if case.get('static_cost') is not None:
+        return case['static_cost'] * case.get('cost_scale', DEFAULT_SCALE)
+    return DEFAULT_COST
+
+
+def shard_cost(case: dict) -> float:
+    """
+    Returns the cost of a case used to partition cases between machines,
+    computed only from inputs identical on every machine: its runtime in a
+    shared history given with '--shard-db' ('shard_run_time') if known,
+    otherwise its static cost estimate converted to seconds with the scale
+    calibrated on that history ('shard_scale') or the default scale.
+
+    The local runtime history isn't used, since each machine only records
+    the cases of its own shard and would compute a different split.
+    """
+    if case.get('shard_run_time') is not None:
+        return float(case['shard_run_time'])
+    if case.get('static_cost') is not None:
+        return case['static_cost'] * case.get('shard_scale', DEFAULT_SCALE)
+    return DEFAULT_COST
+
+
+def group_cases(cases: List[dict]) -> Dict[str, List[dict]]:
+    """
+    Groups cases sharing a staged turbine directory so they can be run on the
+    same machine, which then only copies the directory once.
+
+    Returns
+    -------
+    Dict[str, List[dict]]
+        Cases by group key, the turbine run path or the case run path for
+        cases without a turbine directory, relative to the run paths' common
+        root so that keys don't depend on where the repository is.
+    """
+    paths = [case.get('turbine_run_path', case['run_path']) for case in cases]
+    root = os.path.commonpath(paths) if paths else ""
+    groups = {}
+    for case, path in zip(cases, paths):
+        key = os.path.relpath(path, root) if root else path
+        groups.setdefault(key, []).append(case)
+    return groups
+
+
+def partition_cases(cases: List[dict], num_shards: int,
+                    cost: Callable[[dict], float] = case_cost) -> List[List[dict]]:
+    """
+    Splits cases into runtime-balanced partitions.
+
+    Groups of cases are assigned, from most to least expensive, to the
+    partition with the least total cost. Ties are broken by group key and
+    partition index so that the result only depends on the cases and their
+    costs, and every machine computes the same split.
+
+    Parameters
+    ----------
+    cases : List[dict]
+        Cases to partition.
+    num_shards : int
+        Number of partitions.
+    cost : Callable[[dict], float], default: case_cost
+        Cost of a case.
+
+    Returns
+    -------
+    List[List[dict]]
+        Cases of each partition, in their original order.
+    """
+    groups = group_cases(cases)
+    costs = {key: sum(cost(c) for c in group)
+             for key, group in groups.items()}
+
+    loads = [0.0] * num_shards
+    assignment = {}
+    for key in sorted(groups, key=lambda k: (-costs[k], k)):
+        shard = min(range(num_shards), key=lambda i: (loads[i], i))
+        loads[shard] += costs[key]
+        for case in groups[key]:
+            assignment[id(case)] = shard
+
+    shards = [[] for _ in range(num_shards)]
+    for case in cases:
+        shards[assignment[id(case)]].append(case)
+    return shards
+
+
+def shard_cases(cases: List[dict], shard: int, num_shards: int) -> List[dict]:
+    """
+    Returns the cases of the `shard`-th (1-based) of `num_shards` balanced
+    partitions, computed with `shard_cost`.
+    """
+    return partition_cases(cases, num_shards, shard_cost)[shard - 1]
+
+
+def cost_fingerprint(cases: List[dict]) -> str:
+    """
+    Returns a short digest of the cases and their `shard_cost`, equal on
+    machines that compute the same partitions.
+    """
+    h = hashlib.sha256()
+    for key, group in sorted(group_cases(cases).items()):
+        for case in sorted(group, key=lambda c: c['name']):
+            h.update(f"{key}\t{case['name']}\t{shard_cost(case):.6g}\n".encode())
+    return h.hexdigest()[:12]
@@ -0,0 +1,86 @@
+import unittest
+
+from .scheduling import (
+    cost_fingerprint,
+    parse_shard,
+    partition_cases,
+    shard_cases,
+    shard_cost,
+)
+
+
+def _cases(root):
+    cases = []
+    for name, turbine, run_time in [
+            ("AWT_YFix_WSt", "AWT27", 10.0),
+            ("AWT_YFree_WSt", "AWT27", 12.0),
+            ("AOC_WSt", "AOC", 8.0),
+            ("5MW_Land_DLL_WTurb", "5MW_Baseline", 30.0),
+            ("5MW_OC4Semi_WSt_WavesWN", "5MW_Baseline", 40.0),
+            ("bd_curved_beam", None, 5.0),
+            ("bd_static_cantilever_beam", None, 4.0)]:
+        case = {"name": name, "run_path": f"{root}/build/{name}",
+                "expected_run_time": run_time}
+        if turbine:
+            case["turbine_run_path"] = f"{root}/build/{turbine}"
+        cases.append(case)
+    return cases
+
+
+class TestScheduling(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/3"), (2, 3))
+        for text in ("0/3", "4/3", "3", "a/b"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_partition_keeps_groups_together(self):
+        shards = partition_cases(_cases("/repo"), 3)
+        names = [[c["name"] for c in shard] for shard in shards]
+        self.assertEqual(sum(len(n) for n in names), 7)
+        for shard in names:
+            if "5MW_Land_DLL_WTurb" in shard:
+                self.assertIn("5MW_OC4Semi_WSt_WavesWN", shard)
+            if "AWT_YFix_WSt" in shard:
+                self.assertIn("AWT_YFree_WSt", shard)
+
+    def test_partition_is_balanced(self):
+        shards = partition_cases(_cases("/repo"), 2)
+        loads = [sum(c["expected_run_time"] for c in shard) for shard in shards]
+        self.assertListEqual(loads, [70.0, 39.0])
+
+    def test_partition_independent_of_root(self):
+        a = [[c["name"] for c in shard_cases(_cases("/home/ci1/openfast"), k, 3)]
+             for k in (1, 2, 3)]
+        b = [[c["name"] for c in shard_cases(_cases("/builds/x"), k, 3)]
+             for k in (1, 2, 3)]
+        self.assertListEqual(a, b)
+
+    def test_shards_ignore_local_history(self):
+        # Each machine's history only holds the cases of its own shard
+        machines = []
+        for seen in ({"AWT_YFix_WSt", "AOC_WSt"}, {"5MW_Land_DLL_WTurb"}):
+            cases = _cases("/repo")
+            for i, case in enumerate(cases):
+                case["static_cost"] = 1000.0 * (i + 1)
+                case["cost_scale"] = 0.5 if seen == {"5MW_Land_DLL_WTurb"} else 2.0
+                if case["name"] not in seen:
+                    case["expected_run_time"] = None
+            machines.append(cases)
+
+        splits = [[[c["name"] for c in shard_cases(cases, k, 3)] for k in (1, 2, 3)]
+                  for cases in machines]
+        self.assertListEqual(splits[0], splits[1])
+        self.assertEqual(sorted(sum(splits[0], [])),
+                         sorted(c["name"] for c in machines[0]))
+        self.assertEqual(cost_fingerprint(machines[0]), cost_fingerprint(machines[1]))
+
+        # A shared history changes the costs, and the fingerprint
+        for case in machines[1]:
+            case["shard_run_time"] = 100.0
+        self.assertEqual(shard_cost(machines[1][0]), 100.0)
+        self.assertNotEqual(cost_fingerprint(machines[0]), cost_fingerprint(machines[1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+Running cases in a fast local scratch directory, such as a tmpfs.
+
+Cases writing many channels at high rates spend much of their run time
+writing outputs when the run directories are on a network file system.
+With a scratch directory, each case's inputs are staged into a directory of
+its own under a scratch root when the case starts, and the case runs and is
+checked there. Its run directory only receives what is kept afterwards:
+everything for failing cases, and for passing cases what their retention
+setting keeps (see `retention`), by default the log and case summary.
+
+The scratch root mirrors the layout of the run directories so that relative
+paths from a case to its turbine directory still resolve. Turbine
+directories are staged in the run directories as usual and linked into the
+scratch root, since they're only read.
+
+Cases reserve the size of their input directory, which includes their
+baselines and so approximates their outputs, from the free space of the
+scratch directory before starting, so that many parallel cases don't fill
+it. A case that doesn't fit even when no other case is running is run in
+its run directory instead.
+"""
+
+import os
+import shutil
+import tempfile
+from typing import List
+
+from .compression import CODECS
+from .error_plotting import DATA_EXT
+
+
+# Keys of a case holding paths inside its run directory
+CASE_PATH_KEYS = ('run_path', 'input_file_path', 'log_path')
+
+# Fraction of the free space of the scratch directory left unused
+SCRATCH_HEADROOM = 0.1
+
+
+def scratch_capacity(directory: str) -> int:
+    """Returns the bytes cases may use together in a scratch directory."""
+    return int(shutil.disk_usage(directory).free * (1 - SCRATCH_HEADROOM))
+
+
+def directory_size(directory: str) -> int:
+    """Returns the total size of the files in a directory tree."""
+    size = 0
+    for dirpath, _, filenames in os.walk(directory):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if not os.path.islink(path):
+                size += os.path.getsize(path)
+    return size
+
+
+def create_scratch_root(directory: str) -> str:
+    """Creates a directory of its own for a run in a scratch directory."""
+    os.makedirs(directory, exist_ok=True)
+    return tempfile.mkdtemp(prefix="pyfast-", dir=directory)
+
+
+def layout_base(cases: List[dict]) -> str:
+    """
+    Returns the directory whose layout a scratch root mirrors, the deepest
+    one containing the run and turbine directories of all cases.
+    """
+    paths = [os.path.dirname(case['run_path']) for case in cases]
+    paths += [os.path.dirname(case['turbine_run_path']) for case in cases
+              if 'turbine_run_path' in case]
+    return os.path.commonpath(paths)
+
+
+def stage_inputs(case: dict, run_path: str):
+    """
+    Copies the inputs of a case to a run directory and removes the copies
+    of its baselines and the outputs of previous runs.
+    """
+    shutil.copytree(case['input_path'], run_path, dirs_exist_ok=True)
+    remove_outputs(case, run_path)
+
+
+def remove_outputs(case: dict, run_path: str):
+    """
+    Removes the files named like the baselines of a case from a run
+    directory, including outputs compressed after checking.
+    """
+    for baseline_file in case['baseline_files']:
+        path = os.path.join(run_path, baseline_file)
+        for stored_path in [path] + [path + ext for ext in CODECS.values()]:
+            if os.path.isfile(stored_path):
+                os.remove(stored_path)
+
+
+def stage_case(case: dict, root: str, base: str) -> dict:
+    """
+    Stages a case in a scratch root and points its paths there.
+
+    Parameters
+    ----------
+    case : dict
+        Case whose run and turbine directories are inside `base`.
+    root : str
+        Scratch root created by `create_scratch_root`.
+    base : str
+        Directory whose layout the scratch root mirrors, see `layout_base`.
+
+    Returns
+    -------
+    dict
+        Original values of the case's `CASE_PATH_KEYS`, for `persist_case`.
+    """
+    scratch_path = os.path.join(root, os.path.relpath(case['run_path'], base))
+    stage_inputs(case, scratch_path)
+
+    # Keep the previous summary, which isn't rewritten if unchanged
+    report_name = os.path.basename(case['name'])
+    for ext in (".html", DATA_EXT):
+        path = os.path.join(case['run_path'], report_name + ext)
+        if os.path.isfile(path):
+            shutil.copy2(path, scratch_path)
+
+    # Link the shared turbine directory, other cases may have already
+    if 'turbine_run_path' in case:
+        link = os.path.join(root, os.path.relpath(case['turbine_run_path'], base))
+        os.makedirs(os.path.dirname(link), exist_ok=True)
+        try:
+            os.symlink(case['turbine_run_path'], link, target_is_directory=True)
+        except FileExistsError:
+            pass
+
+    paths = {key: case[key] for key in CASE_PATH_KEYS}
+    for key in CASE_PATH_KEYS:
+        case[key] = os.path.normpath(os.path.join(
+            scratch_path, os.path.relpath(paths[key], paths['run_path'])))
+    return paths
+
+
+def persist_case(case: dict, paths: dict):
+    """
+    Copies what is left of a case's scratch directory to its run directory,
+    removes the scratch directory and restores the case's paths.
+
+    Parameters
+    ----------
+    case : dict
+        Case staged by `stage_case`, already pruned if it passed.
+    paths : dict
+        Original paths returned by `stage_case`.
+    """
+    scratch_path = case['run_path']
+    shutil.copytree(scratch_path, paths['run_path'], symlinks=True,
+                    dirs_exist_ok=True)
+    shutil.rmtree(scratch_path)
+    case.update(paths)
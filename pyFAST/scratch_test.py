@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from .executor import Executor
+from .output_selection_test import write_out
+
+
+class TestScratch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.scratch = os.path.join(root, "scratch")
+
+        # Executable recording its directory, reading the turbine directory
+        # and writing the expected output of the case
+        self.cwd_path = os.path.join(root, "cwd")
+        exe = os.path.join(root, "fakefast")
+        with open(exe, "w") as f:
+            f.write(f'#!/bin/sh\npwd >> {self.cwd_path}\n'
+                    'cat ../Turbine/turbine.dat\n'
+                    'cp result.txt "$(basename "$1" .fst).out"\n')
+        os.chmod(exe, 0o755)
+
+        turbine_input_path = os.path.join(root, "r-test", "Turbine")
+        os.makedirs(turbine_input_path)
+        with open(os.path.join(turbine_input_path, "turbine.dat"), "w") as f:
+            f.write("turbine\n")
+
+        t = np.arange(50) * 0.1
+        names = ["Time", "Chan0"]
+        self.cases = []
+        for name, offset in (("case_pass", 0.0), ("case_fail", 1.0)):
+            input_path = os.path.join(root, "r-test", name)
+            run_path = os.path.join(root, "build", name)
+            os.makedirs(input_path)
+            with open(os.path.join(input_path, name + ".fst"), "w") as f:
+                f.write("\n")
+            write_out(os.path.join(input_path, name + ".out"),
+                      np.column_stack([t, np.sin(t)]), names)
+            write_out(os.path.join(input_path, "result.txt"),
+                      np.column_stack([t, np.sin(t) + offset]), names)
+            self.cases.append({
+                "name": name, "driver": "openfast", "executable_path": exe,
+                "input_path": input_path, "run_path": run_path,
+                "input_file": name + ".fst",
+                "input_file_path": os.path.join(run_path, name + ".fst"),
+                "log_path": os.path.join(run_path, name + ".log"),
+                "turbine_input_path": turbine_input_path,
+                "turbine_run_path": os.path.join(root, "build", "Turbine"),
+                "baseline_file_ext": ".out",
+                "relative_tolerance": 2, "absolute_tolerance": 1.9,
+                "plot": False,
+            })
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_run_in_scratch(self):
+        executor = Executor(self.cases, jobs=1, scratch=self.scratch)
+        executor.run()
+        passed, failed = executor.cases
+        self.assertTrue(passed['check_ok'])
+        self.assertFalse(failed['check_ok'])
+
+        # Both ran in the scratch directory, which is removed afterwards
+        with open(self.cwd_path) as f:
+            cwds = f.read().split()
+        self.assertEqual(len(cwds), 2)
+        for cwd in cwds:
+            self.assertTrue(cwd.startswith(os.path.realpath(self.scratch)))
+        self.assertListEqual(os.listdir(self.scratch), [])
+
+        # Paths point back to the run directories, the failing case is kept
+        # whole and the passing case only keeps its log and summary
+        self.assertEqual(passed['run_path'],
+                         os.path.join(self.tmp.name, "build", "case_pass"))
+        self.assertListEqual(sorted(os.listdir(failed['run_path'])),
+                             ["case_fail.fst", "case_fail.html", "case_fail.log",
+                              "case_fail.out", "result.txt"])
+        self.assertListEqual(sorted(os.listdir(passed['run_path'])),
+                             ["case_pass.html", "case_pass.log"])
+        with open(passed['log_path']) as f:
+            self.assertEqual(f.read(), "turbine\n")
+
+    def test_no_space_runs_in_run_directory(self):
+        executor = Executor(self.cases[:1], jobs=1, scratch=self.scratch)
+        self.cases[0]['scratch_size'] = shutil.disk_usage(self.tmp.name).total
+        executor.run()
+        with open(self.cwd_path) as f:
+            self.assertEqual(f.read().split(),
+                             [os.path.realpath(self.cases[0]['run_path'])])
+        self.assertTrue(executor.cases[0]['check_ok'])
+        self.assertIn("case_pass.out", os.listdir(self.cases[0]['run_path']))
+
+
+if __name__ == '__main__':
+    unittest.main()
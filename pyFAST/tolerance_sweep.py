@@ -0,0 +1,205 @@
+"""
+Pass/fail analysis of outputs over a grid of tolerances.
+
+`passing_channels` passes a channel if every sample satisfies
+
+    |test - baseline| <= atol + rtol * |baseline|
+
+For a given rtol, the smallest atol that passes a channel is the largest
+value of |test - baseline| - rtol * |baseline| over its samples. This is
+computed once per rtol of the grid for all channels, and compared with
+every atol of the grid. The data is therefore scanned once per rtol, not
+once per (rtol, atol) pair.
+"""
+
+import os
+from multiprocessing.pool import Pool
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from .regression_tester import baseline_magnitude, ATOL_MIN
+from .alignment import align_outputs
+from .compare import load_case_outputs
+
+
+def parse_grid(text: str) -> np.ndarray:
+    """
+    Parses a grid of tolerances in orders of magnitude.
+
+    Parameters
+    ----------
+    text : str
+        Comma-separated values, e.g. '1,2,3', or an inclusive range
+        'start:stop:step', e.g. '0:6:0.5'.
+
+    Returns
+    -------
+    np.ndarray
+        Grid values in increasing order.
+    """
+    try:
+        if ":" in text:
+            start, stop, step = (float(v) for v in text.split(":"))
+            values = np.arange(start, stop + step / 2, step)
+        else:
+            values = np.array([float(v) for v in text.split(",")])
+    except ValueError:
+        raise ValueError(f"invalid tolerance grid '{text}'") from None
+    return np.unique(values)
+
+
+def required_atol(test: np.ndarray, baseline: np.ndarray,
+                  rtol_orders: np.ndarray) -> np.ndarray:
+    """
+    Computes the smallest absolute tolerance passing each channel for each
+    relative tolerance.
+
+    Parameters
+    ----------
+    test, baseline : np.ndarray
+        Data in the [channels, samples] format of `passing_channels`.
+    rtol_orders : np.ndarray
+        Relative tolerances in orders of magnitude.
+
+    Returns
+    -------
+    np.ndarray
+        Absolute tolerances of shape [channels, len(rtol_orders)], infinite
+        for channels with non-finite test values.
+    """
+    difference = np.abs(test - baseline)
+    magnitude = np.abs(baseline)
+    needed = np.empty((test.shape[0], len(rtol_orders)))
+    for j, rtol in enumerate(10.0**(-np.asarray(rtol_orders, dtype=float))):
+        needed[:, j] = np.max(difference - rtol * magnitude, axis=1)
+    needed[~np.all(np.isfinite(test), axis=1)] = np.inf
+    return needed
+
+
+def sweep(test: np.ndarray, baseline: np.ndarray, rtol_orders: np.ndarray,
+          atol_orders: np.ndarray, reference: np.ndarray = None) -> np.ndarray:
+    """
+    Evaluates `passing_channels` for every pair of a tolerance grid.
+
+    Parameters
+    ----------
+    test, baseline : np.ndarray
+        Data in the [channels, samples] format of `passing_channels`.
+    rtol_orders, atol_orders : np.ndarray
+        Relative and absolute tolerances in orders of magnitude, as in the
+        case configuration.
+    reference : np.ndarray, optional
+        Baseline whose magnitude scales the absolute tolerances, by default
+        `baseline`, see `passing_channels`.
+
+    Returns
+    -------
+    np.ndarray
+        Pass flags of shape [channels, len(rtol_orders), len(atol_orders)].
+    """
+    needed = required_atol(test, baseline, rtol_orders)
+    # Absolute tolerances as computed by `channel_tolerances`
+    magnitude = baseline_magnitude(baseline if reference is None else reference)
+    atols = np.maximum(10.0**(magnitude - np.asarray(atol_orders, dtype=float)),
+                       ATOL_MIN)
+    return needed[:, :, np.newaxis] <= atols[np.newaxis, np.newaxis, :]
+
+
+def tightest_atol(passes: np.ndarray, atol_orders: np.ndarray) -> np.ndarray:
+    """
+    Returns the largest absolute tolerance order of magnitude passing each
+    channel for each relative tolerance, NaN if none passes.
+
+    Parameters
+    ----------
+    passes : np.ndarray
+        Pass flags returned by `sweep`.
+    atol_orders : np.ndarray
+        Absolute tolerances of the grid in increasing order.
+    """
+    # Passing is monotonic in atol: search the last passing order
+    any_pass = passes.any(axis=-1)
+    last = passes.shape[-1] - 1 - np.argmax(passes[..., ::-1], axis=-1)
+    return np.where(any_pass, np.asarray(atol_orders)[last], np.nan)
+
+
+def sweep_case(case: dict, rtol_orders: np.ndarray,
+               atol_orders: np.ndarray) -> List[dict]:
+    """
+    Sweeps the tolerance grid for each output of a case.
+
+    Returns
+    -------
+    List[dict]
+        For each baseline file, its 'file', 'channel_names' and the
+        'tightest' absolute tolerance order per channel and relative
+        tolerance, see `tightest_atol`.
+    """
+    results = []
+    for baseline_file in case['baseline_files']:
+        out_data, baseline_data, channel_names, _, _ = load_case_outputs(
+            case, os.path.join(case['run_path'], baseline_file),
+            os.path.join(case['input_path'], baseline_file))
+        full_baseline_data = baseline_data
+        out_data, baseline_data, _ = align_outputs(out_data, baseline_data)
+        passes = sweep(out_data.T, baseline_data.T, rtol_orders, atol_orders,
+                       reference=full_baseline_data.T)
+        tightest = tightest_atol(passes, atol_orders)
+        results.append({
+            'file': baseline_file,
+            'channel_names': channel_names,
+            'tightest': tightest,
+        })
+    return results
+
+
+def _sweep(args) -> Tuple[dict, List[dict]]:
+    case, rtol_orders, atol_orders = args
+    try:
+        return case, sweep_case(case, rtol_orders, atol_orders)
+    except (OSError, ValueError, AssertionError) as error:
+        case['error'] = str(error)
+        return case, []
+
+
+def sweep_cases(cases: List[dict], rtol_orders: np.ndarray,
+                atol_orders: np.ndarray,
+                jobs: int = 1) -> Iterator[Tuple[dict, List[dict]]]:
+    """
+    Sweeps the tolerance grid for many cases in parallel.
+
+    Yields
+    ------
+    Tuple[dict, List[dict]]
+        Case and its `sweep_case` results, in the order of `cases`.
+    """
+    arguments = [(case, rtol_orders, atol_orders) for case in cases]
+    if jobs == 1:
+        yield from map(_sweep, arguments)
+        return
+    with Pool(jobs) as pool:
+        yield from pool.imap(_sweep, arguments)
+
+
+def format_sweep(case: dict, results: List[dict],
+                 rtol_orders: np.ndarray) -> str:
+    """
+    Formats the tightest passing absolute tolerance for each relative
+    tolerance, for the case as a whole and for each channel.
+    """
+    header = "%-42s" % "rtol:" + "".join(f"{r:>7g}" for r in rtol_orders)
+    lines = [f"{case['name']}", header]
+
+    def row(label, values):
+        return f"{label:<42}" + "".join(
+            f"{'-' if np.isnan(v) else format(v, 'g'):>7}" for v in values)
+
+    if case.get('error'):
+        lines.append(f"  ERROR {case['error']}")
+    for result in results:
+        # A case passes when all of its channels pass
+        lines.append(row(f"  {result['file']}", result['tightest'].min(axis=0)))
+        for name, values in zip(result['channel_names'], result['tightest']):
+            lines.append(row(f"    {name}", values))
+    return "\n".join(lines)
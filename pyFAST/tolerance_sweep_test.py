@@ -0,0 +1,56 @@
+import unittest
+
+import numpy as np
+
+from .regression_tester import passing_channels
+from .tolerance_sweep import parse_grid, sweep, tightest_atol
+
+
+class TestToleranceSweep(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        t = np.linspace(0, 10, 500)
+        self.baseline = np.vstack([t, 10 * np.sin(t), 1000 + 50 * np.cos(t),
+                                   1e-3 * t, np.zeros_like(t)])
+        scales = np.array([0, 1e-4, 1e-2, 1e-6, 1e-1])[:, np.newaxis]
+        self.test = self.baseline + scales * rng.standard_normal(self.baseline.shape)
+
+    def test_parse_grid(self):
+        np.testing.assert_allclose(parse_grid("0:2:0.5"), [0, 0.5, 1, 1.5, 2])
+        np.testing.assert_allclose(parse_grid("3,1,2"), [1, 2, 3])
+        with self.assertRaises(ValueError):
+            parse_grid("1:2")
+
+    def test_sweep_matches_passing_channels(self):
+        rtol_orders = parse_grid("0:6:1")
+        atol_orders = parse_grid("0:6:0.5")
+        passes = sweep(self.test, self.baseline, rtol_orders, atol_orders)
+        self.assertEqual(passes.shape, (5, 7, 13))
+        for i, rtol in enumerate(rtol_orders):
+            for j, atol in enumerate(atol_orders):
+                np.testing.assert_array_equal(
+                    passes[:, i, j],
+                    passing_channels(self.test, self.baseline, rtol, atol))
+
+    def test_sweep_of_truncated_output(self):
+        # Compared over a short overlap, scaled by the whole baseline
+        test, baseline = self.test[:, :20], self.baseline[:, :20]
+        passes = sweep(test, baseline, [2], [0, 2, 4], reference=self.baseline)
+        for j, atol in enumerate([0, 2, 4]):
+            np.testing.assert_array_equal(
+                passes[:, 0, j],
+                passing_channels(test, baseline, 2, atol, reference=self.baseline))
+
+    def test_tightest_atol(self):
+        test = self.test.copy()
+        test[1, 10] = np.nan
+        atol_orders = parse_grid("0:6:0.5")
+        tightest = tightest_atol(sweep(test, self.baseline, [6], atol_orders),
+                                 atol_orders)
+        self.assertTrue(np.isnan(tightest[1, 0]))
+        self.assertEqual(tightest[0, 0], 6)
+        self.assertLess(tightest[4, 0], tightest[3, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,9 +2,13 @@
 
 
 import os
+import sys
+import hashlib
 from stat import ST_MODE
 from time import perf_counter
 
+import numpy as np
+
 
 def validate_directory(directory: str, create: bool = True):
     """
@@ -65,3 +69,155 @@ def validate_executable(file_path: str):
         raise PermissionError(f"{file_path} does not have proper permissions")
 
 
+def file_digest(file_path: str, algorithm: str = "sha256") -> str:
+    """
+    Computes the hex digest of a file's contents.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the file to hash.
+    algorithm : str, default: "sha256"
+        Name of the `hashlib` algorithm to use.
+
+    Returns
+    -------
+    str
+        Hex digest of the file contents.
+    """
+    h = hashlib.new(algorithm)
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def directory_signature(directory: str, algorithm: str = "sha256",
+                        ignore: tuple = ()) -> str:
+    """
+    Computes a digest of the names, sizes and modification times of all
+    files in a directory tree, without reading them.
+
+    Parameters
+    ----------
+    directory : str
+        Path to the directory.
+    algorithm : str, default: "sha256"
+        Name of the `hashlib` algorithm to use.
+    ignore : tuple, default: ()
+        Suffixes of files to leave out, e.g. generated index files.
+
+    Returns
+    -------
+    str
+        Hex digest, which changes if any file is added, removed, renamed,
+        resized or touched.
+    """
+    h = hashlib.new(algorithm)
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if ignore and name.endswith(ignore):
+                continue
+            path = os.path.join(dirpath, name)
+            stat = os.stat(path)
+            h.update(f"{os.path.relpath(path, directory)}\t{stat.st_size}\t"
+                     f"{stat.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def wait_with_rusage(process):
+    """
+    Waits for a child process to exit and collects its resource usage.
+
+    Parameters
+    ----------
+    process : subprocess.Popen
+        Running child process.
+
+    Returns
+    -------
+    ret_code : int
+        Return code of the process (negative signal number if killed).
+    usage : dict or None
+        User time, system time (seconds) and peak resident set size (bytes)
+        of the process, or None if the platform doesn't support `os.wait4`.
+    """
+    if not hasattr(os, "wait4"):
+        return process.wait(), None
+
+    _, status, rusage = os.wait4(process.pid, 0)
+    if os.WIFSIGNALED(status):
+        process.returncode = -os.WTERMSIG(status)
+    else:
+        process.returncode = os.WEXITSTATUS(status)
+
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    max_rss = rusage.ru_maxrss
+    if sys.platform != "darwin":
+        max_rss *= 1024
+
+    usage = {
+        "user_time": rusage.ru_utime,
+        "sys_time": rusage.ru_stime,
+        "max_rss": max_rss,
+    }
+    return process.returncode, usage
+
+
+def set_affinity(pid: int, cpus):
+    """
+    Pins a process to a set of CPU cores, if supported by the platform.
+
+    Parameters
+    ----------
+    pid : int
+        Process ID.
+    cpus : Iterable[int]
+        Indices of the cores the process may run on.
+    """
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(pid, cpus)
+        except (OSError, ValueError):
+            pass
+
+
+def pin_to_cores(cpus):
+    """
+    Returns a `preexec_fn` for `subprocess.Popen` that pins the child process
+    to a set of CPU cores before it runs, so that it and any threads it
+    starts never run elsewhere.
+
+    Parameters
+    ----------
+    cpus : Iterable[int]
+        Indices of the cores the process may run on.
+
+    Returns
+    -------
+    Callable or None
+        None if there are no cores or the platform doesn't support pinning.
+    """
+    cpus = list(cpus or [])
+    if not cpus or not hasattr(os, "sched_setaffinity"):
+        return None
+
+    def pin():
+        try:
+            os.sched_setaffinity(0, cpus)
+        except (OSError, ValueError):
+            pass
+    return pin
+
+
+def json_default(value):
+    """
+    Converts NumPy values contained in case results to JSON types, for use
+    as the `default` argument of `json.dump`.
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
@@ -0,0 +1,212 @@
+"""
+Long-lived Python workers running script-driven cases, e.g. 'openfast-py',
+without starting a new interpreter for every case.
+
+A worker imports the script's dependencies once, skipping its __main__
+block, and then runs the script as __main__ for each case it receives, in
+the case's run directory and with its output redirected to the case log.
+Modules imported by the script, and shared libraries they load, are kept
+between cases.
+
+Requests and replies are JSON lines on the worker's stdin and on a copy of
+its original stdout. This module only uses the standard library so that it
+can be run by the interpreter of the test cases with
+
+    python warm_worker.py <script_path>
+"""
+
+import os
+import sys
+import json
+import atexit
+import runpy
+import resource
+import traceback
+import subprocess
+
+
+class WorkerLost(Exception):
+    """Raised when a worker exits while running a case."""
+
+    def __init__(self, ret_code: int):
+        super().__init__(f"worker exited with code {ret_code}")
+        self.ret_code = ret_code
+
+
+def _exit_code(error: SystemExit) -> int:
+    if error.code is None:
+        return 0
+    return error.code if isinstance(error.code, int) else 1
+
+
+def _run_request(script_path: str, request: dict, devnull: int) -> dict:
+    """Runs the script as __main__ for one case and returns its results."""
+
+    # Send all output, including that of shared libraries, to the case log
+    log = os.open(request['log_path'], os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                  0o644)
+    os.dup2(log, 1)
+    os.dup2(log, 2)
+    os.close(log)
+
+    before = resource.getrusage(resource.RUSAGE_SELF)
+    try:
+        os.chdir(request['cwd'])
+        sys.argv = [script_path] + request['args']
+        runpy.run_path(script_path, run_name="__main__")
+        ret_code = 0
+    except SystemExit as error:
+        ret_code = _exit_code(error)
+    except BaseException:
+        traceback.print_exc()
+        ret_code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(devnull, 1)
+        os.dup2(devnull, 2)
+    after = resource.getrusage(resource.RUSAGE_SELF)
+
+    # ru_maxrss is the peak of the worker, an upper bound for the case
+    max_rss = after.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return {
+        "ret_code": ret_code,
+        "user_time": after.ru_utime - before.ru_utime,
+        "sys_time": after.ru_stime - before.ru_stime,
+        "max_rss": max_rss,
+    }
+
+
+def serve(script_path: str):
+    """
+    Runs the worker loop until its stdin is closed.
+
+    Parameters
+    ----------
+    script_path : str
+        Path to the Python script run for each case.
+    """
+
+    # Keep the original stdout for replies and silence fds 1 and 2 between
+    # cases
+    replies = os.fdopen(os.dup(1), "w")
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+
+    # Import the script's dependencies without running its __main__ block
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script_path)))
+    runpy.run_path(script_path, run_name="pyfast_warm")
+
+    for line in sys.stdin:
+        reply = _run_request(script_path, json.loads(line), devnull)
+        replies.write(json.dumps(reply) + "\n")
+        replies.flush()
+
+
+class WarmWorker:
+    """
+    Handle to a worker process running cases of one script.
+    """
+
+    def __init__(self, script_path: str, env: dict):
+        """
+        Starts the worker.
+
+        Parameters
+        ----------
+        script_path : str
+            Path to the Python script run for each case.
+        env : dict
+            Environment of the worker, shared by all of its cases.
+        """
+        self.cases_run = 0
+        self.process = subprocess.Popen(
+            ['python', os.path.abspath(__file__), script_path],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env,
+            text=True)
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+    def run(self, input_file: str, cwd: str, log_path: str) -> dict:
+        """
+        Runs a case.
+
+        Parameters
+        ----------
+        input_file : str
+            Input file passed to the script.
+        cwd : str
+            Run directory of the case.
+        log_path : str
+            Path of the case log.
+
+        Returns
+        -------
+        dict
+            Return code 'ret_code', 'user_time', 'sys_time' and 'max_rss'.
+
+        Raises
+        ------
+        WorkerLost
+            If the worker exited, e.g. because the case aborted the process.
+        """
+        request = {'args': [input_file], 'cwd': cwd, 'log_path': log_path}
+        try:
+            self.process.stdin.write(json.dumps(request) + "\n")
+            self.process.stdin.flush()
+            line = self.process.stdout.readline()
+        except (BrokenPipeError, OSError):
+            line = ""
+        if not line:
+            ret_code = self.process.wait()
+            raise WorkerLost(ret_code)
+        self.cases_run += 1
+        return json.loads(line)
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            self.process.wait()
+
+
+# Workers of this process by script and environment, and scripts whose
+# cases must run in their own process
+_workers = {}
+_cold_scripts = set()
+
+
+def get_worker(script_path: str, env: dict) -> WarmWorker:
+    """
+    Returns this process's worker for a script and environment, starting
+    it if it doesn't exist or has exited.
+    """
+    key = (script_path, env.get('PATH'), env.get('OMP_NUM_THREADS'))
+    worker = _workers.get(key)
+    if worker is None or worker.process.poll() is not None:
+        worker = _workers[key] = WarmWorker(script_path, env)
+    return worker
+
+
+def disable(script_path: str):
+    """Stops the workers of a script and runs its cases cold from now on."""
+    _cold_scripts.add(script_path)
+    for key in [k for k in _workers if k[0] == script_path]:
+        _workers.pop(key).close()
+
+
+def is_disabled(script_path: str) -> bool:
+    return script_path in _cold_scripts
+
+
+@atexit.register
+def close_workers():
+    """Stops all workers of this process."""
+    for worker in _workers.values():
+        worker.close()
+    _workers.clear()
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1])
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+
+from .executor import Executor
+from . import warm_worker
+
+
+# Script writing the process ID to the output. When SINGLE_USE is set it
+# fails if run twice in one process, like a library that can't be reused.
+SCRIPT = """
+import os
+import sys
+import json
+
+state = sys.modules.setdefault("fake_library_state", type(sys)("state"))
+
+if __name__ == "__main__":
+    runs = getattr(state, "runs", 0) + 1
+    state.runs = runs
+    if os.environ.get("SINGLE_USE") and runs > 1:
+        sys.exit("library already initialized")
+    name = os.path.splitext(sys.argv[1])[0]
+    with open(name + ".lin", "w") as f:
+        f.write(str(os.getpid()))
+    print("ran", name)
+"""
+
+
+class TestWarmWorker(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        script = os.path.join(root, "OpenFAST.py")
+        with open(script, "w") as f:
+            f.write(SCRIPT)
+
+        self.cases = []
+        for name in ("case_a", "case_b", "case_c"):
+            input_path = os.path.join(root, "r-test", name)
+            run_path = os.path.join(root, "build", name)
+            os.makedirs(input_path)
+            for ext in (".fst", ".lin"):
+                with open(os.path.join(input_path, name + ext), "w") as f:
+                    f.write("\n")
+            self.cases.append({
+                "name": name, "driver": "openfast-py", "script_path": script,
+                "input_path": input_path, "run_path": run_path,
+                "input_file": name + ".fst",
+                "input_file_path": os.path.join(run_path, name + ".fst"),
+                "log_path": os.path.join(run_path, name + ".log"),
+                "baseline_file_ext": ".lin",
+            })
+
+    def tearDown(self):
+        warm_worker.close_workers()
+        warm_worker._cold_scripts.clear()
+        os.environ.pop("SINGLE_USE", None)
+        self.tmp.cleanup()
+
+    def _pids(self, cases):
+        pids = []
+        for case in cases:
+            with open(os.path.join(case['run_path'], case['name'] + ".lin")) as f:
+                pids.append(f.read())
+        return pids
+
+    def test_cases_share_worker(self):
+        executor = Executor(self.cases, jobs=1, warm=True)
+        executor.run()
+        self.assertTrue(all(c['ret_code'] == 0 for c in executor.cases))
+        self.assertEqual(len(set(self._pids(executor.cases))), 1)
+        self.assertNotEqual(self._pids(executor.cases)[0], str(os.getpid()))
+        with open(executor.cases[1]['log_path']) as f:
+            self.assertEqual(f.read(), "ran case_b\n")
+
+    def test_fallback_when_library_not_reusable(self):
+        os.environ["SINGLE_USE"] = "1"
+        executor = Executor(self.cases, jobs=1, warm=True)
+        executor.run()
+        self.assertTrue(all(c['ret_code'] == 0 for c in executor.cases))
+        self.assertTrue(warm_worker.is_disabled(self.cases[0]['script_path']))
+        self.assertEqual(len(set(self._pids(executor.cases))), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
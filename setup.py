@@ -31,7 +31,8 @@ setup(
     python_requires=">=3.6",
     install_requires=["numpy", "bokeh==2.4"],
     extras_require={
-        "dev": ["pytest", "pytest-cov", "pytest-xdist"]
+        "dev": ["pytest", "pytest-cov", "pytest-xdist"],
+        "zstd": ["zstandard"],
     },
     test_suite="pytest",
     tests_require=["pytest", "pytest-xdist", "pytest-cov"],